@@ -5,41 +5,202 @@ Performs comprehensive code analysis, bug detection, and improvement suggestions
 """
 
 import os
-import sys
 import json
-import requests
+import asyncio
+import functools
+import hashlib
 from pathlib import Path
 import subprocess
 from typing import List, Dict, Any
-import re
 
-class AICodeReviewer:
+from ai_client import AIClientBase, get_http_client, close_http_client
+
+# Supported file extensions
+CODE_EXTENSIONS = frozenset({
+    '.js', '.ts', '.jsx', '.tsx', '.py', '.java', '.cpp', '.c', '.cs',
+    '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.scala', '.clj'
+})
+
+# Completed analyses are memoized on disk by (model, prompt); AI_REVIEW_NOCACHE=1 bypasses it
+CACHE_DIR = Path('.cache/ai-review')
+MANIFEST_PATH = CACHE_DIR / 'manifest.json'
+
+# Files are packed into one batched completion until this many estimated prompt tokens
+BATCH_TOKEN_BUDGET = 12000
+
+# orjson is optional and only used to parse model responses faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pygit2 is optional; it lists changed files without spawning git/gh
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+# tiktoken is optional; without it token counts are estimated as len(text) // 4
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Tokens reserved for the review instructions when sizing each file's code slot
+PROMPT_OVERHEAD_TOKENS = 500
+
+# xxhash is optional; it builds cache keys several times faster than blake2b
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+_EXT_TO_LANG = {
+    '.js': 'javascript', '.ts': 'typescript', '.jsx': 'jsx',
+    '.tsx': 'tsx', '.py': 'python', '.java': 'java',
+    '.cpp': 'cpp', '.c': 'c', '.cs': 'csharp',
+    '.php': 'php', '.rb': 'ruby', '.go': 'go'
+}
+
+@functools.lru_cache(maxsize=64)
+def get_language_from_extension(file_path: str) -> str:
+    """Get programming language from file extension"""
+    return _EXT_TO_LANG.get(Path(file_path).suffix.lower(), 'text')
+
+@functools.lru_cache(maxsize=1)
+def get_token_encoder():
+    """Return the review model's tokenizer, or None when tiktoken or its BPE data is unavailable"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model('gpt-4o-mini')
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count prompt tokens exactly when possible, otherwise estimate them"""
+    encoder = get_token_encoder()
+    if encoder is None:
+        return len(text) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut text down to at most budget tokens, marking it as truncated"""
+    encoder = get_token_encoder()
+    if encoder is None:
+        if len(text) <= budget * 4:
+            return text
+        return text[:budget * 4] + "\n... (truncated)"
+    tokens = encoder.encode(text, disallowed_special=())
+    if len(tokens) <= budget:
+        return text
+    return encoder.decode(tokens[:budget]) + "\n... (truncated)"
+
+def review_max_tokens(code: str) -> int:
+    """Size the response budget to the input; short files don't need a 2000-token review"""
+    return min(2000, 400 + len(code) // 20)
+
+def loads_json(text: str):
+    """Parse JSON with orjson when available; errors are json.JSONDecodeError either way"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def read_sse_delta(line: str):
+    """Extract the content delta from one server-sent event line; None marks the end of the stream"""
+    if not line.startswith('data:'):
+        return ''
+    data = line[5:].strip()
+    if data == '[DONE]':
+        return None
+    choices = loads_json(data).get('choices') or []
+    if not choices:
+        # The trailing usage chunk carries no choices
+        return ''
+    return choices[0].get('delta', {}).get('content') or ''
+
+class AICodeReviewer(AIClientBase):
     def __init__(self):
-        self.openrouter_key = os.getenv('OPENROUTER_API_KEY')
-        self.localai_url = os.getenv('LOCALAI_BASE_URL', 'http://localhost:8080')
-        self.use_localai = bool(self.localai_url and not self.openrouter_key)
-
-        # Supported file extensions
-        self.code_extensions = {
-            '.js', '.ts', '.jsx', '.tsx', '.py', '.java', '.cpp', '.c', '.cs',
-            '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.scala', '.clj'
-        }
+        super().__init__()
+        self._batch_model = 'local-model' if self.use_localai else 'openai/gpt-4o-mini'
+
+        # File contents keyed by (path, mtime_ns, size) so edits invalidate the entry
+        self._content_cache: Dict[tuple, str] = {}
+
+    def new_digest(self):
+        """Return a 128-bit hasher for cache keys, preferring xxh3 over blake2b"""
+        # Keys only need to be stable, not collision-resistant against an attacker
+        if xxhash is not None:
+            return xxhash.xxh3_128()
+        return hashlib.blake2b(digest_size=16)
+
+    def get_cache_path(self, model: str, prompt: str) -> Path:
+        """Get the on-disk cache location for a model/prompt pair"""
+        digest = self.new_digest()
+        digest.update(model.encode())
+        digest.update(b'\0')
+        digest.update(prompt.encode())
+        return CACHE_DIR / f"{digest.hexdigest()}.json"
+
+    def load_cached_analysis(self, cache_path: Path):
+        """Return a cached analysis, or None on a miss or when caching is disabled"""
+        if os.getenv('AI_REVIEW_NOCACHE') == '1':
+            return None
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
 
-    def get_ai_client(self):
-        """Get AI client configuration"""
-        if self.use_localai:
-            return {
-                'base_url': f"{self.localai_url}/v1",
-                'api_key': 'localai'
-            }
+    def save_cached_analysis(self, cache_path: Path, analysis: Dict[str, Any]):
+        """Persist a successful analysis so unchanged files are not re-sent"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(analysis, f)
+        except OSError as e:
+            print(f"Could not write AI review cache: {e}")
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the path -> {hash, analysis} manifest written by the previous run"""
+        if os.getenv('AI_REVIEW_NOCACHE') == '1':
+            return {}
+        try:
+            with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def save_manifest(self, manifest: Dict[str, Dict[str, Any]]):
+        """Persist the manifest so the next run can skip files whose content is unchanged"""
+        try:
+            MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+        except OSError as e:
+            print(f"Could not write AI review manifest: {e}")
+
+    def get_changed_files_pygit2(self) -> List[str]:
+        """Get changed files in-process with libgit2; raises if a revision cannot be resolved"""
+        repo = pygit2.Repository(pygit2.discover_repository('.'))
+        head = repo.revparse_single('HEAD').peel(pygit2.Commit)
+        base_ref = os.getenv('GITHUB_BASE_REF')
+        if os.getenv('GITHUB_EVENT_NAME') == 'pull_request' and base_ref:
+            # Diff against the merge base, as `gh pr diff` does
+            base = repo.revparse_single(f'origin/{base_ref}').peel(pygit2.Commit)
+            base = repo[repo.merge_base(base.id, head.id)]
         else:
-            return {
-                'base_url': 'https://openrouter.ai/api/v1',
-                'api_key': self.openrouter_key
-            }
+            base = repo.revparse_single('HEAD~1').peel(pygit2.Commit)
+        return [delta.new_file.path for delta in repo.diff(base, head).deltas]
 
     def get_changed_files(self) -> List[str]:
         """Get list of changed files in PR or commit"""
+        if pygit2 is not None:
+            try:
+                return self.get_changed_files_pygit2()
+            except (pygit2.GitError, KeyError, ValueError, TypeError) as e:
+                print(f"pygit2 diff unavailable ({e}); falling back to git CLI")
+
         try:
             if os.getenv('GITHUB_EVENT_NAME') == 'pull_request':
                 # Get changed files from PR
@@ -55,27 +216,73 @@ class AICodeReviewer:
                     capture_output=True, text=True, check=True
                 )
                 return result.stdout.strip().split('\n')
-        except subprocess.CalledProcessError:
+        except (subprocess.CalledProcessError, FileNotFoundError):
             return []
 
-    def read_file_content(self, file_path: str) -> str:
-        """Read file content safely"""
+    async def read_file_content(self, file_path: str) -> str:
+        """Read file content on a worker thread so reads don't block the event loop"""
+        return await asyncio.to_thread(self.read_file_content_sync, file_path)
+
+    def read_file_content_sync(self, file_path: str) -> str:
+        """Read file content safely, reusing the last read while the file is unchanged"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
+            st = os.stat(file_path)
+            key = (file_path, st.st_mtime_ns, st.st_size)
+            if key not in self._content_cache:
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    self._content_cache[key] = f.read()
+            return self._content_cache[key]
         except Exception as e:
             return f"Error reading file: {e}"
 
-    def analyze_code_with_ai(self, code: str, file_path: str) -> Dict[str, Any]:
+    async def request_completion(self, payload: Dict[str, Any]):
+        """Stream a chat completion and return the accumulated message content, or None on HTTP error"""
+        url = self._endpoint
+        payload = {**payload, 'stream': True, 'stream_options': {'include_usage': True}}
+        client = get_http_client()
+        if client is None:
+            return await asyncio.to_thread(self.stream_completion_sync, url, payload)
+
+        async with client.stream('POST', url, headers=self.headers, json=payload) as response:
+            if response.status_code != 200:
+                return None
+            if 'application/json' in response.headers.get('Content-Type', ''):
+                # Provider ignored stream=True and sent a single JSON body
+                await response.aread()
+                return response.json()['choices'][0]['message']['content']
+
+            parts = []
+            async for line in response.aiter_lines():
+                delta = read_sse_delta(line)
+                if delta is None:
+                    break
+                parts.append(delta)
+            return ''.join(parts)
+
+    def stream_completion_sync(self, url: str, payload: Dict[str, Any]):
+        """requests-based equivalent of request_completion for when httpx is unavailable"""
+        with self.session().post(url, headers=self.headers, json=payload, stream=True, timeout=60) as response:
+            if response.status_code != 200:
+                return None
+            if 'application/json' in response.headers.get('Content-Type', ''):
+                return response.json()['choices'][0]['message']['content']
+
+            parts = []
+            for line in response.iter_lines():
+                delta = read_sse_delta(line.decode('utf-8', errors='ignore'))
+                if delta is None:
+                    break
+                parts.append(delta)
+            return ''.join(parts)
+
+    async def analyze_code_with_ai(self, code: str, file_path: str) -> Dict[str, Any]:
         """Analyze code using AI"""
-        client_config = self.get_ai_client()
-
         prompt = f"""
         Analyze this code file and provide a comprehensive review:
 
         File: {file_path}
         Code:
-        ```{self.get_language_from_extension(file_path)}
+        ```{get_language_from_extension(file_path)}
         {code}
         ```
 
@@ -99,39 +306,132 @@ class AICodeReviewer:
         - summary: string
         """
 
-        try:
-            response = requests.post(
-                f"{client_config['base_url']}/chat/completions",
-                headers={
-                    'Authorization': f"Bearer {client_config['api_key']}",
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'anthropic/claude-3-haiku' if not self.use_localai else 'local-model',
-                    'messages': [{'role': 'user', 'content': prompt}],
-                    'temperature': 0.3,
-                    'max_tokens': 2000
-                },
-                timeout=60
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content']
+        model = self._model
+        cache_path = self.get_cache_path(model, prompt)
+        cached = self.load_cached_analysis(cache_path)
+        if cached is not None:
+            return cached
+
+        payload = {
+            'model': model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': 0.1,
+            'max_tokens': review_max_tokens(code)
+        }
 
-                # Try to parse JSON response
-                try:
-                    return json.loads(content)
-                except json.JSONDecodeError:
-                    # Fallback to structured text parsing
-                    return self.parse_text_response(content)
-            else:
+        try:
+            content = await self.request_completion(payload)
+            if content is None:
                 return self.get_fallback_analysis(file_path)
 
+            # Try to parse JSON response
+            try:
+                analysis = loads_json(content)
+            except json.JSONDecodeError:
+                # Fallback to structured text parsing
+                analysis = self.parse_text_response(content)
+            self.save_cached_analysis(cache_path, analysis)
+            return analysis
+
         except Exception as e:
             print(f"AI analysis failed: {e}")
             return self.get_fallback_analysis(file_path)
 
+    def batch_files(self, files: List[tuple]) -> List[List[tuple]]:
+        """Group (path, code) pairs into batches by token count rather than file count"""
+        batches = []
+        current = []
+        current_tokens = 0
+        for file_path, code in files:
+            tokens = count_tokens(code)
+            if current and current_tokens + tokens > BATCH_TOKEN_BUDGET:
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append((file_path, code))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def analyze_codes_with_ai(self, files: List[tuple]) -> Dict[str, Dict[str, Any]]:
+        """Analyze several files in a single completion, falling back to per-file calls"""
+        if len(files) == 1:
+            file_path, code = files[0]
+            return {file_path: await self.analyze_code_with_ai(code, file_path)}
+
+        sections = "\n\n".join(
+            f"### FILE {k}: {file_path}\n```{get_language_from_extension(file_path)}\n{code}\n```"
+            for k, (file_path, code) in enumerate(files, 1)
+        )
+        prompt = f"""
+        Analyze each of the following code files and provide a comprehensive review of each:
+
+        {sections}
+
+        For every file provide:
+        1. Code quality assessment (1-10 scale)
+        2. Potential bugs or issues
+        3. Security vulnerabilities
+        4. Performance concerns
+        5. Best practice violations
+        6. Suggested improvements
+        7. Code complexity analysis
+
+        Format your response as a single JSON object {{"files": [...]}} with one entry per file,
+        in the order given, each with these keys:
+        - path: string (exactly as given after "FILE k:")
+        - quality_score: number
+        - bugs: array of strings
+        - security: array of strings
+        - performance: array of strings
+        - best_practices: array of strings
+        - improvements: array of strings
+        - complexity: string
+        - summary: string
+        """
+
+        model = self._batch_model
+        cache_path = self.get_cache_path(model, prompt)
+        cached = self.load_cached_analysis(cache_path)
+        if cached is not None:
+            return cached
+
+        payload = {
+            'model': model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': 0.1,
+            'max_tokens': sum(review_max_tokens(code) for _, code in files)
+        }
+
+        try:
+            content = await self.request_completion(payload)
+        except Exception as e:
+            print(f"AI batch analysis failed: {e}")
+            return {file_path: self.get_fallback_analysis(file_path) for file_path, _ in files}
+
+        if content is None:
+            return {file_path: self.get_fallback_analysis(file_path) for file_path, _ in files}
+
+        try:
+            entries = loads_json(content)['files']
+            by_path = {entry.get('path'): entry for entry in entries}
+            if all(file_path in by_path for file_path, _ in files):
+                analyses = {file_path: by_path[file_path] for file_path, _ in files}
+            elif len(entries) == len(files):
+                analyses = {file_path: entry for (file_path, _), entry in zip(files, entries)}
+            else:
+                raise ValueError("batched response does not cover every file")
+        except (TypeError, ValueError, KeyError, AttributeError) as e:
+            print(f"Batched response unusable ({e}); reviewing files individually")
+            results = await asyncio.gather(
+                *(self.analyze_code_with_ai(code, file_path) for file_path, code in files)
+            )
+            return {file_path: result for (file_path, _), result in zip(files, results)}
+
+        self.save_cached_analysis(cache_path, analyses)
+        return analyses
+
     def parse_text_response(self, content: str) -> Dict[str, Any]:
         """Parse text response into structured format"""
         return {
@@ -158,20 +458,9 @@ class AICodeReviewer:
             'summary': f'Basic analysis for {file_path} - AI analysis unavailable'
         }
 
-    def get_language_from_extension(self, file_path: str) -> str:
-        """Get programming language from file extension"""
-        ext = Path(file_path).suffix.lower()
-        languages = {
-            '.js': 'javascript', '.ts': 'typescript', '.jsx': 'jsx',
-            '.tsx': 'tsx', '.py': 'python', '.java': 'java',
-            '.cpp': 'cpp', '.c': 'c', '.cs': 'csharp',
-            '.php': 'php', '.rb': 'ruby', '.go': 'go'
-        }
-        return languages.get(ext, 'text')
-
     def generate_report(self, analyses: Dict[str, Dict]) -> str:
         """Generate comprehensive review report"""
-        report = "# 🤖 AI Code Review Report\n\n"
+        parts = ["# 🤖 AI Code Review Report\n\n"]
 
         total_score = 0
         file_count = 0
@@ -183,8 +472,8 @@ class AICodeReviewer:
             file_count += 1
             total_score += analysis.get('quality_score', 5)
 
-            report += f"## 📄 {file_path}\n\n"
-            report += f"**Quality Score:** {analysis.get('quality_score', 'N/A')}/10\n\n"
+            parts.append(f"## 📄 {file_path}\n\n")
+            parts.append(f"**Quality Score:** {analysis.get('quality_score', 'N/A')}/10\n\n")
 
             sections = [
                 ('🐛 Bugs', analysis.get('bugs', [])),
@@ -196,42 +485,42 @@ class AICodeReviewer:
 
             for title, items in sections:
                 if items:
-                    report += f"### {title}\n"
-                    for item in items:
-                        report += f"- {item}\n"
-                    report += "\n"
+                    parts.append(f"### {title}\n")
+                    parts.extend(f"- {item}\n" for item in items)
+                    parts.append("\n")
 
             if analysis.get('complexity'):
-                report += f"**Complexity:** {analysis['complexity']}\n\n"
+                parts.append(f"**Complexity:** {analysis['complexity']}\n\n")
 
             if analysis.get('summary'):
-                report += f"**Summary:** {analysis['summary']}\n\n"
+                parts.append(f"**Summary:** {analysis['summary']}\n\n")
 
-            report += "---\n\n"
+            parts.append("---\n\n")
 
         if file_count > 0:
             avg_score = total_score / file_count
-            report += f"## 📊 Overall Assessment\n\n"
-            report += f"**Average Quality Score:** {avg_score:.1f}/10\n"
-            report += f"**Files Analyzed:** {file_count}\n\n"
+            parts.append(f"## 📊 Overall Assessment\n\n")
+            parts.append(f"**Average Quality Score:** {avg_score:.1f}/10\n")
+            parts.append(f"**Files Analyzed:** {file_count}\n\n")
 
             if avg_score >= 8:
-                report += "🎉 Excellent code quality!\n"
+                parts.append("🎉 Excellent code quality!\n")
             elif avg_score >= 6:
-                report += "👍 Good code quality with room for improvement.\n"
+                parts.append("👍 Good code quality with room for improvement.\n")
             else:
-                report += "⚠️ Code quality needs attention.\n"
+                parts.append("⚠️ Code quality needs attention.\n")
 
-        return report
+        return "".join(parts)
 
-    def run_review(self):
+    async def run_review(self):
         """Main review execution"""
         print("🤖 Starting AI Code Review...")
 
         changed_files = self.get_changed_files()
+        suffixes = {f: os.path.splitext(f)[1].lower() for f in changed_files}
         code_files = [
             f for f in changed_files
-            if Path(f).suffix.lower() in self.code_extensions and Path(f).exists()
+            if suffixes[f] in CODE_EXTENSIONS and os.path.exists(f)
         ]
 
         if not code_files:
@@ -240,15 +529,57 @@ class AICodeReviewer:
 
         print(f"📄 Analyzing {len(code_files)} code files...")
 
-        analyses = {}
-        for file_path in code_files[:5]:  # Limit to 5 files for demo
-            print(f"🔍 Analyzing {file_path}...")
-            code = self.read_file_content(file_path)
-            if len(code) > 10000:  # Limit file size
-                code = code[:10000] + "\n... (truncated)"
-
-            analysis = self.analyze_code_with_ai(code, file_path)
-            analyses[file_path] = analysis
+        selected = code_files[:5]  # Limit to 5 files for demo
+        codes = await asyncio.gather(*(self.read_file_content(f) for f in selected))
+
+        # Files whose content hash matches the last run reuse that run's analysis
+        manifest = self.load_manifest()
+        hashes = {}
+        reused = {}
+        pending = []
+        for file_path, code in zip(selected, codes):
+            digest = self.new_digest()
+            digest.update(code.encode())
+            hashes[file_path] = digest.hexdigest()
+            entry = manifest.get(file_path)
+            if entry and entry.get('hash') == hashes[file_path]:
+                print(f"⏭️ {file_path} unchanged since last review")
+                reused[file_path] = entry['analysis']
+            else:
+                pending.append((file_path, code))
+
+        results = []
+        batches = []
+        if pending:
+            # Split the batch context evenly so every pending file fits in one request
+            token_budget = (BATCH_TOKEN_BUDGET - PROMPT_OVERHEAD_TOKENS) // len(pending)
+            prepared = []
+            for file_path, code in pending:
+                print(f"🔍 Analyzing {file_path}...")
+                prepared.append((file_path, truncate_to_tokens(code, token_budget)))
+
+            # Pack files into as few completions as fit, then issue those concurrently
+            batches = self.batch_files(prepared)
+            tasks = [self.analyze_codes_with_ai(batch) for batch in batches]
+            try:
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                await close_http_client()
+
+        fresh = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                print(f"AI analysis failed for {', '.join(p for p, _ in batch)}: {result}")
+                result = {file_path: self.get_fallback_analysis(file_path) for file_path, _ in batch}
+            fresh.update(result)
+
+        for file_path, analysis in fresh.items():
+            # Only remember real AI results so a failed call is retried next time
+            if analysis != self.get_fallback_analysis(file_path):
+                manifest[file_path] = {'hash': hashes[file_path], 'analysis': analysis}
+        self.save_manifest(manifest)
+
+        analyses = {f: reused[f] if f in reused else fresh[f] for f in selected}
 
         report = self.generate_report(analyses)
 
@@ -260,4 +591,4 @@ class AICodeReviewer:
 
 if __name__ == "__main__":
     reviewer = AICodeReviewer()
-    reviewer.run_review()
\ No newline at end of file
+    asyncio.run(reviewer.run_review())
\ No newline at end of file
@@ -5,32 +5,72 @@ Analyzes codebases and generates comprehensive documentation
 """
 
 import os
-import sys
 import json
-import requests
+import asyncio
+import functools
 from pathlib import Path
-import subprocess
-from typing import List, Dict, Any
+from typing import Dict, Any
 import re
 
-class AIDocumentationReviewer:
-    def __init__(self):
-        self.openrouter_key = os.getenv('OPENROUTER_API_KEY')
-        self.localai_url = os.getenv('LOCALAI_BASE_URL', 'http://localhost:8080')
-        self.use_localai = bool(self.localai_url and not self.openrouter_key)
-
-    def get_ai_client(self):
-        """Get AI client configuration"""
-        if self.use_localai:
-            return {
-                'base_url': f"{self.localai_url}/v1",
-                'api_key': 'localai'
-            }
-        else:
-            return {
-                'base_url': 'https://openrouter.ai/api/v1',
-                'api_key': self.openrouter_key
-            }
+from ai_client import AIClientBase, get_http_client, close_http_client
+
+# orjson is optional and only used to serialize the structure faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Paths looked up by analyze_codebase_structure, in report order
+ENTRY_POINTS = (
+    'src/index.js', 'src/index.ts', 'src/main.js', 'src/main.ts',
+    'src/app.js', 'src/app.ts', 'index.js', 'index.ts',
+    'src/App.tsx', 'src/App.jsx'
+)
+CONFIG_FILES = (
+    'package.json', 'tsconfig.json', 'webpack.config.js',
+    'vite.config.js', 'next.config.js', 'wrangler.toml',
+    '.eslintrc.json', 'jest.config.js', 'vitest.config.js'
+)
+DOC_FILES = ('README.md', 'CHANGELOG.md', 'API.md', 'docs/')
+
+# README sections every project should have, found with a single pass over the file
+REQUIRED_SECTIONS = ('installation', 'usage', 'contributing', 'license')
+_SECTION_RE = re.compile(
+    r'^#{1,6}\s+(' + '|'.join(REQUIRED_SECTIONS) + r')\b',
+    re.IGNORECASE | re.MULTILINE
+)
+
+class AIDocumentationReviewer(AIClientBase):
+    def _read_text(self, path: str) -> str:
+        """Read a text file, reusing the previous read while its mtime is unchanged"""
+        return self._read_text_at(path, os.stat(path).st_mtime_ns)
+
+    def _read_json(self, path: str) -> Any:
+        """Parse a JSON file, reusing the previous parse while its mtime is unchanged"""
+        return self._read_json_at(path, os.stat(path).st_mtime_ns)
+
+    @functools.lru_cache(maxsize=32)
+    def _read_text_at(self, path: str, mtime_ns: int) -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    @functools.lru_cache(maxsize=32)
+    def _read_json_at(self, path: str, mtime_ns: int) -> Any:
+        return json.loads(self._read_text_at(path, mtime_ns))
+
+    def list_tree_entries(self) -> set:
+        """Collect the root and src/ entry names with one scandir each (directories get a trailing /)"""
+        present = set()
+        for directory, prefix in (('.', ''), ('src', 'src/')):
+            if prefix and 'src/' not in present:
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        present.add(prefix + entry.name + ('/' if entry.is_dir() else ''))
+            except OSError:
+                pass
+        return present
 
     def analyze_codebase_structure(self) -> Dict[str, Any]:
         """Analyze the overall codebase structure"""
@@ -42,59 +82,39 @@ class AIDocumentationReviewer:
             'documentation_files': []
         }
 
-        # Analyze package.json for Node.js projects
-        if Path('package.json').exists():
-            with open('package.json', 'r') as f:
-                package = json.load(f)
-                structure['frameworks'].append('Node.js')
-                if 'dependencies' in package:
-                    deps = package['dependencies']
-                    if 'react' in deps:
-                        structure['frameworks'].append('React')
-                    if 'next' in deps:
-                        structure['frameworks'].append('Next.js')
-                    if '@cloudflare/workers-types' in deps:
-                        structure['frameworks'].append('Cloudflare Workers')
-
-        # Find entry points
-        entry_patterns = [
-            'src/index.js', 'src/index.ts', 'src/main.js', 'src/main.ts',
-            'src/app.js', 'src/app.ts', 'index.js', 'index.ts',
-            'src/App.tsx', 'src/App.jsx'
-        ]
-
-        for pattern in entry_patterns:
-            if Path(pattern).exists():
-                structure['entry_points'].append(pattern)
-
-        # Find config files
-        config_files = [
-            'package.json', 'tsconfig.json', 'webpack.config.js',
-            'vite.config.js', 'next.config.js', 'wrangler.toml',
-            '.eslintrc.json', 'jest.config.js', 'vitest.config.js'
-        ]
-
-        for config in config_files:
-            if Path(config).exists():
-                structure['config_files'].append(config)
+        present = self.list_tree_entries()
 
-        # Find documentation
-        docs = ['README.md', 'CHANGELOG.md', 'API.md', 'docs/']
-        for doc in docs:
-            if Path(doc).exists():
-                structure['documentation_files'].append(doc)
+        # Analyze package.json for Node.js projects
+        if 'package.json' in present:
+            package = self._read_json('package.json')
+            structure['frameworks'].append('Node.js')
+            if 'dependencies' in package:
+                deps = package['dependencies']
+                if 'react' in deps:
+                    structure['frameworks'].append('React')
+                if 'next' in deps:
+                    structure['frameworks'].append('Next.js')
+                if '@cloudflare/workers-types' in deps:
+                    structure['frameworks'].append('Cloudflare Workers')
+
+        structure['entry_points'] = [p for p in ENTRY_POINTS if p in present]
+        structure['config_files'] = [p for p in CONFIG_FILES if p in present]
+        structure['documentation_files'] = [p for p in DOC_FILES if p in present]
 
         return structure
 
-    def generate_readme(self, structure: Dict[str, Any]) -> str:
+    async def generate_readme(self, structure: Dict[str, Any]) -> str:
         """Generate comprehensive README using AI"""
-        client_config = self.get_ai_client()
+        if orjson is not None:
+            structure_json = orjson.dumps(structure, option=orjson.OPT_INDENT_2).decode()
+        else:
+            structure_json = json.dumps(structure, indent=2)
 
         prompt = f"""
         Generate a comprehensive README.md for this project based on the following structure analysis:
 
         Project Structure:
-        {json.dumps(structure, indent=2)}
+        {structure_json}
 
         Please create a professional README.md that includes:
         1. Project title and description
@@ -108,21 +128,22 @@ class AIDocumentationReviewer:
         Make it well-formatted with proper markdown syntax, badges, and clear sections.
         """
 
+        payload = {
+            'model': self._model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': 0.7,
+            'max_tokens': 3000
+        }
+
         try:
-            response = requests.post(
-                f"{client_config['base_url']}/chat/completions",
-                headers={
-                    'Authorization': f"Bearer {client_config['api_key']}",
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'anthropic/claude-3-haiku' if not self.use_localai else 'local-model',
-                    'messages': [{'role': 'user', 'content': prompt}],
-                    'temperature': 0.7,
-                    'max_tokens': 3000
-                },
-                timeout=60
-            )
+            client = get_http_client()
+            if client is not None:
+                response = await client.post(self._endpoint, headers=self.headers, json=payload)
+            else:
+                response = await asyncio.to_thread(
+                    self.session().post, self._endpoint,
+                    headers=self.headers, json=payload, timeout=60
+                )
 
             if response.status_code == 200:
                 result = response.json()
@@ -203,17 +224,14 @@ This project is licensed under the MIT License.
 
         # Check README completeness
         if Path('README.md').exists():
-            with open('README.md', 'r') as f:
-                content = f.read().lower()
+            content = self._read_text('README.md')
 
-            required_sections = ['installation', 'usage', 'contributing', 'license']
-            for section in required_sections:
-                if f'## {section}' not in content and f'# {section}' not in content:
-                    gaps['incomplete_sections'].append(section)
+            found = {m.group(1).lower() for m in _SECTION_RE.finditer(content)}
+            gaps['incomplete_sections'] = [s for s in REQUIRED_SECTIONS if s not in found]
 
         return gaps
 
-    def generate_api_documentation(self) -> str:
+    async def generate_api_documentation(self) -> str:
         """Generate API documentation from code analysis"""
         # This would analyze exported functions, classes, etc.
         # For now, return a basic template
@@ -228,7 +246,7 @@ This project is licensed under the MIT License.
 ## Examples
 """
 
-    def run_documentation_review(self):
+    async def run_documentation_review(self):
         """Main documentation review execution"""
         print("📚 Starting AI Documentation Review...")
 
@@ -239,60 +257,67 @@ This project is licensed under the MIT License.
         print(f"📄 Structure: {structure}")
         print(f"🚫 Gaps: {gaps}")
 
+        generators = {}
+
         # Generate README if missing or incomplete
         if not Path('README.md').exists() or gaps['incomplete_sections']:
             print("📝 Generating README.md...")
-            readme_content = self.generate_readme(structure)
-            with open('README.md', 'w') as f:
-                f.write(readme_content)
+            generators['README.md'] = self.generate_readme(structure)
 
         # Generate API docs
         if not Path('API.md').exists():
             print("📖 Generating API.md...")
-            api_content = self.generate_api_documentation()
-            with open('API.md', 'w') as f:
-                f.write(api_content)
+            generators['API.md'] = self.generate_api_documentation()
 
-        # Create documentation review report
-        report = f"""# 📚 AI Documentation Review Report
-
-## 📊 Project Analysis
-
-**Frameworks Detected:** {', '.join(structure.get('frameworks', []))}
-**Entry Points:** {', '.join(structure.get('entry_points', []))}
-**Configuration Files:** {', '.join(structure.get('config_files', []))}
-
-## 🚫 Documentation Gaps Found
-
-### Missing Files
-{chr(10).join(f"- {file}" for file in gaps.get('missing_files', [])) or "None"}
-
-### Incomplete Sections
-{chr(10).join(f"- {section}" for section in gaps.get('incomplete_sections', [])) or "None"}
-
-## ✅ Actions Taken
-
-- {'✅ Generated README.md' if not Path('README.md').exists() else '✅ Updated README.md'}
-- {'✅ Generated API.md' if not Path('API.md').exists() else '✅ API.md already exists'}
-
-## 📋 Recommendations
-
-1. Review generated documentation for accuracy
-2. Add code examples and usage instructions
-3. Include architecture diagrams if applicable
-4. Add troubleshooting section
-5. Document deployment process
+        # Documents are independent, so generate them all at once
+        try:
+            contents = await asyncio.gather(*generators.values())
+        finally:
+            await close_http_client()
+        await asyncio.gather(*(
+            asyncio.to_thread(Path(name).write_text, content)
+            for name, content in zip(generators, contents)
+        ))
 
----
-*Generated by AI Documentation Reviewer*
-"""
+        # Create documentation review report
+        missing_files = gaps.get('missing_files', [])
+        incomplete_sections = gaps.get('incomplete_sections', [])
+        parts = [
+            "# 📚 AI Documentation Review Report\n\n",
+            "## 📊 Project Analysis\n\n",
+            f"**Frameworks Detected:** {', '.join(structure.get('frameworks', []))}\n",
+            f"**Entry Points:** {', '.join(structure.get('entry_points', []))}\n",
+            f"**Configuration Files:** {', '.join(structure.get('config_files', []))}\n\n",
+            "## 🚫 Documentation Gaps Found\n\n",
+            "### Missing Files\n",
+        ]
+        parts.extend(f"- {file}\n" for file in missing_files)
+        if not missing_files:
+            parts.append("None\n")
+        parts.append("\n### Incomplete Sections\n")
+        parts.extend(f"- {section}\n" for section in incomplete_sections)
+        if not incomplete_sections:
+            parts.append("None\n")
+        parts.extend([
+            "\n## ✅ Actions Taken\n\n",
+            f"- {'✅ Generated README.md' if not Path('README.md').exists() else '✅ Updated README.md'}\n",
+            f"- {'✅ Generated API.md' if not Path('API.md').exists() else '✅ API.md already exists'}\n\n",
+            "## 📋 Recommendations\n\n",
+            "1. Review generated documentation for accuracy\n",
+            "2. Add code examples and usage instructions\n",
+            "3. Include architecture diagrams if applicable\n",
+            "4. Add troubleshooting section\n",
+            "5. Document deployment process\n\n",
+            "---\n",
+            "*Generated by AI Documentation Reviewer*\n",
+        ])
 
         with open('ai-documentation-review.md', 'w') as f:
-            f.write(report)
+            f.writelines(parts)
 
         print("✅ AI Documentation Review completed!")
         print("📋 Report saved to ai-documentation-review.md")
 
 if __name__ == "__main__":
     reviewer = AIDocumentationReviewer()
-    reviewer.run_documentation_review()
\ No newline at end of file
+    asyncio.run(reviewer.run_documentation_review())
\ No newline at end of file
@@ -7,37 +7,287 @@ Analyzes codebases and provides refactoring recommendations
 import os
 import sys
 import json
-import requests
+import ast
+import hashlib
 from pathlib import Path
 import subprocess
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import re
+import string
+import types
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ai_client import AIClientBase
+
+# Upper bound on concurrent completion requests
+MAX_WORKERS = 8
+
+# Successful suggestions are memoized on disk by content hash; AI_REVIEW_NOCACHE=1 bypasses it
+CACHE_DIR = Path('.cache/ai-refactor')
+# Bump whenever the prompt changes so stale entries stop matching
+PROMPT_VERSION = '2'
+
+# Only this much of each file is read; the prompt shows the first 2000 characters
+READ_LIMIT = 4096
+
+# Files shorter than this (or with no functions/classes) get heuristic suggestions only
+MIN_AI_CHARS = 200
+
+# Non-JSON replies are only quoted up to this many characters
+PROSE_SNIPPET_CHARS = 300
+
+# Rough prompt-token budget per batched request (~4 characters per token)
+BATCH_TOKEN_BUDGET = 6000
+
+# orjson is optional and only used to parse responses and cache files faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads_json(data):
+    """Parse JSON text or bytes with orjson when available; errors are json.JSONDecodeError either way"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_json(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def read_sse_delta(line: str):
+    """Extract the content delta from one server-sent event line; None marks the end of the stream"""
+    if not line.startswith('data:'):
+        return ''
+    data = line[5:].strip()
+    if data == '[DONE]':
+        return None
+    choices = loads_json(data).get('choices') or []
+    if not choices:
+        return ''
+    return choices[0].get('delta', {}).get('content') or ''
+
+def advance_json_scan(chunk: str, state: List) -> int:
+    """Feed chunk to a [depth, in_string, escaped] brace scanner; return the offset past the top-level close, or -1"""
+    depth, in_string, escaped = state
+    end = -1
+    for i, ch in enumerate(chunk):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                end = i + 1
+                break
+    state[:] = [depth, in_string, escaped]
+    return end
+
+_LANG_BY_EXT = types.MappingProxyType({
+    '.js': 'javascript', '.ts': 'typescript',
+    '.jsx': 'jsx', '.tsx': 'tsx', '.py': 'python',
+    '.java': 'java', '.cpp': 'cpp', '.c': 'c'
+})
+
+@functools.lru_cache(maxsize=32)
+def language_from_path(file_path: str) -> str:
+    """Get programming language from file extension"""
+    return _LANG_BY_EXT.get(Path(file_path).suffix.lower(), 'text')
+
+# numba is optional; without it the complexity counts come from the regexes
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+def _optional_njit(func):
+    """Compile func with numba when it is installed, otherwise leave it as plain Python"""
+    return njit(cache=True)(func) if njit is not None else func
+
+_FUNCTION = tuple(b'function')
+_ARROW = tuple(b'=>')
+_CLASS = tuple(b'class')
+_IMPORT = tuple(b'import')
+_FROM = tuple(b'from')
+
+@_optional_njit
+def _is_word(c):
+    return (48 <= c <= 57) or (65 <= c <= 90) or (97 <= c <= 122) or c == 95 or c >= 128
+
+@_optional_njit
+def _is_space(c):
+    return (9 <= c <= 13) or c == 32 or (28 <= c <= 31)
+
+@_optional_njit
+def _starts_with(buf, i, lit):
+    if i + len(lit) > buf.size:
+        return False
+    for k in range(len(lit)):
+        if buf[i + k] != lit[k]:
+            return False
+    return True
+
+@_optional_njit
+def _count_metrics(buf):
+    """Count (lines, functions, classes, imports) over ASCII source bytes in one pass"""
+    # Mirrors AIRefactor._METRIC_RE: alternatives are tried in the same order
+    # and matches do not overlap, so the counts equal its finditer results
+    n = buf.size
+    lines = 1
+    functions = classes = imports = 0
+    next_pos = 0
+    # End of the current identifier run and whether "\s*(" follows it
+    run_end = -1
+    run_call = False
+    call_end = 0
+    for i in range(n):
+        c = buf[i]
+        if c == 10:
+            lines += 1
+        if i < next_pos:
+            continue
+
+        if i == 0 or buf[i - 1] == 10:
+            if _starts_with(buf, i, _IMPORT) and (i + 6 >= n or not _is_word(buf[i + 6])):
+                imports += 1
+                next_pos = i + 6
+                continue
+            if _starts_with(buf, i, _FROM) and (i + 4 >= n or not _is_word(buf[i + 4])):
+                imports += 1
+                next_pos = i + 4
+                continue
 
-class AIRefactor:
-    def __init__(self):
-        self.openrouter_key = os.getenv('OPENROUTER_API_KEY')
-        self.localai_url = os.getenv('LOCALAI_BASE_URL', 'http://localhost:8080')
-        self.use_localai = bool(self.localai_url and not self.openrouter_key)
+        if _starts_with(buf, i, _CLASS):
+            k = i + 5
+            while k < n and _is_space(buf[k]):
+                k += 1
+            if k > i + 5 and k < n and _is_word(buf[k]):
+                while k < n and _is_word(buf[k]):
+                    k += 1
+                classes += 1
+                next_pos = k
+                continue
 
-    def get_ai_client(self):
-        """Get AI client configuration"""
-        if self.use_localai:
-            return {
-                'base_url': f"{self.localai_url}/v1",
-                'api_key': 'localai'
-            }
-        else:
-            return {
-                'base_url': 'https://openrouter.ai/api/v1',
-                'api_key': self.openrouter_key
-            }
+        if _starts_with(buf, i, _FUNCTION):
+            functions += 1
+            next_pos = i + 8
+        elif _starts_with(buf, i, _ARROW):
+            functions += 1
+            next_pos = i + 2
+        elif _is_word(c):
+            if i >= run_end:
+                j = i
+                while j < n and _is_word(buf[j]):
+                    j += 1
+                run_end = j
+                k = j
+                while k < n and _is_space(buf[k]):
+                    k += 1
+                run_call = k < n and buf[k] == 40
+                call_end = k + 1
+            if run_call:
+                functions += 1
+                next_pos = call_end
+    return lines, functions, classes, imports
+
+class AIRefactor(AIClientBase):
+    # Compiled once per process; one alternation collects every metric in a single scan
+    _METRIC_RE = re.compile(
+        r'(?P<imp>^(?:import|from)\b)|(?P<cls>class\s+\w+)|(?P<fn>function|=>|\w+\s*\()',
+        re.MULTILINE
+    )
+
+    # Prompts are parsed once; only the per-file fields are substituted on each call
+    _REFACTOR_TMPL = string.Template("""
+        Analyze this $language code and provide refactoring suggestions:
+
+        File: $path
+        Complexity: $complexity
+
+        Code:
+        ```$language
+        $code
+        ```
+
+        Please provide:
+        1. Code quality assessment
+        2. Refactoring opportunities
+        3. Performance improvements
+        4. Best practice recommendations
+        5. Specific code changes suggested
+        6. Estimated effort for each suggestion
+
+        Format as JSON with these keys:
+        - quality_score: number (1-10)
+        - refactoring_opportunities: array of objects with {title, description, effort, impact}
+        - performance_improvements: array of strings
+        - best_practices: array of strings
+        - code_suggestions: array of strings
+        - summary: string
+        """)
+
+    _REFACTOR_BATCH_TMPL = string.Template("""
+        Analyze each of the following files and provide refactoring suggestions for each:
+
+        $sections
 
-    def analyze_code_complexity(self, code: str, file_path: str) -> Dict[str, Any]:
+        For every file provide:
+        1. Code quality assessment
+        2. Refactoring opportunities
+        3. Performance improvements
+        4. Best practice recommendations
+        5. Specific code changes suggested
+        6. Estimated effort for each suggestion
+
+        Format your response as a single JSON object {"files": [...]} with one entry per file,
+        in the order given, each with these keys:
+        - path: string (exactly as given after "FILE k:")
+        - quality_score: number (1-10)
+        - refactoring_opportunities: array of objects with {title, description, effort, impact}
+        - performance_improvements: array of strings
+        - best_practices: array of strings
+        - code_suggestions: array of strings
+        - summary: string
+        """)
+
+    def analyze_code_complexity(self, code: str, file_path: str, lines: Optional[int] = None) -> Dict[str, Any]:
         """Analyze code complexity and maintainability"""
-        lines = len(code.split('\n'))
-        functions = len(re.findall(r'(?:function|=>|\w+\s*\()', code))
-        classes = len(re.findall(r'class\s+\w+', code))
-        imports = len(re.findall(r'^import|^from', code, re.MULTILINE))
+        # Counts are sampled from code, which may be only a prefix of the file;
+        # callers pass lines so the reported length still covers all of it
+        python_counts = self.count_python_nodes(code) if file_path.endswith('.py') else None
+        if python_counts is not None:
+            functions, classes, imports = python_counts
+            if lines is None:
+                lines = code.count('\n') + 1
+        elif njit is not None and code.isascii():
+            # Same single scan as _METRIC_RE, compiled to machine code over the bytes
+            counted_lines, functions, classes, imports = _count_metrics(
+                np.frombuffer(code.encode('ascii'), dtype=np.uint8)
+            )
+            if lines is None:
+                lines = counted_lines
+        else:
+            if lines is None:
+                lines = code.count('\n') + 1
+            counts = {'imp': 0, 'cls': 0, 'fn': 0}
+            for match in self._METRIC_RE.finditer(code):
+                counts[match.lastgroup] += 1
+            functions = counts['fn']
+            classes = counts['cls']
+            imports = counts['imp']
 
         # Simple complexity metrics
         complexity = {
@@ -50,70 +300,197 @@ class AIRefactor:
 
         return complexity
 
+    def count_python_nodes(self, code: str) -> Optional[tuple]:
+        """Count (functions, classes, imports) from the Python AST, or None if it does not parse"""
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            return None
+
+        functions = classes = imports = 0
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                functions += 1
+            elif isinstance(node, ast.ClassDef):
+                classes += 1
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                imports += 1
+        return functions, classes, imports
+
+    def get_cache_path(self, file_path: str, code: str, complexity: Dict) -> Path:
+        """Get the on-disk cache location for the prompt-visible part of a file"""
+        key = hashlib.sha256(
+            f"{PROMPT_VERSION}|{self._model}|{file_path}|{json.dumps(complexity, sort_keys=True)}|{code[:2000]}".encode()
+        ).hexdigest()
+        return CACHE_DIR / f"{key}.json"
+
+    def load_cached_suggestions(self, cache_path: Path):
+        """Return cached suggestions, or None on a miss or when caching is disabled"""
+        if os.getenv('AI_REVIEW_NOCACHE') == '1':
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                return loads_json(f.read())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save_cached_suggestions(self, cache_path: Path, suggestions: Dict[str, Any]):
+        """Persist AI suggestions so unchanged files are not re-sent"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                f.write(dumps_json(suggestions))
+        except OSError as e:
+            print(f"Could not write refactoring cache: {e}")
+
+    def is_trivial(self, code: str, complexity: Dict) -> bool:
+        """Whether a file is too small or declaration-free to be worth a completion call"""
+        return len(code.strip()) < MIN_AI_CHARS or complexity['functions'] + complexity['classes'] == 0
+
+    def stream_completion(self, payload: Dict[str, Any], prose_limit: int) -> Optional[str]:
+        """Stream a completion, stopping once its JSON object closes or enough non-JSON prose has arrived"""
+        payload = dict(payload, stream=True)
+        with self.session().post(self._endpoint, headers=self.headers, json=payload,
+                                 stream=True, timeout=60) as response:
+            if response.status_code != 200:
+                return None
+            if 'application/json' in response.headers.get('Content-Type', ''):
+                return loads_json(response.content)['choices'][0]['message']['content']
+
+            parts = []
+            length = 0
+            is_json = None
+            scan_state = [0, False, False]
+            for line in response.iter_lines():
+                delta = read_sse_delta(line.decode('utf-8', errors='ignore'))
+                if delta is None:
+                    break
+                if is_json is None and delta.strip():
+                    is_json = delta.lstrip().startswith('{')
+                if is_json:
+                    end = advance_json_scan(delta, scan_state)
+                    if end >= 0:
+                        # Anything after the object would only make it unparseable
+                        parts.append(delta[:end])
+                        break
+                    parts.append(delta)
+                else:
+                    parts.append(delta)
+                    length += len(delta)
+                    if is_json is False and length >= prose_limit:
+                        # Prose is only ever quoted as a short snippet, so the rest is not needed
+                        break
+            return ''.join(parts)
+
     def get_refactoring_suggestions(self, code: str, file_path: str, complexity: Dict) -> Dict[str, Any]:
         """Get AI-powered refactoring suggestions"""
-        client_config = self.get_ai_client()
+        if self.is_trivial(code, complexity):
+            return self.get_basic_refactoring_suggestions(file_path, complexity)
 
         language = self.get_language_from_path(file_path)
 
-        prompt = f"""
-        Analyze this {language} code and provide refactoring suggestions:
-
-        File: {file_path}
-        Complexity: {json.dumps(complexity, indent=2)}
+        prompt = self._REFACTOR_TMPL.substitute(
+            language=language,
+            path=file_path,
+            complexity=json.dumps(complexity, separators=(',', ':')),
+            code=code[:2000] + ("..." if len(code) > 2000 else "")
+        )
 
-        Code:
-        ```{language}
-        {code[:2000]}{"..." if len(code) > 2000 else ""}
-        ```
+        try:
+            content = self.stream_completion({
+                'model': self._model,
+                'messages': [{'role': 'user', 'content': prompt}],
+                'temperature': 0.4,
+                'max_tokens': 2500
+            }, prose_limit=PROSE_SNIPPET_CHARS + 1)
+        except Exception as e:
+            print(f"AI refactoring analysis failed: {e}")
+            return self.get_basic_refactoring_suggestions(file_path, complexity)
 
-        Please provide:
-        1. Code quality assessment
-        2. Refactoring opportunities
-        3. Performance improvements
-        4. Best practice recommendations
-        5. Specific code changes suggested
-        6. Estimated effort for each suggestion
+        if content is None:
+            return self.get_basic_refactoring_suggestions(file_path, complexity)
 
-        Format as JSON with these keys:
-        - quality_score: number (1-10)
-        - refactoring_opportunities: array of objects with {title, description, effort, impact}
-        - performance_improvements: array of strings
-        - best_practices: array of strings
-        - code_suggestions: array of strings
-        - summary: string
-        """
+        try:
+            suggestions = loads_json(content)
+        except json.JSONDecodeError:
+            return self.parse_refactor_response(content)
+        self.save_cached_suggestions(self.get_cache_path(file_path, code, complexity), suggestions)
+        return suggestions
+
+    def batch_items(self, items: List[tuple]) -> List[List[tuple]]:
+        """Group (path, code, complexity) items so each batch fits the prompt budget"""
+        batches = []
+        current = []
+        current_tokens = 0
+        for item in items:
+            tokens = len(item[1][:2000]) // 4
+            if current and current_tokens + tokens > BATCH_TOKEN_BUDGET:
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(item)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def get_refactoring_suggestions_batch(self, items: List[tuple]) -> Dict[str, Dict[str, Any]]:
+        """Get suggestions for several files in one completion, falling back to per-file calls"""
+        if len(items) == 1:
+            file_path, code, complexity = items[0]
+            return {file_path: self.get_refactoring_suggestions(code, file_path, complexity)}
+
+        sections = "\n\n".join(
+            f"### FILE {k}: {file_path}\n"
+            f"Complexity: {json.dumps(complexity, separators=(',', ':'))}\n"
+            f"```{self.get_language_from_path(file_path)}\n"
+            f"{code[:2000]}{'...' if len(code) > 2000 else ''}\n```"
+            for k, (file_path, code, complexity) in enumerate(items, 1)
+        )
+        prompt = self._REFACTOR_BATCH_TMPL.substitute(sections=sections)
 
         try:
-            response = requests.post(
-                f"{client_config['base_url']}/chat/completions",
-                headers={
-                    'Authorization': f"Bearer {client_config['api_key']}",
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'anthropic/claude-3-haiku' if not self.use_localai else 'local-model',
-                    'messages': [{'role': 'user', 'content': prompt}],
-                    'temperature': 0.4,
-                    'max_tokens': 2500
-                },
-                timeout=60
-            )
+            # A batch that is not JSON falls back to per-file calls, so no prose is kept
+            content = self.stream_completion({
+                'model': self._model,
+                'messages': [{'role': 'user', 'content': prompt}],
+                'temperature': 0.4,
+                'max_tokens': min(4000, 2500 * len(items))
+            }, prose_limit=0)
+        except Exception as e:
+            print(f"AI batch refactoring analysis failed: {e}")
+            return {
+                file_path: self.get_basic_refactoring_suggestions(file_path, complexity)
+                for file_path, _, complexity in items
+            }
 
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content']
+        if content is None:
+            return {
+                file_path: self.get_basic_refactoring_suggestions(file_path, complexity)
+                for file_path, _, complexity in items
+            }
 
-                try:
-                    return json.loads(content)
-                except json.JSONDecodeError:
-                    return self.parse_refactor_response(content)
+        try:
+            entries = loads_json(content)['files']
+            by_path = {entry.get('path'): entry for entry in entries}
+            if all(file_path in by_path for file_path, _, _ in items):
+                suggestions = [by_path[file_path] for file_path, _, _ in items]
+            elif len(entries) == len(items):
+                suggestions = entries
             else:
-                return self.get_basic_refactoring_suggestions(file_path, complexity)
+                raise ValueError("batched response does not cover every file")
+        except (TypeError, ValueError, KeyError, IndexError, AttributeError) as e:
+            print(f"Batched response unusable ({e}); analyzing files individually")
+            return {
+                file_path: self.get_refactoring_suggestions(code, file_path, complexity)
+                for file_path, code, complexity in items
+            }
 
-        except Exception as e:
-            print(f"AI refactoring analysis failed: {e}")
-            return self.get_basic_refactoring_suggestions(file_path, complexity)
+        analyses = {}
+        for (file_path, code, complexity), suggestion in zip(items, suggestions):
+            self.save_cached_suggestions(self.get_cache_path(file_path, code, complexity), suggestion)
+            analyses[file_path] = suggestion
+        return analyses
 
     def parse_refactor_response(self, content: str) -> Dict[str, Any]:
         """Parse text response into structured format"""
@@ -129,7 +506,9 @@ class AIRefactor:
             ],
             'performance_improvements': ['Consider performance optimizations'],
             'best_practices': ['Follow language best practices'],
-            'code_suggestions': [content[:300] + "..." if len(content) > 300 else content],
+            'code_suggestions': [
+                content[:PROSE_SNIPPET_CHARS] + "..." if len(content) > PROSE_SNIPPET_CHARS else content
+            ],
             'summary': 'AI analysis completed with suggestions'
         }
 
@@ -184,17 +563,11 @@ class AIRefactor:
 
     def get_language_from_path(self, file_path: str) -> str:
         """Get programming language from file path"""
-        ext = Path(file_path).suffix.lower()
-        languages = {
-            '.js': 'javascript', '.ts': 'typescript',
-            '.jsx': 'jsx', '.tsx': 'tsx', '.py': 'python',
-            '.java': 'java', '.cpp': 'cpp', '.c': 'c'
-        }
-        return languages.get(ext, 'text')
+        return language_from_path(file_path)
 
     def generate_refactor_report(self, analyses: Dict[str, Dict]) -> str:
         """Generate comprehensive refactoring report"""
-        report = "# 🔄 AI Code Refactoring Report\n\n"
+        parts = ["# 🔄 AI Code Refactoring Report\n\n"]
 
         total_score = 0
         file_count = 0
@@ -207,88 +580,128 @@ class AIRefactor:
             file_count += 1
             total_score += analysis.get('quality_score', 5)
 
-            report += f"## 📄 {file_path}\n\n"
-            report += f"**Quality Score:** {analysis.get('quality_score', 'N/A')}/10\n\n"
+            parts.append(f"## 📄 {file_path}\n\n")
+            parts.append(f"**Quality Score:** {analysis.get('quality_score', 'N/A')}/10\n\n")
 
             # Refactoring opportunities
             opportunities = analysis.get('refactoring_opportunities', [])
             if opportunities:
-                report += "### 🔧 Refactoring Opportunities\n"
+                parts.append("### 🔧 Refactoring Opportunities\n")
                 for opp in opportunities:
-                    report += f"**{opp.get('title', 'Suggestion')}**\n"
-                    report += f"- **Description:** {opp.get('description', 'N/A')}\n"
-                    report += f"- **Effort:** {opp.get('effort', 'Unknown')}\n"
-                    report += f"- **Impact:** {opp.get('impact', 'Unknown')}\n\n"
+                    parts.append(f"**{opp.get('title', 'Suggestion')}**\n")
+                    parts.append(f"- **Description:** {opp.get('description', 'N/A')}\n")
+                    parts.append(f"- **Effort:** {opp.get('effort', 'Unknown')}\n")
+                    parts.append(f"- **Impact:** {opp.get('impact', 'Unknown')}\n\n")
                     all_suggestions.append(opp)
 
             # Performance improvements
             perf = analysis.get('performance_improvements', [])
             if perf:
-                report += "### ⚡ Performance Improvements\n"
+                parts.append("### ⚡ Performance Improvements\n")
                 for item in perf:
-                    report += f"- {item}\n"
-                report += "\n"
+                    parts.append(f"- {item}\n")
+                parts.append("\n")
 
             # Best practices
             practices = analysis.get('best_practices', [])
             if practices:
-                report += "### 📋 Best Practices\n"
+                parts.append("### 📋 Best Practices\n")
                 for practice in practices:
-                    report += f"- {practice}\n"
-                report += "\n"
+                    parts.append(f"- {practice}\n")
+                parts.append("\n")
 
             # Code suggestions
             suggestions = analysis.get('code_suggestions', [])
             if suggestions:
-                report += "### 💡 Code Suggestions\n"
+                parts.append("### 💡 Code Suggestions\n")
                 for suggestion in suggestions:
-                    report += f"- {suggestion}\n"
-                report += "\n"
+                    parts.append(f"- {suggestion}\n")
+                parts.append("\n")
 
             if analysis.get('summary'):
-                report += f"**Summary:** {analysis['summary']}\n\n"
+                parts.append(f"**Summary:** {analysis['summary']}\n\n")
 
-            report += "---\n\n"
+            parts.append("---\n\n")
 
         # Overall assessment
         if file_count > 0:
             avg_score = total_score / file_count
-            report += f"## 📊 Overall Assessment\n\n"
-            report += f"**Average Quality Score:** {avg_score:.1f}/10\n"
-            report += f"**Files Analyzed:** {file_count}\n"
-            report += f"**Total Suggestions:** {len(all_suggestions)}\n\n"
+            parts.append(f"## 📊 Overall Assessment\n\n")
+            parts.append(f"**Average Quality Score:** {avg_score:.1f}/10\n")
+            parts.append(f"**Files Analyzed:** {file_count}\n")
+            parts.append(f"**Total Suggestions:** {len(all_suggestions)}\n\n")
 
             # Prioritize suggestions by impact
             high_impact = [s for s in all_suggestions if s.get('impact') == 'High']
             if high_impact:
-                report += "### 🎯 High Impact Suggestions\n"
+                parts.append("### 🎯 High Impact Suggestions\n")
                 for suggestion in high_impact[:5]:
-                    report += f"- **{suggestion.get('title')}**: {suggestion.get('description')} (Effort: {suggestion.get('effort')})\n"
-                report += "\n"
+                    parts.append(f"- **{suggestion.get('title')}**: {suggestion.get('description')} (Effort: {suggestion.get('effort')})\n")
+                parts.append("\n")
 
             if avg_score >= 8:
-                report += "🎉 Excellent code quality! Minor improvements suggested.\n"
+                parts.append("🎉 Excellent code quality! Minor improvements suggested.\n")
             elif avg_score >= 6:
-                report += "👍 Good code with opportunities for enhancement.\n"
+                parts.append("👍 Good code with opportunities for enhancement.\n")
             else:
-                report += "⚠️ Significant refactoring recommended.\n"
+                parts.append("⚠️ Significant refactoring recommended.\n")
 
-        return report
+        return "".join(parts)
 
-    def run_refactoring_analysis(self):
-        """Main refactoring analysis execution"""
-        print("🔄 Starting AI Code Refactoring Analysis...")
+    def read_file_item(self, file_path: str) -> tuple:
+        """Read one file and measure it, returning a (path, code, complexity) item"""
+        print(f"🔍 Analyzing {file_path}...")
+
+        if file_path.endswith('.py'):
+            # Python is parsed whole so the AST counts cover the entire module
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                source = f.read()
+            return file_path, source[:READ_LIMIT], self.analyze_code_complexity(source, file_path)
+
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            code = f.read(READ_LIMIT)
+
+        # Line count still covers the whole file, counted on raw bytes without decoding
+        lines = 1
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                lines += chunk.count(b'\n')
+
+        return file_path, code, self.analyze_code_complexity(code, file_path, lines)
+
+    def get_changed_files(self) -> List[str]:
+        """Get changed files from the GitHub event payload, falling back to git diff"""
+        event_path = os.getenv('GITHUB_EVENT_PATH')
+        if event_path:
+            try:
+                with open(event_path, 'r', encoding='utf-8') as f:
+                    event = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                event = {}
+            # Push payloads already list each commit's files, so no git process is needed
+            commits = event.get('commits') if isinstance(event, dict) else None
+            if commits:
+                changed = {}
+                for commit in commits:
+                    for path in commit.get('added', []) + commit.get('modified', []):
+                        changed[path] = None
+                return list(changed)
 
-        # Get changed files or analyze key files
         try:
             result = subprocess.run(
                 ['git', 'diff', '--name-only', 'HEAD~1'],
-                capture_output=True, text=True, check=True
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=5
             )
-            changed_files = result.stdout.strip().split('\n')
-        except:
-            # Fallback: analyze some key files
-            changed_files = ['package.json', 'README.md']
+        except (OSError, subprocess.TimeoutExpired):
+            return []
+        return result.stdout.splitlines() if result.returncode == 0 else []
+
+    def run_refactoring_analysis(self):
+        """Main refactoring analysis execution"""
+        print("🔄 Starting AI Code Refactoring Analysis...")
+
+        # Get changed files or analyze key files
+        changed_files = self.get_changed_files()
 
         # Filter for code files
         code_extensions = ['.js', '.ts', '.jsx', '.tsx', '.py', '.java']
@@ -304,30 +717,44 @@ class AIRefactor:
 
         print(f"📄 Analyzing {len(code_files)} files for refactoring opportunities...")
 
-        analyses = {}
-        for file_path in code_files[:3]:  # Limit for demo
-            print(f"🔍 Analyzing {file_path}...")
-
+        targets = code_files[:3]  # Limit for demo
+        results = {}
+        items = []
+        for file_path in targets:
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    code = f.read()
-
-                complexity = self.analyze_code_complexity(code, file_path)
-                suggestions = self.get_refactoring_suggestions(code, file_path, complexity)
-
-                analyses[file_path] = suggestions
-
+                item = self.read_file_item(file_path)
+                _, code, complexity = item
+                if self.is_trivial(code, complexity):
+                    # The heuristics cover these; no need to spend a request on them
+                    results[file_path] = self.get_basic_refactoring_suggestions(file_path, complexity)
+                    continue
+                cached = self.load_cached_suggestions(self.get_cache_path(*item))
+                if cached is not None:
+                    print(f"⏭️ {file_path} unchanged since last analysis")
+                    results[file_path] = cached
+                else:
+                    items.append(item)
             except Exception as e:
                 print(f"Error analyzing {file_path}: {e}")
-                analyses[file_path] = {
+                results[file_path] = {
                     'quality_score': 5,
                     'summary': f'Analysis failed: {e}'
                 }
 
+        # Several files share one completion; the batches themselves are
+        # network-bound, so run them side by side
+        batches = self.batch_items(items)
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(batches) or 1)) as executor:
+            futures = [executor.submit(self.get_refactoring_suggestions_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                results.update(future.result())
+
+        # Keep the report in the original file order
+        analyses = {fp: results[fp] for fp in targets}
+
         report = self.generate_refactor_report(analyses)
 
-        with open('ai-refactor-suggestions.md', 'w') as f:
-            f.write(report)
+        Path('ai-refactor-suggestions.md').write_text(report, encoding='utf-8')
 
         print("✅ AI Refactoring Analysis completed!")
         print("📋 Report saved to ai-refactor-suggestions.md")
@@ -7,36 +7,90 @@ Automatically generates comprehensive tests for codebases
 import os
 import sys
 import json
-import requests
+import hashlib
 from pathlib import Path
 import ast
 import re
-from typing import List, Dict, Any
-
-class AITestGenerator:
-    def __init__(self):
-        self.openrouter_key = os.getenv('OPENROUTER_API_KEY')
-        self.localai_url = os.getenv('LOCALAI_BASE_URL', 'http://localhost:8080')
-        self.use_localai = bool(self.localai_url and not self.openrouter_key)
-
-    def get_ai_client(self):
-        """Get AI client configuration"""
-        if self.use_localai:
-            return {
-                'base_url': f"{self.localai_url}/v1",
-                'api_key': 'localai'
-            }
-        else:
-            return {
-                'base_url': 'https://openrouter.ai/api/v1',
-                'api_key': self.openrouter_key
-            }
+import string
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ai_client import AIClientBase
+
+# Upper bound on concurrent completion requests
+MAX_WORKERS = 8
+
+# Directories never searched for code to test
+EXCLUDE_DIRS = frozenset({
+    'node_modules', '.git', 'dist', 'build', '.next',
+    'ai-generated-tests', '__pycache__', '.venv'
+})
+JS_EXTENSIONS = ('.js', '.ts', '.jsx', '.tsx')
+TEST_SUFFIXES = ('.test.js', '.test.ts', '.spec.js', '.spec.ts')
+
+# Declarations past this many bytes are ignored, so bundled or
+# generated sources are not read in full just to list their exports
+READ_LIMIT = 64 * 1024
+
+# Generated tests are memoized on disk by prompt hash; AI_REVIEW_NOCACHE=1 bypasses it
+CACHE_DIR = Path('.cache/ai-tests')
+
+# orjson is optional and only used to parse responses and cache files faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads_json(data):
+    """Parse JSON text or bytes with orjson when available; errors are json.JSONDecodeError either way"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_json(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def decode_names(names: List[bytes]) -> List[str]:
+    """Decode the few identifiers captured by the bytes regexes"""
+    return [name.decode('utf-8', 'ignore') for name in names]
+
+class AITestGenerator(AIClientBase):
+    # Compiled once per process instead of on every analyzed file; sources are
+    # scanned as raw bytes so they never go through the UTF-8 decoder, and
+    # identifier captures accept any non-ASCII byte so UTF-8 names survive
+    _FUNC_RE = re.compile(rb'(?:export\s+)?(?:async\s+)?function\s+([\w\x80-\xff]+)\s*\(')
+    _ARROW_RE = re.compile(rb'(?:export\s+)?(?:const|let|var)\s+([\w\x80-\xff]+)\s*=\s*(?:async\s+)?\(')
+    _CLASS_RE = re.compile(rb'(?:export\s+)?class\s+([\w\x80-\xff]+)')
+    _COMPONENT_RE = re.compile(rb'(?:export\s+)?(?:const|function)\s+([\w\x80-\xff]+)\s*(?:\(|=)')
+    _EXPORT_RE = re.compile(rb'export\s+(?:const|function|class|default)?\s*([\w\x80-\xff]+)')
+
+    # Parsed once; only the per-file fields are substituted on each call
+    _TESTGEN_TMPL = string.Template("""
+        Generate comprehensive unit tests for this $language file:
+
+        File: $path
+        Analysis: $analysis
+
+        Requirements:
+        1. Use modern testing framework (Vitest for JS/TS, pytest for Python)
+        2. Include tests for all functions, classes, and components
+        3. Test edge cases and error conditions
+        4. Mock external dependencies
+        5. Follow testing best practices
+        6. Include proper setup and teardown
+        $react_requirement
+
+        Generate complete, runnable test code with proper imports and structure.
+        """)
 
     def analyze_javascript_file(self, file_path: str) -> Dict[str, Any]:
         """Analyze JavaScript/TypeScript file for testable elements"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with open(file_path, 'rb') as f:
+                content = f.read(READ_LIMIT)
 
             analysis = {
                 'functions': [],
@@ -47,27 +101,24 @@ class AITestGenerator:
             }
 
             # Extract function declarations
-            func_pattern = r'(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\('
-            analysis['functions'] = re.findall(func_pattern, content)
+            analysis['functions'] = decode_names(self._FUNC_RE.findall(content))
 
             # Extract arrow functions assigned to variables
-            arrow_pattern = r'(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?\('
-            arrow_funcs = re.findall(arrow_pattern, content)
-            analysis['functions'].extend(arrow_funcs)
+            analysis['functions'].extend(decode_names(self._ARROW_RE.findall(content)))
 
             # Extract class declarations
-            class_pattern = r'(?:export\s+)?class\s+(\w+)'
-            analysis['classes'] = re.findall(class_pattern, content)
+            analysis['classes'] = decode_names(self._CLASS_RE.findall(content))
+
+            # Decided here, where the source is at hand, so callers need not rescan it
+            analysis['is_react'] = b'React' in content or file_path.endswith(('.jsx', '.tsx'))
 
             # Extract React components (simple heuristic)
-            if 'React' in content or 'jsx' in file_path:
-                component_pattern = r'(?:export\s+)?(?:const|function)\s+(\w+)\s*(?:\(|=)'
-                components = re.findall(component_pattern, content)
+            if b'React' in content or 'jsx' in file_path:
+                components = decode_names(self._COMPONENT_RE.findall(content))
                 analysis['components'] = [c for c in components if c[0].isupper()]
 
             # Extract exports
-            export_pattern = r'export\s+(?:const|function|class|default)?\s*(\w+)'
-            analysis['exports'] = re.findall(export_pattern, content)
+            analysis['exports'] = decode_names(self._EXPORT_RE.findall(content))
 
             return analysis
 
@@ -75,40 +126,57 @@ class AITestGenerator:
             print(f"Error analyzing {file_path}: {e}")
             return {}
 
+    def get_cache_path(self, prompt: str) -> Path:
+        """Get the on-disk cache location for a prompt sent to the current model"""
+        key = hashlib.sha256(f"{self._model}|{prompt}".encode()).hexdigest()
+        return CACHE_DIR / f"{key}.json"
+
+    def load_cached_tests(self, cache_path: Path) -> Optional[str]:
+        """Return cached test content, or None on a miss or when caching is disabled"""
+        if os.getenv('AI_REVIEW_NOCACHE') == '1':
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                return loads_json(f.read())['content']
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            return None
+
+    def save_cached_tests(self, cache_path: Path, content: str):
+        """Persist AI-generated tests so unchanged files are not re-sent"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                f.write(dumps_json({'content': content}))
+        except OSError as e:
+            print(f"Could not write test generation cache: {e}")
+
     def generate_tests_with_ai(self, analysis: Dict[str, Any], file_path: str) -> str:
         """Generate tests using AI"""
-        client_config = self.get_ai_client()
+        # Nothing callable to exercise: the template output is as good as a completion
+        if not (analysis.get('functions') or analysis.get('classes') or analysis.get('components')):
+            return self.generate_basic_tests(analysis, file_path)
 
         language = 'typescript' if file_path.endswith(('.ts', '.tsx')) else 'javascript'
-        is_react = 'React' in str(analysis) or file_path.endswith(('.jsx', '.tsx'))
+        is_react = analysis.get('is_react', False)
 
-        prompt = f"""
-        Generate comprehensive unit tests for this {language} file:
+        prompt = self._TESTGEN_TMPL.substitute(
+            language=language,
+            path=file_path,
+            analysis=json.dumps(analysis, separators=(',', ':')),
+            react_requirement='7. Use React Testing Library for React components' if is_react else ''
+        )
 
-        File: {file_path}
-        Analysis: {json.dumps(analysis, indent=2)}
-
-        Requirements:
-        1. Use modern testing framework (Vitest for JS/TS, pytest for Python)
-        2. Include tests for all functions, classes, and components
-        3. Test edge cases and error conditions
-        4. Mock external dependencies
-        5. Follow testing best practices
-        6. Include proper setup and teardown
-        {f'7. Use React Testing Library for React components' if is_react else ''}
-
-        Generate complete, runnable test code with proper imports and structure.
-        """
+        cache_path = self.get_cache_path(prompt)
+        cached = self.load_cached_tests(cache_path)
+        if cached is not None:
+            return cached
 
         try:
-            response = requests.post(
-                f"{client_config['base_url']}/chat/completions",
-                headers={
-                    'Authorization': f"Bearer {client_config['api_key']}",
-                    'Content-Type': 'application/json'
-                },
+            response = self.session().post(
+                self._endpoint,
+                headers=self.headers,
                 json={
-                    'model': 'anthropic/claude-3-haiku' if not self.use_localai else 'local-model',
+                    'model': self._model,
                     'messages': [{'role': 'user', 'content': prompt}],
                     'temperature': 0.3,
                     'max_tokens': 3000
@@ -117,8 +185,10 @@ class AITestGenerator:
             )
 
             if response.status_code == 200:
-                result = response.json()
-                return result['choices'][0]['message']['content']
+                result = loads_json(response.content)
+                content = result['choices'][0]['message']['content']
+                self.save_cached_tests(cache_path, content)
+                return content
             else:
                 return self.generate_basic_tests(analysis, file_path)
 
@@ -185,29 +255,36 @@ describe('{Path(file_path).stem}', () => {{
         test_filename = Path(original_file).stem + '.test' + Path(original_file).suffix
         test_path = test_dir / test_filename
 
-        with open(test_path, 'w') as f:
-            f.write(test_content)
+        test_path.write_text(test_content, encoding='utf-8')
 
         print(f"✅ Generated test: {test_path}")
 
+    def generate_for_file(self, file_path: str) -> Optional[str]:
+        """Analyze one file and return generated test content, or None if there is nothing to test"""
+        print(f"🔍 Analyzing {file_path}...")
+
+        analysis = self.analyze_javascript_file(file_path)
+        # Only generate if there's something to test
+        if not any(analysis.get(key) for key in ('functions', 'classes', 'components', 'exports', 'imports')):
+            return None
+
+        print(f"🤖 Generating tests for {file_path}...")
+        return self.generate_tests_with_ai(analysis, file_path)
+
     def run_test_generation(self):
         """Main test generation execution"""
         print("🧪 Starting AI Test Generation...")
 
-        # Find code files to test
-        code_extensions = ['*.js', '*.ts', '*.jsx', '*.tsx']
+        # Find code files to test in one walk, pruning vendored/generated trees before descending
         code_files = []
-
-        for ext in code_extensions:
-            code_files.extend(Path('.').glob(f'**/{ext}'))
-
-        # Filter out test files, node_modules, etc.
-        code_files = [
-            f for f in code_files
-            if not str(f).startswith(('node_modules', 'ai-generated-tests'))
-            and not f.name.endswith('.test.js') and not f.name.endswith('.test.ts')
-            and not f.name.endswith('.spec.js') and not f.name.endswith('.spec.ts')
-        ]
+        # Paths stay plain strings; Path objects are only built where stem/suffix are needed
+        for root, dirs, files in os.walk('.'):
+            dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS and not d.startswith('.')]
+            # root is '.' or './sub'; dropping the './' keeps paths like 'sub/app.js'
+            prefix = root[2:]
+            for name in files:
+                if name.endswith(JS_EXTENSIONS) and not name.endswith(TEST_SUFFIXES):
+                    code_files.append(os.path.join(prefix, name))
 
         if not code_files:
             print("No code files found to test")
@@ -215,21 +292,20 @@ describe('{Path(file_path).stem}', () => {{
 
         print(f"📄 Found {len(code_files)} code files to analyze")
 
+        # Analysis and generation are network-bound, so run them side by side;
+        # test files are still written from this thread only
+        targets = code_files[:3]  # Limit for demo
         generated_tests = 0
-        for file_path in code_files[:3]:  # Limit for demo
-            print(f"🔍 Analyzing {file_path}...")
-
-            if file_path.suffix in ['.js', '.ts', '.jsx', '.tsx']:
-                analysis = self.analyze_javascript_file(str(file_path))
-
-                if analysis and any(analysis.values()):  # Only generate if there's something to test
-                    print(f"🤖 Generating tests for {file_path}...")
-                    test_content = self.generate_tests_with_ai(analysis, str(file_path))
-                    self.save_test_file(test_content, str(file_path))
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(targets) or 1)) as executor:
+            futures = {executor.submit(self.generate_for_file, fp): fp for fp in targets}
+            for future in as_completed(futures):
+                test_content = future.result()
+                if test_content is not None:
+                    self.save_test_file(test_content, futures[future])
                     generated_tests += 1
 
         # Create summary
-        summary = f"""# 🧪 AI Test Generation Report
+        parts = [f"""# 🧪 AI Test Generation Report
 
 ## 📊 Summary
 - **Files Analyzed:** {len(code_files)}
@@ -241,14 +317,14 @@ describe('{Path(file_path).stem}', () => {{
 
 The following test files were created in the `ai-generated-tests/` directory:
 
-"""
+"""]
 
         test_dir = Path('ai-generated-tests')
         if test_dir.exists():
             for test_file in test_dir.glob('*.test.*'):
-                summary += f"- `{test_file.name}`\n"
+                parts.append(f"- `{test_file.name}`\n")
 
-        summary += """
+        parts.append("""
 
 ## 🚀 Next Steps
 
@@ -267,10 +343,9 @@ The following test files were created in the `ai-generated-tests/` directory:
 
 ---
 *Generated by AI Test Generator*
-"""
+""")
 
-        with open('ai-test-generation-report.md', 'w') as f:
-            f.write(summary)
+        Path('ai-test-generation-report.md').write_text("".join(parts), encoding='utf-8')
 
         print("✅ AI Test Generation completed!")
         print(f"🧪 Generated {generated_tests} test files")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Shared AI client plumbing for the LocalAI/OpenRouter review scripts
+Resolves the provider once and pools HTTP connections across every reviewer in a process
+"""
+
+import os
+import time
+import atexit
+import random
+import importlib.util
+from typing import Any, ClassVar, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# httpx is optional; without it callers fall back to the requests session
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# HTTP/2 needs the h2 package (pip install 'httpx[http2]')
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# A provider that answered 429 is tried last until this many seconds have passed
+PROVIDER_COOLDOWN = 60.0
+# Shared by every client in the process: provider name -> time.monotonic() it is usable again
+_provider_cooldowns: Dict[str, float] = {}
+
+# Errors that mean the provider could not be reached, as opposed to an HTTP error status
+TRANSPORT_ERRORS = (requests.RequestException,) + ((httpx.TransportError,) if httpx is not None else ())
+
+_http_client = None
+
+def get_http_client():
+    """Return the shared AsyncClient, building it on first use or after it was closed"""
+    global _http_client
+    if httpx is None:
+        return None
+    if _http_client is None or _http_client.is_closed:
+        # With HTTP/2 all concurrent requests multiplex over one TLS connection
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared AsyncClient if one was built"""
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+
+class AIClientBase:
+    """Provider selection plus a process-wide pooled requests.Session"""
+
+    _SESSION: ClassVar[Optional[requests.Session]] = None
+
+    def __init__(self):
+        self.openrouter_key = os.getenv('OPENROUTER_API_KEY')
+        self.localai_url = os.getenv('LOCALAI_BASE_URL', 'http://localhost:8080')
+        self.use_localai = bool(self.localai_url and not self.openrouter_key)
+
+        localai = self.provider('localai', f"{self.localai_url}/v1", 'localai', 'local-model')
+        openrouter = self.provider(
+            'openrouter', 'https://openrouter.ai/api/v1', self.openrouter_key, 'anthropic/claude-3-haiku'
+        )
+
+        # Resolve the provider once so the request path never re-branches on it
+        primary = localai if self.use_localai else openrouter
+        self._client_config = {
+            'base_url': primary['base_url'],
+            'api_key': primary['api_key']
+        }
+        self._model = primary['model']
+        self._endpoint = primary['endpoint']
+        self.headers = primary['headers']
+
+        # Providers that can stand in for each other, primary first; an explicitly
+        # set LOCALAI_BASE_URL makes LocalAI a fallback for OpenRouter
+        self.providers = [primary]
+        if not self.use_localai and os.getenv('LOCALAI_BASE_URL'):
+            self.providers.append(localai)
+
+    @staticmethod
+    def provider(name: str, base_url: str, api_key: Optional[str], model: str) -> Dict[str, Any]:
+        """Describe one chat-completions provider; its weight comes from <NAME>_WEIGHT (default 1)"""
+        return {
+            'name': name,
+            'base_url': base_url,
+            'api_key': api_key,
+            'model': model,
+            'endpoint': f"{base_url}/chat/completions",
+            'headers': {
+                'Authorization': f"Bearer {api_key}",
+                'Content-Type': 'application/json'
+            },
+            'weight': float(os.getenv(f"{name.upper()}_WEIGHT", '1'))
+        }
+
+    def provider_order(self) -> List[Dict[str, Any]]:
+        """Providers to try for one request: a weighted random pick, the rest by weight, cooling-down ones last"""
+        now = time.monotonic()
+        ready = [p for p in self.providers if _provider_cooldowns.get(p['name'], 0.0) <= now]
+        cooling = sorted(
+            (p for p in self.providers if p not in ready),
+            key=lambda p: _provider_cooldowns[p['name']]
+        )
+        if len(ready) > 1:
+            first = random.choices(ready, weights=[p['weight'] for p in ready])[0]
+            rest = sorted((p for p in ready if p is not first), key=lambda p: -p['weight'])
+            ready = [first] + rest
+        return ready + cooling
+
+    @staticmethod
+    def cool_down(provider: Dict[str, Any]):
+        """Send a rate-limited provider to the back of the line for PROVIDER_COOLDOWN seconds"""
+        _provider_cooldowns[provider['name']] = time.monotonic() + PROVIDER_COOLDOWN
+
+    def get_ai_client(self):
+        """Get AI client configuration"""
+        return self._client_config
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        """Return the keep-alive session shared by all reviewers, creating it on first use"""
+        if AIClientBase._SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=16,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.3,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=frozenset(['POST'])
+                )
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            atexit.register(session.close)
+            # Set on the base class so every subclass shares the same pool
+            AIClientBase._SESSION = session
+        return AIClientBase._SESSION
@@ -7,12 +7,72 @@ Orchestrates multiple AI agents for comprehensive code analysis and improvement
 import os
 import sys
 import json
-import requests
+import re
+import string
+import asyncio
+import hashlib
+import fnmatch
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict, Any
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
 from enum import Enum
 
+from ai_client import AIClientBase, TRANSPORT_ERRORS, get_http_client, close_http_client
+
+# orjson is optional and only used to serialize prompts and parse responses and caches faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pathspec is optional; without it only slash-free .gitignore patterns are honored
+try:
+    import pathspec
+except ImportError:
+    pathspec = None
+
+# Output budget for the single completion that answers every agent at once
+BATCH_MAX_TOKENS = 4096
+
+# Upper bound on agent requests in flight at once
+MAX_CONCURRENT_TASKS = 6
+
+# Passes over the provider list before a request gives up; pass n waits FAILOVER_BACKOFF * 2**(n-1)s first
+FAILOVER_ROUNDS = 3
+FAILOVER_BACKOFF = 1.0
+
+# Completions are memoized on disk by request hash; AI_REVIEW_NOCACHE=1 bypasses it
+CACHE_DIR = Path('.cache/crewai')
+# Least recently used entries beyond this many are evicted
+MAX_CACHE_ENTRIES = 10000
+# The last codebase scan, reused while no scanned directory has changed
+CODEBASE_CACHE_PATH = CACHE_DIR / 'codebase.json'
+# Fingerprint and files of the last fully successful run, replayed when nothing changed
+STATE_PATH = CACHE_DIR / 'state.json'
+CREW_REPORT_PATH = Path('crewai-execution-report.md')
+
+# Each agent's output is written here as soon as its result is in
+CREW_OUTPUT_DIR = Path('crewai-outputs')
+
+# Code files are bucketed by extension in this order
+CODE_EXTENSIONS = ('.js', '.ts', '.jsx', '.tsx', '.py')
+LANGUAGE_BY_EXT = {
+    '.js': 'JavaScript', '.jsx': 'JavaScript',
+    '.ts': 'TypeScript', '.tsx': 'TypeScript',
+    '.py': 'Python'
+}
+
+# Files whose changes invalidate the cached codebase scan even when no directory changed
+SCAN_INPUTS = ('package.json', '.gitignore')
+
+# Single-task prompts list at most this many files; the batched request sends the full list once
+PROMPT_SAMPLE_FILES = 200
+EXCLUDE_DIRS = frozenset({
+    'node_modules', '.git', 'dist', 'build', '.next',
+    '__pycache__', '.venv', 'venv', '.cache', 'crewai-outputs'
+})
+
 class AgentRole(Enum):
     CODE_REVIEWER = "code_reviewer"
     TEST_GENERATOR = "test_generator"
@@ -21,43 +81,131 @@ class AgentRole(Enum):
     ARCHITECTURE_ANALYST = "architecture_analyst"
     SECURITY_AUDITOR = "security_auditor"
 
-@dataclass
+@dataclass(slots=True)
 class CrewAgent:
     role: AgentRole
     name: str
     goal: str
     backstory: str
     tools: List[str]
-
-@dataclass
+    # The part of every prompt that only depends on the agent, rendered once
+    prompt_prefix: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.prompt_prefix = (
+            f"You are {self.name}, a {self.role.value.replace('_', ' ')}.\n"
+            f"Your Background: {self.backstory}\n"
+            f"Your Goal: {self.goal}\n"
+            f"Available Tools: {', '.join(self.tools)}\n"
+        )
+
+@dataclass(slots=True)
 class Task:
     description: str
     agent: CrewAgent
     expected_output: str
     context: Dict[str, Any]
+    # Pre-rendered dumps_json_indented(context); rendered on demand when None
+    context_json: Optional[str] = field(default=None, repr=False)
+
+def loads_json(data):
+    """Parse JSON text or bytes with orjson when available; errors are json.JSONDecodeError either way"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# The stdlib fallbacks write the same text as orjson for these payloads (only float
+# exponents are spelled differently), so prompts and cache keys do not depend on orjson
+def dumps_json(obj, sort_keys: bool = False) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys).encode('utf-8')
+
+def dumps_json_indented(obj) -> str:
+    """Serialize to JSON text indented by two spaces, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+def summarize_codebase(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Cap the file list at an evenly spaced sample, adding the total and per-language counts"""
+    files = analysis['files']
+    if len(files) <= PROMPT_SAMPLE_FILES:
+        return analysis
+    step = len(files) / PROMPT_SAMPLE_FILES
+    return {
+        **analysis,
+        'files': [files[int(i * step)] for i in range(PROMPT_SAMPLE_FILES)],
+        'file_count': len(files),
+        'files_by_language': dict(Counter(LANGUAGE_BY_EXT[os.path.splitext(f)[1]] for f in files))
+    }
+
+def compile_gitignore(lines: List[str]):
+    """Turn .gitignore lines into a predicate over relative paths (directories end in '/')"""
+    if pathspec is not None:
+        return pathspec.PathSpec.from_lines('gitwildmatch', lines).match_file
+
+    # Without pathspec, patterns with no inner slash (e.g. 'dist/', '*.egg-info')
+    # are matched against the basename at any depth; anchored paths and negations are skipped
+    patterns = [
+        line for line in (raw.strip() for raw in lines)
+        if line and not line.startswith(('#', '!')) and '/' not in line.rstrip('/')
+    ]
+    if not patterns:
+        return None
+    any_re = re.compile('|'.join(fnmatch.translate(p.rstrip('/')) for p in patterns))
+    file_patterns = [p for p in patterns if not p.endswith('/')]
+    file_re = re.compile('|'.join(fnmatch.translate(p) for p in file_patterns)) if file_patterns else None
+
+    def ignored(path: str) -> bool:
+        if path.endswith('/'):
+            return any_re.match(os.path.basename(path[:-1])) is not None
+        return file_re is not None and file_re.match(os.path.basename(path)) is not None
+    return ignored
+
+# Stands in for the codebase while a task context is serialized, then is swapped for the shared JSON
+_CODEBASE_PLACEHOLDER = dumps_json('\0codebase\0').decode('utf-8')
+
+def render_task_context(context: Dict[str, Any], codebase_json: str) -> str:
+    """dumps_json_indented(context) with context['codebase'] taken from JSON serialized once up front"""
+    rendered = dumps_json_indented({**context, 'codebase': '\0codebase\0'})
+    # Nested one level deep, so every line of the codebase JSON gains two spaces of indent
+    return rendered.replace(_CODEBASE_PLACEHOLDER, codebase_json.replace('\n', '\n  '), 1)
+
+class CrewAIOrchestrator(AIClientBase):
+    # Batched replies open each agent's answer with this marker line
+    _AGENT_MARKER_RE = re.compile(r'^=== AGENT (\d+) ===[ \t]*$', re.MULTILINE)
+
+    # Prompts are parsed once; the agent part comes pre-rendered from CrewAgent.prompt_prefix
+    _TASK_TMPL = string.Template("""
+        $prefix
+        Task: $description
+        Expected Output: $expected_output
+
+        Context: $context
+
+        Please provide a comprehensive response addressing the task requirements.
+        Be specific, actionable, and professional in your analysis and recommendations.
+        """)
+
+    _BATCH_TMPL = string.Template("""
+        You are a crew of $count specialist agents. Answer as each agent in turn.
+
+        $sections
+
+        For every agent, provide a comprehensive response addressing its task requirements.
+        Be specific, actionable, and professional in your analysis and recommendations.
+        Start each agent's answer with a line containing exactly "=== AGENT k ===" (k as numbered above)
+        and answer the agents in the order given.
+        """)
 
-class CrewAIOrchestrator:
     def __init__(self):
-        self.openrouter_key = os.getenv('OPENROUTER_API_KEY')
-        self.localai_url = os.getenv('LOCALAI_BASE_URL', 'http://localhost:8080')
-        self.use_localai = bool(self.localai_url and not self.openrouter_key)
+        super().__init__()
 
         # Initialize crew agents
         self.agents = self.initialize_agents()
 
-    def get_ai_client(self):
-        """Get AI client configuration"""
-        if self.use_localai:
-            return {
-                'base_url': f"{self.localai_url}/v1",
-                'api_key': 'localai'
-            }
-        else:
-            return {
-                'base_url': 'https://openrouter.ai/api/v1',
-                'api_key': self.openrouter_key
-            }
-
     def initialize_agents(self) -> Dict[AgentRole, CrewAgent]:
         """Initialize the AI agent crew"""
         return {
@@ -162,76 +310,340 @@ class CrewAIOrchestrator:
             context={"codebase": codebase_analysis, "audit_type": "comprehensive"}
         ))
 
+        # Serialize the shared codebase analysis once rather than once per task;
+        # prompts for a single agent only carry a sample of the file list
+        codebase_json = dumps_json_indented(summarize_codebase(codebase_analysis))
+        for task in tasks:
+            task.context_json = render_task_context(task.context, codebase_json)
+
         return tasks
 
-    def execute_task(self, task: Task) -> Dict[str, Any]:
+    def task_context_json(self, task: Task) -> str:
+        """The task context as indented JSON, pre-rendered by create_tasks when possible"""
+        if task.context_json is None:
+            task.context_json = dumps_json_indented(task.context)
+        return task.context_json
+
+    def get_cache_path(self, payload: Dict[str, Any]) -> Path:
+        """Get the on-disk cache location for a completion request"""
+        key = hashlib.sha256(dumps_json(payload, sort_keys=True)).hexdigest()
+        return CACHE_DIR / f"{key}.json"
+
+    def load_cached_choice(self, cache_path: Path):
+        """Return a cached completion choice, or None on a miss or when caching is disabled"""
+        if os.getenv('AI_REVIEW_NOCACHE') == '1':
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                choice = loads_json(f.read())
+            # Refresh the mtime so eviction drops the least recently used entries
+            os.utime(cache_path)
+            return choice
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save_cached_choice(self, cache_path: Path, choice: Dict[str, Any]):
+        """Persist a successful completion choice so identical requests are not re-sent"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                f.write(dumps_json(choice))
+        except OSError as e:
+            print(f"Could not write CrewAI cache: {e}")
+
+    def crew_fingerprint(self, tasks: List[Task]) -> str:
+        """Hash of everything that goes into the agents' prompts"""
+        digest = hashlib.sha256(self._model.encode('utf-8'))
+        for task in tasks:
+            for part in (task.agent.prompt_prefix, task.description, task.expected_output, self.task_context_json(task)):
+                digest.update(b'\0')
+                digest.update(part.encode('utf-8'))
+        return digest.hexdigest()
+
+    def replay_last_run(self, fingerprint: str) -> bool:
+        """Rewrite the previous run's output files if it was made from the same prompts"""
+        if os.getenv('AI_REVIEW_NOCACHE') == '1' or '--force' in sys.argv[1:]:
+            return False
+        try:
+            with open(STATE_PATH, 'rb') as f:
+                state = loads_json(f.read())
+            if state['fingerprint'] != fingerprint:
+                return False
+            CREW_OUTPUT_DIR.mkdir(exist_ok=True)
+            for path, content in state['files'].items():
+                Path(path).write_text(content, encoding='utf-8')
+            return True
+        except (OSError, KeyError, TypeError, AttributeError, json.JSONDecodeError):
+            return False
+
+    def save_run_state(self, fingerprint: str, files: Dict[str, str]):
+        """Remember this run's fingerprint and output files for replay"""
+        try:
+            STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(STATE_PATH, 'wb') as f:
+                f.write(dumps_json({'fingerprint': fingerprint, 'files': files}))
+        except OSError as e:
+            print(f"Could not write CrewAI state: {e}")
+
+    def prune_cache(self):
+        """Evict the least recently used cache entries beyond MAX_CACHE_ENTRIES"""
+        try:
+            entries = sorted(CACHE_DIR.glob('*.json'), key=lambda p: p.stat().st_mtime_ns)
+            for path in entries[:-MAX_CACHE_ENTRIES]:
+                path.unlink()
+        except OSError as e:
+            print(f"Could not prune CrewAI cache: {e}")
+
+    async def complete(self, payload: Dict[str, Any], timeout: float) -> tuple:
+        """Return (status_code, first choice) for a chat completion, serving repeats from the cache"""
+        cache_path = self.get_cache_path(payload)
+        choice = self.load_cached_choice(cache_path)
+        if choice is not None:
+            return 200, choice
+
+        response = await self.post_completion(payload, timeout)
+        if response.status_code != 200:
+            return response.status_code, None
+        choice = loads_json(response.content)['choices'][0]
+        if choice.get('finish_reason') != 'length':
+            # Truncated answers are re-requested next time rather than replayed
+            self.save_cached_choice(cache_path, choice)
+        return 200, choice
+
+    async def post_completion(self, payload: Dict[str, Any], timeout: float):
+        """POST a chat completion, failing over between providers on 429, 5xx and connection errors"""
+        # The payload names the primary model (and keys the cache); each provider gets its own
+        response = None
+        error = None
+        for round_no in range(FAILOVER_ROUNDS):
+            if round_no:
+                await asyncio.sleep(FAILOVER_BACKOFF * 2 ** (round_no - 1))
+            for provider in self.provider_order():
+                try:
+                    body = dumps_json({**payload, 'model': provider['model']})
+                    response = await self.post_to_provider(provider, body, timeout)
+                except TRANSPORT_ERRORS as e:
+                    print(f"⚠️ {provider['name']} unreachable: {e}")
+                    error = e
+                    continue
+                if response.status_code == 429:
+                    print(f"⚠️ {provider['name']} rate limited; skipping it for a while")
+                    self.cool_down(provider)
+                elif response.status_code >= 500:
+                    print(f"⚠️ {provider['name']} returned {response.status_code}")
+                else:
+                    return response
+        if response is None:
+            raise error
+        return response
+
+    async def post_to_provider(self, provider: Dict[str, Any], body: bytes, timeout: float):
+        """POST a serialized JSON body to one provider on the shared httpx client, or the pooled session without httpx"""
+        # One keep-alive pool serves the batch and every retry; with h2 installed
+        # (pip install 'httpx[http2]') they multiplex over a single TLS connection
+        client = get_http_client()
+        if client is not None:
+            return await client.post(provider['endpoint'], headers=provider['headers'], content=body, timeout=timeout)
+        return await asyncio.to_thread(
+            self.session().post, provider['endpoint'],
+            headers=provider['headers'], data=body, timeout=timeout
+        )
+
+    async def execute_task(self, task: Task, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
         """Execute a single task using AI"""
-        client_config = self.get_ai_client()
-
-        prompt = f"""
-        You are {task.agent.name}, a {task.agent.role.value.replace('_', ' ')}.
-
-        Your Background: {task.agent.backstory}
-        Your Goal: {task.agent.goal}
-
-        Task: {task.description}
-        Expected Output: {task.expected_output}
-
-        Context: {json.dumps(task.context, indent=2)}
-
-        Available Tools: {', '.join(task.agent.tools)}
-
-        Please provide a comprehensive response addressing the task requirements.
-        Be specific, actionable, and professional in your analysis and recommendations.
-        """
+        prompt = self._TASK_TMPL.substitute(
+            prefix=task.agent.prompt_prefix,
+            description=task.description,
+            expected_output=task.expected_output,
+            context=self.task_context_json(task)
+        )
 
         try:
-            response = requests.post(
-                f"{client_config['base_url']}/chat/completions",
-                headers={
-                    'Authorization': f"Bearer {client_config['api_key']}",
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'anthropic/claude-3-haiku' if not self.use_localai else 'local-model',
+            async with semaphore:
+                status, choice = await self.complete({
+                    'model': self._model,
                     'messages': [{'role': 'user', 'content': prompt}],
                     'temperature': 0.3,
                     'max_tokens': 3000
-                },
-                timeout=60
-            )
+                }, timeout=60)
 
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content']
-
-                return {
-                    'agent': task.agent.name,
-                    'role': task.agent.role.value,
-                    'task': task.description,
-                    'output': content,
-                    'success': True
-                }
+            if status == 200:
+                return self.task_result(task, choice['message']['content'], True)
             else:
-                return {
-                    'agent': task.agent.name,
-                    'role': task.agent.role.value,
-                    'task': task.description,
-                    'output': f"API Error: {response.status_code}",
-                    'success': False
-                }
+                return self.task_result(task, f"API Error: {status}", False)
 
         except Exception as e:
-            return {
-                'agent': task.agent.name,
-                'role': task.agent.role.value,
-                'task': task.description,
-                'output': f"Error: {e}",
-                'success': False
-            }
+            return self.task_result(task, f"Error: {e}", False)
+
+    def task_result(self, task: Task, output: str, success: bool) -> Dict[str, Any]:
+        """Build the result record for one task"""
+        return {
+            'agent': task.agent.name,
+            'role': task.agent.role.value,
+            'task': task.description,
+            'output': output,
+            'success': success
+        }
+
+    async def execute_tasks_batch(self, tasks: List[Task]) -> List[Dict[str, Any]]:
+        """Answer every task in one completion; tasks missing from the reply run concurrently on their own"""
+        # Tasks from create_tasks share one codebase analysis; it is sent once as a
+        # system message instead of inside every agent's section
+        codebase = tasks[0].context.get('codebase')
+        shared = codebase is not None and all(task.context.get('codebase') is codebase for task in tasks)
+        messages = []
+        if shared:
+            messages.append({'role': 'system', 'content': f"CODEBASE_MANIFEST=\n{dumps_json(codebase).decode('utf-8')}"})
+
+        sections = "\n\n".join(
+            f"### AGENT {k}: {task.agent.name}\n"
+            f"{task.agent.prompt_prefix}"
+            f"Task: {task.description}\n"
+            f"Expected Output: {task.expected_output}\n"
+            f"Context: {self.batch_section_context(task, shared)}"
+            for k, task in enumerate(tasks, 1)
+        )
+        prompt = self._BATCH_TMPL.substitute(count=len(tasks), sections=sections)
+        messages.append({'role': 'user', 'content': prompt})
+
+        answers = {}
+        try:
+            status, choice = await self.complete({
+                'model': self._model,
+                'messages': messages,
+                'temperature': 0.3,
+                'max_tokens': BATCH_MAX_TOKENS
+            }, timeout=120)
+            if status == 200:
+                answers = self.split_agent_answers(choice['message']['content'])
+                if choice.get('finish_reason') == 'length' and answers:
+                    # The last answer was cut off by the token limit; rerun that agent alone
+                    answers.pop(max(answers))
+            else:
+                print(f"Batched crew request failed: API Error: {status}")
+        except Exception as e:
+            print(f"Batched crew request failed: {e}")
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
+        return await asyncio.gather(*(
+            self.finish_task(task, answers.get(k), semaphore)
+            for k, task in enumerate(tasks, 1)
+        ))
+
+    def batch_section_context(self, task: Task, shared: bool) -> str:
+        """A task's context for the batched prompt, pointing at the manifest when the codebase is shared"""
+        if not shared:
+            return self.task_context_json(task)
+        extra = {key: value for key, value in task.context.items() if key != 'codebase'}
+        return f"Analyze the CODEBASE_MANIFEST above for this task. {dumps_json(extra).decode('utf-8')}"
+
+    async def finish_task(self, task: Task, answer: Optional[str], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Take the batched answer or run the task alone, then write its output file right away"""
+        if answer:
+            result = self.task_result(task, answer, True)
+        else:
+            print(f"↩️ No batched answer for {task.agent.name}; running it individually")
+            result = await self.execute_task(task, semaphore)
+
+        await asyncio.to_thread(
+            (CREW_OUTPUT_DIR / f"{result['role']}-output.md").write_text,
+            self.format_agent_output(result)
+        )
+        if result['success']:
+            print(f"✅ {result['agent']} completed successfully")
+        else:
+            print(f"❌ {result['agent']} failed: {result['output']}")
+        return result
+
+    def format_agent_output(self, result: Dict[str, Any]) -> str:
+        """Render one agent's output file"""
+        return (
+            f"# {result['agent']} Report\n\n"
+            f"**Task:** {result['task']}\n\n"
+            f"**Status:** {'✅ Success' if result['success'] else '❌ Failed'}\n\n"
+            f"## Output\n\n{result['output']}"
+        )
+
+    def split_agent_answers(self, content: str) -> Dict[int, str]:
+        """Split a batched reply into {agent number: answer} on the marker lines"""
+        parts = self._AGENT_MARKER_RE.split(content)
+        # parts = [preamble, k1, answer1, k2, answer2, ...]
+        return {int(k): answer.strip() for k, answer in zip(parts[1::2], parts[2::2])}
+
+    def scan_input_mtimes(self) -> Dict[str, Optional[int]]:
+        """mtime in nanoseconds of each SCAN_INPUTS file, None for missing ones"""
+        mtimes = {}
+        for name in SCAN_INPUTS:
+            try:
+                mtimes[name] = os.stat(name).st_mtime_ns
+            except OSError:
+                mtimes[name] = None
+        return mtimes
+
+    def load_cached_codebase(self) -> Optional[Dict[str, Any]]:
+        """Return the previous analysis if the scan inputs and every scanned directory are unchanged"""
+        if os.getenv('AI_REVIEW_NOCACHE') == '1':
+            return None
+        try:
+            with open(CODEBASE_CACHE_PATH, 'rb') as f:
+                cached = loads_json(f.read())
+            if cached['inputs'] != self.scan_input_mtimes():
+                return None
+            # Adding, removing or renaming a file bumps its directory's mtime,
+            # so one stat per directory stands in for re-listing the whole tree
+            for directory, mtime in cached['dirs'].items():
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return None
+            return cached['analysis']
+        except (OSError, KeyError, TypeError, json.JSONDecodeError):
+            return None
+
+    def save_cached_codebase(self, analysis: Dict[str, Any], dirs: Dict[str, int], inputs: Dict[str, Optional[int]]):
+        """Persist a codebase analysis with the directory and input-file mtimes it was built from"""
+        try:
+            CODEBASE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(CODEBASE_CACHE_PATH, 'wb') as f:
+                f.write(dumps_json({'inputs': inputs, 'dirs': dirs, 'analysis': analysis}))
+        except OSError as e:
+            print(f"Could not write codebase cache: {e}")
+
+    def load_gitignore(self):
+        """Predicate for paths ignored by the top-level .gitignore, or None if nothing is ignored"""
+        try:
+            with open('.gitignore', 'r', encoding='utf-8') as f:
+                return compile_gitignore(f.read().splitlines())
+        except OSError:
+            return None
+
+    def walk_code_files(self) -> tuple:
+        """Collect code files in one pruned walk; returns (files, {directory: mtime_ns})"""
+        buckets = {ext: [] for ext in CODE_EXTENSIONS}
+        dirs = {}
+        ignored = self.load_gitignore()
+        for root, subdirs, files in os.walk('.'):
+            # root is '.' or './sub'; dropping the './' keeps paths like 'sub/app.js'
+            prefix = root[2:]
+            # Pruning in place keeps os.walk from ever listing ignored trees
+            subdirs[:] = [
+                d for d in subdirs
+                if d not in EXCLUDE_DIRS and not (ignored and ignored(os.path.join(prefix, d) + '/'))
+            ]
+            dirs[root] = os.stat(root).st_mtime_ns
+            for name in files:
+                bucket = buckets.get(os.path.splitext(name)[1])
+                if bucket is not None:
+                    path = os.path.join(prefix, name)
+                    if not (ignored and ignored(path)):
+                        bucket.append(path)
+        # Sorted so the prompt, and with it the completion cache key, is stable across runs
+        return [f for ext in CODE_EXTENSIONS for f in sorted(buckets[ext])], dirs
 
     def analyze_codebase(self) -> Dict[str, Any]:
         """Analyze the current codebase structure"""
+        cached = self.load_cached_codebase()
+        if cached is not None:
+            return cached
+
         analysis = {
             'languages': set(),
             'frameworks': [],
@@ -242,9 +654,10 @@ class CrewAIOrchestrator:
         }
 
         # Analyze package.json
-        if Path('package.json').exists():
-            with open('package.json', 'r') as f:
-                package = json.load(f)
+        inputs = self.scan_input_mtimes()
+        if inputs['package.json'] is not None:
+            with open('package.json', 'rb') as f:
+                package = loads_json(f.read())
                 analysis['frameworks'].append('Node.js')
 
                 deps = package.get('dependencies', {})
@@ -256,20 +669,15 @@ class CrewAIOrchestrator:
                     analysis['frameworks'].append('Cloudflare Workers')
 
         # Find code files
-        code_extensions = ['*.js', '*.ts', '*.jsx', '*.tsx', '*.py']
-        for ext in code_extensions:
-            analysis['files'].extend([str(f) for f in Path('.').glob(f'**/{ext}')])
+        analysis['files'], dirs = self.walk_code_files()
 
         # Determine languages
         for file in analysis['files']:
-            if file.endswith(('.js', '.jsx')):
-                analysis['languages'].add('JavaScript')
-            elif file.endswith(('.ts', '.tsx')):
-                analysis['languages'].add('TypeScript')
-            elif file.endswith('.py'):
-                analysis['languages'].add('Python')
-
-        analysis['languages'] = list(analysis['languages'])
+            analysis['languages'].add(LANGUAGE_BY_EXT[os.path.splitext(file)[1]])
+
+        # Sorted so the prompt, and with it the cache key, is stable across runs
+        analysis['languages'] = sorted(analysis['languages'])
+        self.save_cached_codebase(analysis, dirs, inputs)
         return analysis
 
     def generate_crew_report(self, results: List[Dict[str, Any]]) -> str:
@@ -325,7 +733,7 @@ class CrewAIOrchestrator:
 
         return report
 
-    def run_crew_execution(self):
+    async def run_crew_execution(self):
         """Main CrewAI execution"""
         print("🚀 Starting CrewAI Orchestration...")
 
@@ -339,43 +747,43 @@ class CrewAIOrchestrator:
         tasks = self.create_tasks(codebase_analysis)
         print(f"🎯 Created {len(tasks)} tasks for {len(self.agents)} agents")
 
-        # Execute tasks
-        results = []
-        for i, task in enumerate(tasks, 1):
-            print(f"🤖 Executing Task {i}/{len(tasks)}: {task.agent.name} - {task.description[:50]}...")
-            result = self.execute_task(task)
-            results.append(result)
-
-            if result['success']:
-                print(f"✅ {task.agent.name} completed successfully")
-            else:
-                print(f"❌ {task.agent.name} failed: {result['output']}")
+        # Same prompts as the last successful run: its outputs still apply, so skip the agents
+        fingerprint = self.crew_fingerprint(tasks)
+        if self.replay_last_run(fingerprint):
+            print("♻️ Codebase unchanged since the last run; replayed its outputs (use --force to rerun)")
+            print(f"📋 Main report: {CREW_REPORT_PATH}")
+            print(f"📁 Individual outputs: {CREW_OUTPUT_DIR}/")
+            return
+
+        # Execute every task in one batched request; each agent's output is saved as it completes
+        print(f"🤖 Executing {len(tasks)} tasks in one batched request...")
+        CREW_OUTPUT_DIR.mkdir(exist_ok=True)
+        try:
+            results = await self.execute_tasks_batch(tasks)
+        finally:
+            await close_http_client()
+        self.prune_cache()
 
         # Generate comprehensive report
         print("📝 Generating comprehensive report...")
         report = self.generate_crew_report(results)
 
-        with open('crewai-execution-report.md', 'w') as f:
+        with open(CREW_REPORT_PATH, 'w') as f:
             f.write(report)
 
-        # Save individual agent outputs
-        crew_output_dir = Path('crewai-outputs')
-        crew_output_dir.mkdir(exist_ok=True)
-
-        for result in results:
-            output_file = crew_output_dir / f"{result['role']}-output.md"
-            with open(output_file, 'w') as f:
-                f.write(f"# {result['agent']} Report\n\n")
-                f.write(f"**Task:** {result['task']}\n\n")
-                f.write(f"**Status:** {'✅ Success' if result['success'] else '❌ Failed'}\n\n")
-                f.write(f"## Output\n\n{result['output']}")
+        # Only a run where every agent succeeded is worth replaying
+        if all(r['success'] for r in results):
+            files = {str(CREW_REPORT_PATH): report}
+            for result in results:
+                files[str(CREW_OUTPUT_DIR / f"{result['role']}-output.md")] = self.format_agent_output(result)
+            self.save_run_state(fingerprint, files)
 
         print("✅ CrewAI Execution completed!")
-        print(f"📋 Main report: crewai-execution-report.md")
+        print(f"📋 Main report: {CREW_REPORT_PATH}")
         print(f"📁 Individual outputs: crewai-outputs/")
         print(f"👥 Agents deployed: {len(self.agents)}")
         print(f"🎯 Tasks completed: {sum(1 for r in results if r['success'])}/{len(results)}")
 
 if __name__ == "__main__":
     crew = CrewAIOrchestrator()
-    crew.run_crew_execution()
\ No newline at end of file
+    asyncio.run(crew.run_crew_execution())
\ No newline at end of file
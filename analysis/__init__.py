@@ -11,20 +11,23 @@ This package provides modules for:
 - Consistency and honesty analysis
 """
 
-from .embeddings import BillEmbeddings, SpeechEmbeddings, create_embeddings
+from .embeddings import BillEmbeddings, BillEmbeddingStore, SpeechEmbeddings, create_embeddings
 from .sentiment import SentimentAnalyzer, analyze_sentiment
 from .nlp_processor import NLPProcessor, extract_entities
+from .fast_entity import IngestEntityExtractor
 from .bias_detector import BiasDetector, detect_political_bias
 from .consistency_analyzer import ConsistencyAnalyzer, analyze_voting_consistency
 
 __all__ = [
     'BillEmbeddings',
+    'BillEmbeddingStore',
     'SpeechEmbeddings',
     'create_embeddings',
     'SentimentAnalyzer',
     'analyze_sentiment',
     'NLPProcessor',
     'extract_entities',
+    'IngestEntityExtractor',
     'BiasDetector',
     'detect_political_bias',
     'ConsistencyAnalyzer',
@@ -6,11 +6,14 @@ and political statements using linguistic analysis and ML models.
 """
 
 import logging
+from collections import Counter
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 import re
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 # Optional imports
@@ -22,7 +25,7 @@ except ImportError:
     pipeline = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BiasScore:
     """
     Represents political bias analysis results.
@@ -85,17 +88,48 @@ class BiasDetector:
     ]
     
     LOADED_LANGUAGE_PATTERNS = [
-        r'\b(radical|extreme|dangerous|disastrous|catastrophic)\b',
-        r'\b(corrupt|dishonest|scandal|cover-up)\b',
-        r'\b(unprecedented|historic|groundbreaking|revolutionary)\b',
+        r'\b(?:radical|extreme|dangerous|disastrous|catastrophic)\b',
+        r'\b(?:corrupt|dishonest|scandal|cover-up)\b',
+        r'\b(?:unprecedented|historic|groundbreaking|revolutionary)\b',
     ]
     
     EMOTIONAL_APPEAL_PATTERNS = [
-        r'\b(must|need to|have to|crucial|vital|essential)\b',
-        r'\b(fear|worry|concern|alarming|shocking)\b',
-        r'\b(hope|believe|trust|faith)\b',
+        r'\b(?:must|need to|have to|crucial|vital|essential)\b',
+        r'\b(?:fear|worry|concern|alarming|shocking)\b',
+        r'\b(?:hope|believe|trust|faith)\b',
     ]
     
+    # Problem framing keywords
+    PROBLEM_FRAMES = {
+        'crisis': r'\bcrisis\b',
+        'threat': r'\b(threat|danger|risk)\b',
+        'failure': r'\b(fail|broken|dysfunction)\b',
+        'injustice': r'\b(injustice|unfair|inequit)\b',
+    }
+    
+    # Solution framing keywords
+    SOLUTION_FRAMES = {
+        'reform': r'\b(reform|improve|enhance)\b',
+        'protect': r'\b(protect|defend|secure)\b',
+        'invest': r'\b(invest|fund|support)\b',
+        'eliminate': r'\b(eliminate|end|stop)\b',
+    }
+    
+    # Compiled once at class load; each family of patterns is unioned so a
+    # single pass over the text finds every match. The loaded-language and
+    # emotional-appeal patterns only ever see lowercased text, so they skip
+    # IGNORECASE, which roughly doubles matching time
+    _LOADED_RE = re.compile('|'.join(LOADED_LANGUAGE_PATTERNS))
+    _EMOTIONAL_RE = re.compile('|'.join(EMOTIONAL_APPEAL_PATTERNS))
+    _FRAME_RE = re.compile(
+        '|'.join(f'(?P<{frame}>{pattern})' for frame, pattern in {**PROBLEM_FRAMES, **SOLUTION_FRAMES}.items()),
+        re.IGNORECASE
+    )
+    _PARALLELISM_RE = re.compile(r'\b(not only .+ but also|either .+ or|neither .+ nor)\b')
+    # First pair of adjacent whitespace-separated words sharing a first character,
+    # as long as another word follows; \s and \S split exactly like str.split()
+    _ALLITERATION_RE = re.compile(r'(?<!\S)((\S)\S*)\s+(\2\S*)(?=\s+\S)')
+    
     def __init__(self, use_transformer: bool = False):
         """
         Initialize bias detector.
@@ -146,8 +180,7 @@ class BiasDetector:
         text_lower = text.lower()
         
         # Count partisan terms
-        left_count = sum(1 for term in self.LEFT_LEANING_TERMS if term in text_lower)
-        right_count = sum(1 for term in self.RIGHT_LEANING_TERMS if term in text_lower)
+        left_count, right_count = self._count_partisan_terms(text_lower)
         
         # Calculate bias score
         total_partisan = left_count + right_count
@@ -157,26 +190,11 @@ class BiasDetector:
             bias_score = 0.0
         
         # Determine overall bias
-        if bias_score > 0.3:
-            overall_bias = 'right'
-        elif bias_score < -0.3:
-            overall_bias = 'left'
-        elif abs(bias_score) > 0.1:
-            overall_bias = 'center-right' if bias_score > 0 else 'center-left'
-        else:
-            overall_bias = 'neutral'
+        overall_bias = self._classify_bias(bias_score)
         
-        # Detect loaded language
-        loaded_language = []
-        for pattern in self.LOADED_LANGUAGE_PATTERNS:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            loaded_language.extend(matches)
-        
-        # Detect emotional appeals
-        emotional_appeals = []
-        for pattern in self.EMOTIONAL_APPEAL_PATTERNS:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            emotional_appeals.extend(matches)
+        # Detect loaded language and emotional appeals (in order of appearance)
+        loaded_language = self._LOADED_RE.findall(text_lower)
+        emotional_appeals = self._EMOTIONAL_RE.findall(text_lower)
         
         # Calculate objectivity score (inverse of bias indicators)
         bias_indicators = len(loaded_language) + len(emotional_appeals) + total_partisan
@@ -192,8 +210,8 @@ class BiasDetector:
             overall_bias=overall_bias,
             bias_score=bias_score,
             confidence=confidence,
-            loaded_language=list(set(loaded_language[:10])),  # Top 10 unique
-            emotional_appeals=list(set(emotional_appeals[:10])),
+            loaded_language=self._top_terms(loaded_language),
+            emotional_appeals=self._top_terms(emotional_appeals),
             objectivity_score=objectivity_score,
             analyzed_at=datetime.utcnow(),
             model_name='rule_based',
@@ -203,49 +221,131 @@ class BiasDetector:
             },
         )
     
-    def analyze_framing(self, text: str) -> Dict[str, Any]:
+    def detect_batch(
+        self,
+        texts: List[str],
+        text_ids: List[int] = None,
+        text_types: List[str] = None,
+    ) -> List[BiasScore]:
         """
-        Analyze how the text frames issues (problem framing, solution framing, etc.).
+        Detect political bias in many texts at once.
+        
+        Results match calling detect() on each text. Matching stays per text,
+        in C-level substring and regex scans, while the scores for the whole
+        batch are computed as NumPy arrays.
         
         Args:
-            text: Text to analyze
+            texts: List of texts to analyze
+            text_ids: Optional list of IDs
+            text_types: Optional list of type labels
             
         Returns:
-            Dictionary with framing analysis
+            List of BiasScore objects
         """
-        # Problem framing keywords
-        problem_frames = {
-            'crisis': r'\bcrisis\b',
-            'threat': r'\b(threat|danger|risk)\b',
-            'failure': r'\b(fail|broken|dysfunction)\b',
-            'injustice': r'\b(injustice|unfair|inequit)\b',
-        }
+        n = len(texts)
+        lowered = [text.lower() if text else '' for text in texts]
         
-        # Solution framing keywords
-        solution_frames = {
-            'reform': r'\b(reform|improve|enhance)\b',
-            'protect': r'\b(protect|defend|secure)\b',
-            'invest': r'\b(invest|fund|support)\b',
-            'eliminate': r'\b(eliminate|end|stop)\b',
-        }
+        partisan = np.array([self._count_partisan_terms(t) for t in lowered], dtype=np.int64).reshape(n, 2)
+        left_count, right_count = partisan[:, 0], partisan[:, 1]
+        loaded_language = [self._LOADED_RE.findall(t) for t in lowered]
+        emotional_appeals = [self._EMOTIONAL_RE.findall(t) for t in lowered]
+        word_count = np.fromiter((len(t.split()) for t in lowered), dtype=np.int64, count=n)
         
-        text_lower = text.lower()
+        # Scores for every text at once
+        total_partisan = left_count + right_count
+        bias_score = np.where(total_partisan > 0, (right_count - left_count) / np.maximum(total_partisan, 1), 0.0)
+        indicators = total_partisan + np.fromiter(
+            (len(l) + len(e) for l, e in zip(loaded_language, emotional_appeals)), dtype=np.int64, count=n
+        )
+        objectivity_score = np.where(
+            word_count > 0, np.maximum(0.0, 1 - indicators / np.maximum(word_count, 1)), 1.0
+        )
+        confidence = np.minimum(1.0, total_partisan / 10)
         
-        detected_problem_frames = {}
-        for frame, pattern in problem_frames.items():
-            matches = len(re.findall(pattern, text_lower, re.IGNORECASE))
-            if matches > 0:
-                detected_problem_frames[frame] = matches
+        analyzed_at = datetime.utcnow()
+        results = []
+        for i, text in enumerate(texts):
+            text_id = text_ids[i] if text_ids else None
+            text_type = text_types[i] if text_types else None
+            
+            if not text or not text.strip():
+                logger.warning("Empty text provided for bias detection")
+                results.append(BiasScore(
+                    text_id=text_id,
+                    text_type=text_type,
+                    overall_bias='neutral',
+                    analyzed_at=analyzed_at,
+                ))
+                continue
+            
+            score = float(bias_score[i])
+            results.append(BiasScore(
+                text_id=text_id,
+                text_type=text_type,
+                overall_bias=self._classify_bias(score),
+                bias_score=score,
+                confidence=float(confidence[i]),
+                loaded_language=self._top_terms(loaded_language[i]),
+                emotional_appeals=self._top_terms(emotional_appeals[i]),
+                objectivity_score=float(objectivity_score[i]),
+                analyzed_at=analyzed_at,
+                model_name='rule_based',
+                metadata={
+                    'left_term_count': int(left_count[i]),
+                    'right_term_count': int(right_count[i]),
+                },
+            ))
         
-        detected_solution_frames = {}
-        for frame, pattern in solution_frames.items():
-            matches = len(re.findall(pattern, text_lower, re.IGNORECASE))
-            if matches > 0:
-                detected_solution_frames[frame] = matches
+        return results
+    
+    @staticmethod
+    def _top_terms(matches: List[str], limit: int = 10) -> List[str]:
+        """
+        The most frequent distinct matches, ties broken by first occurrence.
+        """
+        return [term for term, _ in Counter(matches).most_common(limit)]
+    
+    @staticmethod
+    def _classify_bias(bias_score: float) -> str:
+        """
+        Map a bias score in [-1, 1] to an overall bias label.
+        """
+        if bias_score > 0.3:
+            return 'right'
+        elif bias_score < -0.3:
+            return 'left'
+        elif abs(bias_score) > 0.1:
+            return 'center-right' if bias_score > 0 else 'center-left'
+        else:
+            return 'neutral'
+    
+    def _count_partisan_terms(self, text_lower: str) -> tuple:
+        """
+        Count the distinct left- and right-leaning lexicon terms present in lowercased text.
+        """
+        # With lexicons this small, one C-level substring search per term beats
+        # a single-pass Aho-Corasick or regex scan that yields hits to Python
+        left_count = sum(1 for term in self.LEFT_LEANING_TERMS if term in text_lower)
+        right_count = sum(1 for term in self.RIGHT_LEANING_TERMS if term in text_lower)
+        return left_count, right_count
+    
+    def analyze_framing(self, text: str) -> Dict[str, Any]:
+        """
+        Analyze how the text frames issues (problem framing, solution framing, etc.).
+        
+        Args:
+            text: Text to analyze
+            
+        Returns:
+            Dictionary with framing analysis
+        """
+        counts = {}
+        for match in self._FRAME_RE.finditer(text):
+            counts[match.lastgroup] = counts.get(match.lastgroup, 0) + 1
         
         return {
-            'problem_frames': detected_problem_frames,
-            'solution_frames': detected_solution_frames,
+            'problem_frames': {frame: counts[frame] for frame in self.PROBLEM_FRAMES if frame in counts},
+            'solution_frames': {frame: counts[frame] for frame in self.SOLUTION_FRAMES if frame in counts},
         }
     
     def detect_rhetorical_devices(self, text: str) -> List[Dict[str, str]]:
@@ -282,21 +382,20 @@ class BiasDetector:
                 })
         
         # Parallelism (simplified detection)
-        if re.search(r'\b(not only .+ but also|either .+ or|neither .+ nor)\b', text_lower):
+        if self._PARALLELISM_RE.search(text_lower):
             devices.append({
                 'device': 'parallelism',
                 'note': 'Parallel structure detected',
             })
         
-        # Alliteration (simplified)
-        words = text_lower.split()
-        for i in range(len(words) - 2):
-            if words[i] and words[i+1] and words[i][0] == words[i+1][0]:
-                devices.append({
-                    'device': 'alliteration',
-                    'example': f"{words[i]} {words[i+1]}",
-                })
-                break
+        # Alliteration (simplified); the search stops at the first pair
+        # instead of splitting the whole text into words
+        match = self._ALLITERATION_RE.search(text_lower)
+        if match:
+            devices.append({
+                'device': 'alliteration',
+                'example': f"{match.group(1)} {match.group(3)}",
+            })
         
         return devices
 
@@ -346,4 +445,7 @@ for device in devices:
 # Quick bias detection
 quick_score = detect_political_bias("Lower taxes and less regulation will help businesses")
 print(f"Bias: {quick_score.overall_bias}")
+
+# Analyze many statements at once
+scores = detector.detect_batch([statement, "Lower taxes will help businesses"], text_ids=[123, 124])
 """
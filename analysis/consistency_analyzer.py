@@ -6,13 +6,25 @@ with stated positions for politicians.
 """
 
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass, field
 from datetime import datetime
 from collections import Counter
+from operator import attrgetter
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Sort key for putting votes in chronological order
+_by_vote_date = attrgetter('vote_date')
+
+# Below this many politicians analyze_many stays in-process; worker start-up
+# and pickling the vote records cost more than the analysis itself
+PARALLEL_MIN_PEOPLE = 64
+
 
 @dataclass
 class ConsistencyScore:
@@ -77,6 +89,104 @@ class VoteRecord:
     bill_title: Optional[str] = None
 
 
+@dataclass
+class VoteTable:
+    """
+    Vote records as parallel numpy columns for consistency analysis.
+    
+    Choices and subjects are stored as integer codes into the choices and
+    subjects lists; party_position shares the choice codes and is -1 where
+    the party position is unknown. Build with from_columns (e.g. straight
+    from a database cursor) or from_records.
+    """
+    vote_id: np.ndarray  # int64
+    bill_id: np.ndarray  # int64
+    vote_choice: np.ndarray  # int16 codes into choices
+    vote_date: np.ndarray  # datetime64[us], naive
+    subject: np.ndarray  # int32 codes into subjects ('unknown' for a missing subject)
+    party_position: np.ndarray  # int16 codes into choices, -1 if unknown
+    choices: List[str] = field(default_factory=list)
+    subjects: List[str] = field(default_factory=list)
+    
+    # Codes of the common choices are fixed, so YES and NO never need a lookup
+    BASE_CHOICES = ('yes', 'no', 'present', 'absent')
+    YES, NO = 0, 1
+    
+    def __len__(self) -> int:
+        return len(self.vote_id)
+    
+    @classmethod
+    def from_columns(
+        cls,
+        vote_id: Sequence[int],
+        bill_id: Sequence[int],
+        vote_choice: Sequence[str],
+        vote_date: Sequence[datetime],
+        bill_subject: Sequence[Optional[str]],
+        party_position: Sequence[Optional[str]],
+    ) -> 'VoteTable':
+        """
+        Build a table from one sequence per field.
+        
+        Args:
+            vote_id: Vote IDs
+            bill_id: Bill IDs
+            vote_choice: Choices ('yes', 'no', 'present', 'absent' or other)
+            vote_date: Vote dates
+            bill_subject: Bill subjects (None or '' for unknown)
+            party_position: What the party voted (None or '' for unknown)
+            
+        Returns:
+            VoteTable object
+        """
+        choice_codes = {choice: code for code, choice in enumerate(cls.BASE_CHOICES)}
+        subject_codes: Dict[str, int] = {}
+        choices = [choice_codes.setdefault(choice, len(choice_codes)) for choice in vote_choice]
+        positions = [
+            choice_codes.setdefault(position, len(choice_codes)) if position else -1
+            for position in party_position
+        ]
+        subjects = [
+            subject_codes.setdefault(subject or 'unknown', len(subject_codes))
+            for subject in bill_subject
+        ]
+        return cls(
+            vote_id=np.asarray(vote_id, dtype=np.int64),
+            bill_id=np.asarray(bill_id, dtype=np.int64),
+            vote_choice=np.asarray(choices, dtype=np.int16),
+            vote_date=np.asarray(vote_date, dtype='datetime64[us]'),
+            subject=np.asarray(subjects, dtype=np.int32),
+            party_position=np.asarray(positions, dtype=np.int16),
+            choices=list(choice_codes),
+            subjects=list(subject_codes),
+        )
+    
+    @classmethod
+    def from_records(cls, votes: List[VoteRecord]) -> 'VoteTable':
+        """Build a table from vote records (bill titles are not kept)."""
+        return cls.from_columns(
+            [v.vote_id for v in votes],
+            [v.bill_id for v in votes],
+            [v.vote_choice for v in votes],
+            [v.vote_date for v in votes],
+            [v.bill_subject for v in votes],
+            [v.party_position for v in votes],
+        )
+    
+    def take(self, rows: np.ndarray) -> 'VoteTable':
+        """The table restricted to (and reordered by) the given row indexes."""
+        return VoteTable(
+            vote_id=self.vote_id[rows],
+            bill_id=self.bill_id[rows],
+            vote_choice=self.vote_choice[rows],
+            vote_date=self.vote_date[rows],
+            subject=self.subject[rows],
+            party_position=self.party_position[rows],
+            choices=self.choices,
+            subjects=self.subjects,
+        )
+
+
 class ConsistencyAnalyzer:
     """
     Analyzer for voting consistency and position tracking.
@@ -89,7 +199,7 @@ class ConsistencyAnalyzer:
     def analyze_voting_consistency(
         self,
         person_id: int,
-        votes: List[VoteRecord],
+        votes: Union[List[VoteRecord], VoteTable],
         party: str = None,
     ) -> ConsistencyScore:
         """
@@ -97,12 +207,15 @@ class ConsistencyAnalyzer:
         
         Args:
             person_id: ID of the person to analyze
-            votes: List of vote records
+            votes: List of vote records, or a VoteTable
             party: Person's party affiliation
             
         Returns:
             ConsistencyScore object
         """
+        if isinstance(votes, VoteTable):
+            return self._analyze_vote_table(person_id, votes)
+        
         if not votes:
             logger.warning(f"No votes provided for person {person_id}")
             return ConsistencyScore(
@@ -110,8 +223,8 @@ class ConsistencyAnalyzer:
                 analyzed_at=datetime.utcnow(),
             )
         
-        # Sort votes by date
-        votes = sorted(votes, key=lambda v: v.vote_date)
+        # Sort votes by date once; the helpers below rely on this order
+        votes = sorted(votes, key=_by_vote_date)
         
         # Calculate party line voting
         party_line_votes = 0
@@ -123,14 +236,41 @@ class ConsistencyAnalyzer:
                 if vote.vote_choice == vote.party_position:
                     party_line_votes += 1
         
-        party_line_voting = party_line_votes / party_votes_total if party_votes_total > 0 else None
-        
         # Calculate issue consistency
         issue_consistency = self._calculate_issue_consistency(votes)
         
         # Detect position changes and flip-flops
         position_changes, flip_flops = self._detect_position_changes(votes)
         
+        return self._build_score(
+            person_id,
+            votes[0].vote_date,
+            votes[-1].vote_date,
+            len(votes),
+            party_line_votes,
+            party_votes_total,
+            issue_consistency,
+            position_changes,
+            flip_flops,
+        )
+    
+    def _build_score(
+        self,
+        person_id: int,
+        period_start: datetime,
+        period_end: datetime,
+        total_votes: int,
+        party_line_votes: int,
+        party_votes_total: int,
+        issue_consistency: Dict[str, float],
+        position_changes: List[Dict[str, Any]],
+        flip_flops: List[Dict[str, Any]],
+    ) -> ConsistencyScore:
+        """
+        Combine the per-factor results into a ConsistencyScore.
+        """
+        party_line_voting = party_line_votes / party_votes_total if party_votes_total > 0 else None
+        
         # Calculate overall consistency (based on various factors)
         consistency_factors = []
         if party_line_voting is not None:
@@ -142,21 +282,161 @@ class ConsistencyAnalyzer:
         
         return ConsistencyScore(
             person_id=person_id,
-            analysis_period_start=votes[0].vote_date,
-            analysis_period_end=votes[-1].vote_date,
+            analysis_period_start=period_start,
+            analysis_period_end=period_end,
             overall_consistency=overall_consistency,
             party_line_voting=party_line_voting,
             issue_consistency=issue_consistency,
             position_changes=position_changes,
             flip_flops=flip_flops,
             analyzed_at=datetime.utcnow(),
-            total_votes_analyzed=len(votes),
+            total_votes_analyzed=total_votes,
             metadata={
                 'party_line_votes': party_line_votes,
                 'party_votes_total': party_votes_total,
             },
         )
     
+    def _analyze_vote_table(self, person_id: int, table: VoteTable) -> ConsistencyScore:
+        """
+        analyze_voting_consistency over VoteTable columns.
+        
+        Gives the same score as the vote record path, with every per-vote
+        step done as a numpy operation on the columns.
+        """
+        if len(table) == 0:
+            logger.warning(f"No votes provided for person {person_id}")
+            return ConsistencyScore(
+                person_id=person_id,
+                analyzed_at=datetime.utcnow(),
+            )
+        
+        # Sort votes by date (stable, like sorted() on records)
+        table = table.take(np.argsort(table.vote_date, kind='stable'))
+        
+        # Calculate party line voting
+        known = table.party_position >= 0
+        party_votes_total = int(np.count_nonzero(known))
+        party_line_votes = int(np.count_nonzero(table.vote_choice[known] == table.party_position[known]))
+        
+        # Renumber subjects by first appearance in date order, which is the
+        # order the record path reports issues and changes in
+        present, first_rows = np.unique(table.subject, return_index=True)
+        by_appearance = present[np.argsort(first_rows)]
+        rank = np.empty(len(table.subjects), dtype=np.int32)
+        rank[by_appearance] = np.arange(len(by_appearance), dtype=np.int32)
+        subject = rank[table.subject]
+        names = [table.subjects[code] for code in by_appearance.tolist()]
+        
+        issue_consistency = self._table_issue_consistency(table, subject, names)
+        position_changes, flip_flops = self._table_position_changes(table, subject, names)
+        
+        period_start, period_end = table.vote_date[[0, -1]].tolist()
+        return self._build_score(
+            person_id,
+            period_start,
+            period_end,
+            len(table),
+            party_line_votes,
+            party_votes_total,
+            issue_consistency,
+            position_changes,
+            flip_flops,
+        )
+    
+    def _table_issue_consistency(self, table: VoteTable, subject: np.ndarray, names: List[str]) -> Dict[str, float]:
+        """
+        _calculate_issue_consistency over columns, with subjects numbered by first appearance.
+        """
+        groups = len(names)
+        totals = np.bincount(subject, minlength=groups).tolist()
+        yes = np.bincount(subject[table.vote_choice == VoteTable.YES], minlength=groups).tolist()
+        no = np.bincount(subject[table.vote_choice == VoteTable.NO], minlength=groups).tolist()
+        
+        issue_consistency = {}
+        for issue, total, yes_votes, no_votes in zip(names, totals, yes, no):
+            if total < 2 or yes_votes + no_votes == 0:
+                continue
+            issue_consistency[issue] = max(yes_votes, no_votes) / (yes_votes + no_votes)
+        
+        return issue_consistency
+    
+    def _table_position_changes(
+        self,
+        table: VoteTable,
+        subject: np.ndarray,
+        names: List[str],
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        _detect_position_changes over date-sorted columns, with subjects numbered by first appearance.
+        """
+        groups = len(names)
+        
+        # Rows grouped by subject, in date order within each group
+        grouped = np.argsort(subject, kind='stable')
+        group_start = np.searchsorted(subject[grouped], np.arange(groups))
+        
+        # The yes/no pattern of every group back to back, and each entry's
+        # position within its group's pattern
+        choice = table.vote_choice[grouped]
+        decisive = (choice == VoteTable.YES) | (choice == VoteTable.NO)
+        pattern = choice[decisive]
+        pattern_subject = subject[grouped[decisive]]
+        position = np.arange(len(pattern)) - np.searchsorted(pattern_subject, np.arange(groups))[pattern_subject]
+        
+        # changed[j] marks a change at pattern entry j + 1; a change directly
+        # followed by another is a flip-flop
+        changed = (pattern_subject[1:] == pattern_subject[:-1]) & (pattern[1:] != pattern[:-1])
+        changes = np.flatnonzero(changed) + 1
+        flips = changes[changes < len(changed)]
+        flips = flips[changed[flips]]
+        
+        # As in the record path, pattern position i is reported with the date
+        # and bill of the group's i-th vote, present/absent votes included
+        def rows(entries: np.ndarray, offset: int = 0) -> List[int]:
+            return grouped[group_start[pattern_subject[entries]] + position[entries] + offset].tolist()
+        
+        change_rows = rows(changes)
+        flip_rows = [rows(flips, -1), rows(flips), rows(flips, 1)]
+        needed = np.unique(np.concatenate([change_rows, *flip_rows]).astype(np.intp))
+        dates = dict(zip(needed.tolist(), (d.isoformat() for d in table.vote_date[needed].tolist())))
+        bill_ids = table.bill_id[change_rows].tolist()
+        choices = table.choices
+        
+        position_changes = [
+            {
+                'subject': names[g],
+                'from_position': choices[before],
+                'to_position': choices[after],
+                'date': dates[row],
+                'bill_id': bill_id,
+            }
+            for g, before, after, row, bill_id in zip(
+                pattern_subject[changes].tolist(),
+                pattern[changes - 1].tolist(),
+                pattern[changes].tolist(),
+                change_rows,
+                bill_ids,
+            )
+        ]
+        
+        flip_flops = [
+            {
+                'subject': names[g],
+                'positions': [choices[a], choices[b], choices[c]],
+                'dates': [dates[r0], dates[r1], dates[r2]],
+            }
+            for g, a, b, c, r0, r1, r2 in zip(
+                pattern_subject[flips].tolist(),
+                pattern[flips - 1].tolist(),
+                pattern[flips].tolist(),
+                pattern[flips + 1].tolist(),
+                *flip_rows,
+            )
+        ]
+        
+        return position_changes, flip_flops
+    
     def _calculate_issue_consistency(self, votes: List[VoteRecord]) -> Dict[str, float]:
         """
         Calculate consistency within specific issue areas.
@@ -167,99 +447,141 @@ class ConsistencyAnalyzer:
         Returns:
             Dictionary mapping issue to consistency score
         """
-        # Group votes by subject/issue
-        issue_votes = {}
-        for vote in votes:
-            subject = vote.bill_subject or 'unknown'
-            if subject not in issue_votes:
-                issue_votes[subject] = []
-            issue_votes[subject].append(vote)
+        # Count every (issue, choice) pair in one C-level pass; issues keep
+        # the order in which they first appear
+        pair_counts = Counter([(vote.bill_subject or 'unknown', vote.vote_choice) for vote in votes])
+        
+        # Fold into [all votes, yes, no] per issue
+        issue_tallies = {}
+        for (issue, choice), count in pair_counts.items():
+            tally = issue_tallies.get(issue)
+            if tally is None:
+                tally = issue_tallies[issue] = [0, 0, 0]
+            tally[0] += count
+            if choice == 'yes':
+                tally[1] += count
+            elif choice == 'no':
+                tally[2] += count
         
         # Calculate consistency per issue
         issue_consistency = {}
-        for issue, issue_vote_list in issue_votes.items():
-            if len(issue_vote_list) < 2:
-                continue
-            
-            # Count yes vs no votes
-            vote_choices = [v.vote_choice for v in issue_vote_list if v.vote_choice in ['yes', 'no']]
-            if not vote_choices:
+        for issue, (total, yes, no) in issue_tallies.items():
+            if total < 2 or yes + no == 0:
                 continue
             
-            # Consistency = proportion of majority position
-            counter = Counter(vote_choices)
-            majority_count = counter.most_common(1)[0][1]
-            consistency = majority_count / len(vote_choices)
-            
-            issue_consistency[issue] = consistency
+            # Consistency = proportion of majority position among yes/no votes
+            issue_consistency[issue] = max(yes, no) / (yes + no)
         
         return issue_consistency
     
     def _detect_position_changes(
         self,
         votes: List[VoteRecord],
+        votes_already_sorted: bool = True,
     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Detect position changes and flip-flops on similar bills.
         
         Args:
             votes: List of vote records
+            votes_already_sorted: Whether votes are already in chronological
+                order (as analyze_voting_consistency passes them); if False
+                they are sorted here
             
         Returns:
             Tuple of (position_changes, flip_flops)
         """
+        if not votes_already_sorted:
+            votes = sorted(votes, key=_by_vote_date)
+        
         position_changes = []
         flip_flops = []
         
-        # Group votes by bill subject
+        # Group votes by bill subject; appending keeps each group in date order
         subject_votes = {}
         for vote in votes:
-            subject = vote.bill_subject or 'unknown'
-            if subject not in subject_votes:
-                subject_votes[subject] = []
-            subject_votes[subject].append(vote)
+            subject_votes.setdefault(vote.bill_subject or 'unknown', []).append(vote)
         
         # Look for changes within each subject
         for subject, subject_vote_list in subject_votes.items():
             if len(subject_vote_list) < 2:
                 continue
             
-            # Sort by date
-            subject_vote_list = sorted(subject_vote_list, key=lambda v: v.vote_date)
-            
             # Track vote pattern
-            vote_pattern = [v.vote_choice for v in subject_vote_list if v.vote_choice in ['yes', 'no']]
+            vote_pattern = [v.vote_choice for v in subject_vote_list if v.vote_choice in ('yes', 'no')]
             
-            if not vote_pattern:
-                continue
+            # Indexes where the position differs from the previous vote
+            changes = [i for i in range(1, len(vote_pattern)) if vote_pattern[i] != vote_pattern[i-1]]
+            
+            # With only yes/no left, a change followed directly by another change
+            # returns to the original position: that pair is a flip-flop
+            last = len(vote_pattern) - 1
+            flips = [i for i in changes if i < last and vote_pattern[i+1] != vote_pattern[i]]
+            
+            # Format each date once: a flip-flop's middle and last votes are
+            # themselves changes, so only its first vote can add a new date
+            dates = {
+                i: subject_vote_list[i].vote_date.isoformat()
+                for i in {*changes, *(i - 1 for i in flips)}
+            }
             
-            # Detect changes
-            for i in range(1, len(vote_pattern)):
-                if vote_pattern[i] != vote_pattern[i-1]:
-                    change = {
-                        'subject': subject,
-                        'from_position': vote_pattern[i-1],
-                        'to_position': vote_pattern[i],
-                        'date': subject_vote_list[i].vote_date.isoformat(),
-                        'bill_id': subject_vote_list[i].bill_id,
-                    }
-                    position_changes.append(change)
-                    
-                    # Check if it's a flip-flop (change back to original position)
-                    if i + 1 < len(vote_pattern) and vote_pattern[i+1] == vote_pattern[i-1]:
-                        flip_flop = {
-                            'subject': subject,
-                            'positions': [vote_pattern[i-1], vote_pattern[i], vote_pattern[i+1]],
-                            'dates': [
-                                subject_vote_list[i-1].vote_date.isoformat(),
-                                subject_vote_list[i].vote_date.isoformat(),
-                                subject_vote_list[i+1].vote_date.isoformat(),
-                            ],
-                        }
-                        flip_flops.append(flip_flop)
+            for i in changes:
+                change = {
+                    'subject': subject,
+                    'from_position': vote_pattern[i-1],
+                    'to_position': vote_pattern[i],
+                    'date': dates[i],
+                    'bill_id': subject_vote_list[i].bill_id,
+                }
+                position_changes.append(change)
+            
+            # Flip-flops: changes back to the original position
+            for i in flips:
+                flip_flop = {
+                    'subject': subject,
+                    'positions': [vote_pattern[i-1], vote_pattern[i], vote_pattern[i+1]],
+                    'dates': [dates[i-1], dates[i], dates[i+1]],
+                }
+                flip_flops.append(flip_flop)
         
         return position_changes, flip_flops
     
+    def analyze_many(
+        self,
+        persons_votes: Dict[int, List[VoteRecord]],
+        parties: Optional[Dict[int, str]] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[int, ConsistencyScore]:
+        """
+        Analyze voting consistency for many politicians across processes.
+        
+        Each politician is analyzed independently and the work is pure-Python
+        sorting and counting that holds the GIL, so processes rather than
+        threads are used. Small batches run in-process.
+        
+        Args:
+            persons_votes: Vote records keyed by person ID
+            parties: Optional party affiliation keyed by person ID
+            max_workers: Worker processes (defaults to the CPU count)
+            
+        Returns:
+            ConsistencyScore objects keyed by person ID, in input order
+        """
+        parties = parties or {}
+        person_ids = list(persons_votes)
+        jobs = [(person_id, persons_votes[person_id], parties.get(person_id)) for person_id in person_ids]
+        
+        workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+        if workers <= 1 or len(jobs) < PARALLEL_MIN_PEOPLE:
+            scores = [self.analyze_voting_consistency(*job) for job in jobs]
+        else:
+            # Several politicians per task keeps inter-process round trips down
+            chunksize = max(1, len(jobs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                scores = list(executor.map(_analyze_job, jobs, chunksize=chunksize))
+        
+        return dict(zip(person_ids, scores))
+    
     def calculate_bipartisan_score(
         self,
         person_id: int,
@@ -311,34 +633,26 @@ class ConsistencyAnalyzer:
         Returns:
             Dictionary with comparison metrics
         """
-        # Find common votes (same bill)
-        bill_ids_1 = {v.bill_id for v in votes1}
-        bill_ids_2 = {v.bill_id for v in votes2}
-        common_bills = bill_ids_1 & bill_ids_2
+        # Build vote lookup (the last vote on a bill wins)
+        votes1_map = {v.bill_id: v.vote_choice for v in votes1}
+        votes2_map = {v.bill_id: v.vote_choice for v in votes2}
         
-        if not common_bills:
+        # Find common votes (same bill)
+        if votes1_map.keys().isdisjoint(votes2_map.keys()):
             return {
                 'agreement_rate': None,
                 'common_votes': 0,
                 'message': 'No common votes found',
             }
         
-        # Build vote lookup
-        votes1_map = {v.bill_id: v.vote_choice for v in votes1 if v.bill_id in common_bills}
-        votes2_map = {v.bill_id: v.vote_choice for v in votes2 if v.bill_id in common_bills}
+        # Only yes/no votes count towards agreement
+        decisive1 = {bill_id: choice for bill_id, choice in votes1_map.items() if choice in ('yes', 'no')}
+        decisive2 = {bill_id: choice for bill_id, choice in votes2_map.items() if choice in ('yes', 'no')}
         
-        # Calculate agreement
-        agreements = 0
-        total = 0
-        
-        for bill_id in common_bills:
-            choice1 = votes1_map.get(bill_id)
-            choice2 = votes2_map.get(bill_id)
-            
-            if choice1 and choice2 and choice1 in ['yes', 'no'] and choice2 in ['yes', 'no']:
-                total += 1
-                if choice1 == choice2:
-                    agreements += 1
+        # Calculate agreement with set operations on the dict views: shared
+        # bills are common keys, agreements are common (bill, choice) items
+        total = len(decisive1.keys() & decisive2.keys())
+        agreements = len(decisive1.items() & decisive2.items())
         
         agreement_rate = agreements / total if total > 0 else None
         
@@ -372,11 +686,16 @@ def analyze_voting_consistency(
     return analyzer.analyze_voting_consistency(person_id, votes, party)
 
 
+def _analyze_job(job: Tuple[int, List[VoteRecord], Optional[str]]) -> ConsistencyScore:
+    """Worker entry point for analyze_many; module-level so it pickles by reference."""
+    return ConsistencyAnalyzer().analyze_voting_consistency(*job)
+
+
 # Example usage
 EXAMPLE_USAGE = """
 # Example: Analyzing voting consistency
 
-from analysis.consistency_analyzer import ConsistencyAnalyzer, VoteRecord
+from analysis.consistency_analyzer import ConsistencyAnalyzer, VoteRecord, VoteTable
 from datetime import datetime
 
 # Initialize analyzer
@@ -403,4 +722,11 @@ print(f"Flip-flops: {len(score.flip_flops)}")
 votes_person2 = [...]  # Another list of votes
 comparison = analyzer.compare_politicians(1, 2, votes, votes_person2)
 print(f"Agreement rate: {comparison['agreement_rate']:.2%}")
+
+# Columnar votes (e.g. straight from a database query) analyze the same way
+table = VoteTable.from_records(votes)
+score = analyzer.analyze_voting_consistency(person_id=1, votes=table)
+
+# Analyze many politicians at once (spread across processes for large batches)
+scores = analyzer.analyze_many({1: votes, 2: votes_person2}, parties={1: 'Democrat'})
 """
@@ -6,10 +6,19 @@ vector representations of legislative text for similarity search and analysis.
 """
 
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
+import base64
+import functools
+import hashlib
+import json
 import logging
+import math
+import os
+import tempfile
 
 # Optional imports - gracefully handle if not installed
 try:
@@ -25,9 +34,125 @@ try:
 except ImportError:
     HAS_TORCH = False
 
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+    xxhash = None
+
+try:
+    import faiss
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+    faiss = None
+
 logger = logging.getLogger(__name__)
 
 
+def text_hash(text: str) -> str:
+    """
+    Stable hex digest of a text, the same in every process.
+    
+    Uses xxh3 when xxhash is installed and 64-bit BLAKE2b otherwise, so digests
+    are comparable between runs of the same installation.
+    """
+    data = text.encode('utf-8', 'surrogatepass')
+    if HAS_XXHASH:
+        return xxhash.xxh3_64_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _content_key(model_name: str, text: str) -> str:
+    """
+    128-bit key for an embedding on disk; the model name is part of it so a
+    different or upgraded model never reads another model's vectors.
+    """
+    data = f"{model_name}|{text}".encode('utf-8', 'surrogatepass')
+    if HAS_XXHASH:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@functools.lru_cache(maxsize=4)
+def _shared_model(model_name: str, device: str, backend: str, half_precision: bool):
+    """
+    Load a SentenceTransformer once per process for each configuration.
+    
+    Loading takes seconds and hundreds of MB, so generators with the same
+    settings (and repeated create_embeddings calls) share one model.
+    """
+    if backend == 'torch':
+        model = SentenceTransformer(model_name, device=device)
+    else:
+        model = SentenceTransformer(model_name, device=device, backend=backend)
+    if half_precision:
+        model.half()
+    return model
+
+
+def _normalized_rows(vectors: List[np.ndarray]) -> np.ndarray:
+    """
+    Stack vectors into an (n, d) float32 matrix with unit-length rows.
+    
+    All-zero vectors stay zero, so their cosine similarity with anything is 0,
+    matching EmbeddingsGenerator.compute_similarity.
+    """
+    matrix = np.stack(vectors).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+    return matrix
+
+
+def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Row indexes of the top_k scores, highest first, ties kept in row order.
+    """
+    n = len(scores)
+    if 0 < top_k < n:
+        # Partition out the k best, then widen to every score tied with the
+        # k-th so the stable sort below breaks ties by position
+        kth = scores[np.argpartition(-scores, top_k - 1)[:top_k]].min()
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(n)
+    
+    # Sort by similarity (descending) and return top k
+    return candidates[np.argsort(-scores[candidates], kind='stable')][:top_k]
+
+
+def _vector_to_dict(vector: Optional[np.ndarray]) -> Dict[str, Any]:
+    """
+    Serialize a vector as base64 of its raw little-endian bytes.
+    
+    One memcpy instead of one Python float per component, and the vector's own
+    dtype is kept, so the round trip is exact.
+    """
+    if vector is None:
+        return {'embedding_vector_b64': None, 'embedding_dtype': None, 'embedding_dim': None}
+    little_endian = vector.dtype.newbyteorder('<')
+    return {
+        'embedding_vector_b64': base64.b64encode(
+            np.ascontiguousarray(vector, dtype=little_endian).tobytes()
+        ).decode('ascii'),
+        'embedding_dtype': vector.dtype.name,
+        'embedding_dim': int(vector.shape[0]),
+    }
+
+
+def _vector_from_dict(data: Dict[str, Any]) -> Optional[np.ndarray]:
+    """
+    Read a vector written by _vector_to_dict, or a legacy 'embedding_vector' list.
+    """
+    if data.get('embedding_vector_b64') is not None:
+        dtype = np.dtype(data['embedding_dtype'])
+        raw = base64.b64decode(data['embedding_vector_b64'])
+        return np.frombuffer(raw, dtype=dtype.newbyteorder('<')).astype(dtype)
+    if data.get('embedding_vector') is not None:
+        return np.array(data['embedding_vector'])
+    return None
+
+
 @dataclass
 class BillEmbeddings:
     """
@@ -45,7 +170,7 @@ class BillEmbeddings:
         return {
             'bill_id': self.bill_id,
             'model_name': self.model_name,
-            'embedding_vector': self.embedding_vector.tolist(),
+            **_vector_to_dict(self.embedding_vector),
             'text_hash': self.text_hash,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'metadata': self.metadata,
@@ -57,7 +182,7 @@ class BillEmbeddings:
         return cls(
             bill_id=data['bill_id'],
             model_name=data['model_name'],
-            embedding_vector=np.array(data['embedding_vector']),
+            embedding_vector=_vector_from_dict(data),
             text_hash=data.get('text_hash'),
             created_at=datetime.fromisoformat(data['created_at']) if data.get('created_at') else None,
             metadata=data.get('metadata', {}),
@@ -83,11 +208,283 @@ class SpeechEmbeddings:
             'person_id': self.person_id,
             'speech_id': self.speech_id,
             'model_name': self.model_name,
-            'embedding_vector': self.embedding_vector.tolist() if self.embedding_vector is not None else None,
+            **_vector_to_dict(self.embedding_vector),
             'text_hash': self.text_hash,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'metadata': self.metadata,
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SpeechEmbeddings':
+        """Create from dictionary."""
+        return cls(
+            person_id=data['person_id'],
+            speech_id=data.get('speech_id'),
+            model_name=data.get('model_name'),
+            embedding_vector=_vector_from_dict(data),
+            text_hash=data.get('text_hash'),
+            created_at=datetime.fromisoformat(data['created_at']) if data.get('created_at') else None,
+            metadata=data.get('metadata', {}),
+        )
+
+
+class BillEmbeddingStore:
+    """
+    Bill embeddings in one contiguous (n, d) matrix for similarity search.
+    
+    Rows are normalized to unit length when added, so a similarity search is a
+    single matrix-vector product over contiguous memory instead of a walk over
+    BillEmbeddings objects. Bill IDs live in a parallel int64 array and
+    everything else in a list of plain dicts alongside.
+    
+    With faiss installed, build_index() replaces the numpy scan with a faiss
+    index: 'flat' is still exact, 'hnsw' is approximate but sub-linear.
+    
+    Given a path, the rows and IDs live in memory-mapped .npy files in that
+    directory, so the OS pages them in and out and corpora larger than RAM
+    can be searched; save() and open() persist the store between runs.
+    """
+    
+    INDEX_KINDS = ('flat', 'hnsw')
+    
+    # Rows scored per matrix product; bounds the float32 copy of half-precision
+    # or on-disk rows made while searching
+    SEARCH_ROW_BLOCK = 1 << 14
+    
+    def __init__(self, dim: int, dtype: str = 'float32', capacity: int = 1024, path: Optional[str] = None):
+        """
+        Initialize an empty store.
+        
+        Args:
+            dim: Embedding dimension
+            dtype: Row precision; 'float16' halves memory and is upcast per search
+            capacity: Rows preallocated before the first growth
+            path: Directory for memory-mapped storage (None keeps rows in RAM);
+                an existing store there is overwritten, use open() to load it
+        """
+        if dtype not in EmbeddingsGenerator.STORAGE_DTYPES:
+            raise ValueError(f"dtype must be one of {EmbeddingsGenerator.STORAGE_DTYPES}, got {dtype!r}")
+        self.dim = dim
+        self.path = Path(path).expanduser() if path else None
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # A header left by an earlier store would not describe the new files
+            (self.path / 'store.json').unlink(missing_ok=True)
+        self._matrix, self._bill_ids = self._allocate(max(capacity, 1), np.dtype(dtype))
+        self._size = 0
+        self._index = None
+        self.meta: List[Dict[str, Any]] = []
+    
+    @classmethod
+    def open(cls, path: str) -> 'BillEmbeddingStore':
+        """
+        Open a store written by save(), memory-mapping its rows.
+        
+        Args:
+            path: Directory the store was created with
+            
+        Returns:
+            BillEmbeddingStore appending to and searching the files in path
+        """
+        path = Path(path).expanduser()
+        with open(path / 'store.json', 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        
+        store = cls(header['dim'], dtype=header['dtype'], capacity=1)
+        store.path = path
+        store._matrix = np.lib.format.open_memmap(path / 'matrix.npy', mode='r+')
+        store._bill_ids = np.lib.format.open_memmap(path / 'bill_ids.npy', mode='r+')
+        store._size = header['size']
+        store.meta = [
+            {**meta, 'created_at': datetime.fromisoformat(meta['created_at']) if meta['created_at'] else None}
+            for meta in header['meta']
+        ]
+        return store
+    
+    def save(self):
+        """Flush the memory-mapped rows and write the row count and metadata beside them."""
+        if self.path is None:
+            raise ValueError("save() needs a store created with a path")
+        self._matrix.flush()
+        self._bill_ids.flush()
+        header = {
+            'dim': self.dim,
+            'dtype': self._matrix.dtype.name,
+            'size': self._size,
+            'meta': [
+                {**meta, 'created_at': meta['created_at'].isoformat() if meta['created_at'] else None}
+                for meta in self.meta
+            ],
+        }
+        # Written to a temporary file and renamed, so a crash never leaves a torn header
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(header, f)
+            os.replace(tmp, self.path / 'store.json')
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    
+    def _allocate(self, capacity: int, dtype: np.dtype) -> Tuple[np.ndarray, np.ndarray]:
+        """Row and ID arrays for capacity rows, memory-mapped when the store has a path."""
+        if self.path is None:
+            return np.empty((capacity, self.dim), dtype=dtype), np.empty(capacity, dtype=np.int64)
+        
+        # Build under temporary names and rename into place; an existing
+        # mapping keeps reading the old file until it is released
+        arrays = []
+        for name, shape, array_dtype in (
+            ('matrix.npy', (capacity, self.dim), dtype),
+            ('bill_ids.npy', (capacity,), np.dtype(np.int64)),
+        ):
+            tmp = self.path / f"{name}.tmp"
+            arrays.append((np.lib.format.open_memmap(tmp, mode='w+', dtype=array_dtype, shape=shape), tmp, name))
+        for array, tmp, name in arrays:
+            os.replace(tmp, self.path / name)
+        return arrays[0][0], arrays[1][0]
+    
+    @classmethod
+    def from_embeddings(cls, bill_embeddings: List[BillEmbeddings], dtype: str = 'float32') -> 'BillEmbeddingStore':
+        """Build a store from a list of bill embeddings (which must not be empty)."""
+        store = cls(len(bill_embeddings[0].embedding_vector), dtype=dtype, capacity=len(bill_embeddings))
+        store.extend(bill_embeddings)
+        return store
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """Unit-length rows, one per bill (a view; do not modify)."""
+        return self._matrix[:self._size]
+    
+    @property
+    def bill_ids(self) -> np.ndarray:
+        """Bill ID of each row (a view; do not modify)."""
+        return self._bill_ids[:self._size]
+    
+    def add(self, embedding: BillEmbeddings):
+        """Append one bill embedding."""
+        self.extend([embedding])
+    
+    def extend(self, bill_embeddings: List[BillEmbeddings]):
+        """Append bill embeddings, growing the preallocated arrays geometrically."""
+        if not bill_embeddings:
+            return
+        rows = _normalized_rows([emb.embedding_vector for emb in bill_embeddings])
+        if rows.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {rows.shape[1]}")
+        
+        start, end = self._size, self._size + len(rows)
+        if end > len(self._bill_ids):
+            capacity = max(end, 2 * len(self._bill_ids))
+            matrix, bill_ids = self._allocate(capacity, self._matrix.dtype)
+            matrix[:start] = self._matrix[:start]
+            bill_ids[:start] = self._bill_ids[:start]
+            self._matrix, self._bill_ids = matrix, bill_ids
+        
+        self._matrix[start:end] = rows
+        self._bill_ids[start:end] = [emb.bill_id for emb in bill_embeddings]
+        if self._index is not None:
+            self._index.add(rows)
+        self.meta.extend(
+            {
+                'model_name': emb.model_name,
+                'text_hash': emb.text_hash,
+                'created_at': emb.created_at,
+                'metadata': emb.metadata,
+            }
+            for emb in bill_embeddings
+        )
+        self._size = end
+    
+    def build_index(self, kind: str = 'hnsw', hnsw_m: int = 32, ef_search: int = 64):
+        """
+        Index the stored rows with faiss; later additions are indexed as well.
+        
+        Args:
+            kind: 'flat' for exact inner-product search, 'hnsw' for approximate
+                graph search that stays fast as the corpus grows
+            hnsw_m: Neighbors per HNSW graph node (more is more accurate and larger)
+            ef_search: HNSW candidate list size per query (more is more accurate and slower)
+        """
+        if kind not in self.INDEX_KINDS:
+            raise ValueError(f"kind must be one of {self.INDEX_KINDS}, got {kind!r}")
+        if not HAS_FAISS:
+            raise ImportError("faiss not installed. Install with: pip install faiss-cpu")
+        
+        # Rows are unit length, so inner product is cosine similarity
+        if kind == 'flat':
+            index = faiss.IndexFlatIP(self.dim)
+        else:
+            index = faiss.IndexHNSWFlat(self.dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efSearch = ef_search
+        for start in range(0, self._size, self.SEARCH_ROW_BLOCK):
+            rows = self._matrix[start:min(start + self.SEARCH_ROW_BLOCK, self._size)]
+            index.add(np.ascontiguousarray(rows, dtype=np.float32))
+        self._index = index
+    
+    def search(self, query_embedding: np.ndarray, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Find the bills most similar to a query embedding.
+        
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of top results to return
+            
+        Returns:
+            List of (bill_id, similarity_score) tuples, sorted by similarity
+        """
+        return self.search_many([query_embedding], top_k=top_k)[0]
+    
+    def search_many(self, query_embeddings, top_k: int = 10) -> List[List[Tuple[int, float]]]:
+        """
+        Find the bills most similar to each of several query embeddings.
+        
+        Scores for a block of queries come from one matrix-matrix product, so
+        per-query overhead is paid once per block instead of once per query.
+        
+        Args:
+            query_embeddings: Query vectors, as a list or an (m, d) array
+            top_k: Number of top results to return per query
+            
+        Returns:
+            One list of (bill_id, similarity_score) tuples per query, sorted by similarity
+        """
+        if len(query_embeddings) == 0:
+            return []
+        if self._size == 0:
+            return [[] for _ in range(len(query_embeddings))]
+        queries = _normalized_rows(list(query_embeddings))
+        
+        if self._index is not None and top_k > 0:
+            scores, rows = self._index.search(queries, min(top_k, self._size))
+            # HNSW pads with -1 when it finds fewer than k neighbors
+            return [
+                [(int(self._bill_ids[i]), float(score)) for score, i in zip(query_scores, query_rows) if i >= 0]
+                for query_scores, query_rows in zip(scores, rows)
+            ]
+        
+        # Score queries in blocks of about 16M floats so memory stays bounded
+        block = max(1, (1 << 24) // self._size)
+        results = []
+        for start in range(0, len(queries), block):
+            for scores in self._scores(queries[start:start + block]):
+                results.append([(int(self._bill_ids[i]), float(scores[i])) for i in _top_k(scores, top_k)])
+        return results
+    
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Similarity of each unit query row to every stored row, shape (m, n)."""
+        scores = np.empty((len(queries), self._size), dtype=np.float32)
+        for start in range(0, self._size, self.SEARCH_ROW_BLOCK):
+            end = min(start + self.SEARCH_ROW_BLOCK, self._size)
+            scores[:, start:end] = queries @ self._matrix[start:end].astype(np.float32, copy=False).T
+        return scores
+    
+    def similarity_matrix(self) -> np.ndarray:
+        """Pairwise cosine similarity of all stored bills, shape (n, n)."""
+        return self._scores(self.matrix.astype(np.float32))
 
 
 class EmbeddingsGenerator:
@@ -98,14 +495,43 @@ class EmbeddingsGenerator:
     DEFAULT_MODEL = 'all-MiniLM-L6-v2'  # Fast and efficient
     LEGAL_MODEL = 'nlpaueb/legal-bert-base-uncased'  # Specialized for legal text
     
-    def __init__(self, model_name: str = None, device: str = None):
+    # Precisions bill vectors can be stored in; similarity math always runs in at least float32
+    STORAGE_DTYPES = ('float32', 'float16')
+    
+    # Inference runtimes; 'onnx' and 'openvino' need sentence-transformers>=3.2 with
+    # optimum[onnxruntime] / optimum[openvino] and are usually 2-3x faster on CPU
+    BACKENDS = ('torch', 'onnx', 'openvino')
+    
+    def __init__(
+        self,
+        model_name: str = None,
+        device: str = None,
+        cache_size: int = 10000,
+        storage_dtype: str = 'float32',
+        backend: str = 'torch',
+        cache_dir: Optional[str] = None,
+        half_precision: Optional[bool] = None,
+    ):
         """
         Initialize embeddings generator.
         
         Args:
             model_name: Name of the sentence transformer model to use
             device: Device to run on ('cuda', 'cpu', or None for auto-detect)
+            cache_size: Number of bill embeddings kept in memory by text hash (0 disables)
+            storage_dtype: Precision of stored bill vectors; 'float16' halves their memory
+            backend: Inference runtime ('torch', 'onnx' or 'openvino'); falls back to
+                'torch' if the model cannot be loaded with it
+            cache_dir: Directory that keeps bill embeddings across runs, e.g.
+                '~/.cache/opengovt/embeddings' (None keeps them in memory only)
+            half_precision: Run the torch model in float16, which roughly doubles
+                GPU throughput on tensor cores (None enables it with torch on CUDA)
         """
+        if storage_dtype not in self.STORAGE_DTYPES:
+            raise ValueError(f"storage_dtype must be one of {self.STORAGE_DTYPES}, got {storage_dtype!r}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend must be one of {self.BACKENDS}, got {backend!r}")
+        
         if not HAS_SENTENCE_TRANSFORMERS:
             raise ImportError(
                 "sentence-transformers not installed. "
@@ -122,15 +548,56 @@ class EmbeddingsGenerator:
                 device = 'cpu'
         
         self.device = device
-        logger.info(f"Loading embedding model: {self.model_name} on {self.device}")
+        self.backend = backend
+        # Only the torch runtime on a GPU benefits; CPU float16 kernels are slow or missing
+        half_capable = str(device).startswith('cuda') and backend == 'torch'
+        if half_precision and not half_capable:
+            logger.warning("half_precision needs a CUDA device and the torch backend; running in float32")
+        self.half_precision = half_capable if half_precision is None else bool(half_precision and half_capable)
+        self.storage_dtype = np.dtype(storage_dtype)
+        
+        # Least recently used bill embeddings by text hash; vectors are shared
+        # with the BillEmbeddings returned, so treat them as read-only
+        self.cache_size = cache_size
+        self._embedding_cache: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        
+        # Normalized matrix for the last list passed to find_similar_bills
+        self._bill_source: Optional[List[BillEmbeddings]] = None
+        self._bill_count = 0
+        self._bill_matrix: Optional[np.ndarray] = None
+        self._bill_ids: List[int] = []
+        
+        logger.info(
+            f"Loading embedding model: {self.model_name} on {self.device} ({self.backend}"
+            f"{', float16' if self.half_precision else ''})"
+        )
         
         try:
-            self.model = SentenceTransformer(self.model_name, device=self.device)
+            self.model = self._load_model(self.model_name)
         except Exception as e:
             logger.error(f"Failed to load model {self.model_name}: {e}")
             logger.info(f"Falling back to default model: {self.DEFAULT_MODEL}")
             self.model_name = self.DEFAULT_MODEL
-            self.model = SentenceTransformer(self.model_name, device=self.device)
+            self.model = self._load_model(self.model_name)
+    
+    def _load_model(self, model_name: str):
+        """
+        Load a SentenceTransformer on the configured backend, falling back to torch.
+        
+        The ONNX and OpenVINO runtimes reuse the model's own pooling, normalization
+        and max sequence length, so encode() returns the same kind of vectors.
+        Models are shared between generators with the same settings, so treat
+        self.model as read-only.
+        """
+        if self.backend != 'torch':
+            try:
+                return _shared_model(model_name, self.device, self.backend, False)
+            except Exception as e:
+                logger.warning(f"Could not load {model_name} with the {self.backend} backend: {e}")
+                logger.info("Falling back to the torch backend")
+                self.backend = 'torch'
+        return _shared_model(model_name, self.device, 'torch', self.half_precision)
     
     def encode(self, texts: List[str], batch_size: int = 32, show_progress: bool = False) -> np.ndarray:
         """
@@ -154,7 +621,8 @@ class EmbeddingsGenerator:
             convert_to_numpy=True,
         )
         
-        return embeddings
+        # A float16 model still hands callers float32 vectors
+        return embeddings.astype(np.float32, copy=False)
     
     def encode_bill(self, bill_text: str, bill_id: int, metadata: Dict[str, Any] = None) -> BillEmbeddings:
         """
@@ -174,13 +642,16 @@ class EmbeddingsGenerator:
             logger.warning(f"Bill {bill_id} text truncated from {len(bill_text)} to {max_length} chars")
             bill_text = bill_text[:max_length]
         
-        embedding = self.encode([bill_text])[0]
+        bill_hash = text_hash(bill_text)
+        embedding = self._cached_embedding(bill_hash, bill_text)
+        if embedding is None:
+            embedding = self._store_embedding(bill_hash, bill_text, self.encode([bill_text])[0])
         
         return BillEmbeddings(
             bill_id=bill_id,
             model_name=self.model_name,
             embedding_vector=embedding,
-            text_hash=str(hash(bill_text)),
+            text_hash=bill_hash,
             created_at=datetime.utcnow(),
             metadata=metadata or {},
         )
@@ -197,20 +668,102 @@ class EmbeddingsGenerator:
             List of BillEmbeddings objects
         """
         texts = [text[:5000] for _, text in bills]  # Truncate long texts
-        embeddings = self.encode(texts, batch_size=batch_size, show_progress=True)
+        # Hash what the model actually sees, so bills differing only past the cut share an entry
+        hashes = [text_hash(text) for text in texts]
+        
+        # Only texts missing from the caches go through the model, each distinct
+        # text once; boilerplate shared by many bills is encoded a single time
+        embeddings = [self._cached_embedding(h, text) for h, text in zip(hashes, texts)]
+        pending: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                pending.setdefault(hashes[i], []).append(i)
+        if pending:
+            firsts = [positions[0] for positions in pending.values()]
+            encoded = self.encode([texts[i] for i in firsts], batch_size=batch_size, show_progress=True)
+            for positions, embedding in zip(pending.values(), encoded):
+                embedding = self._store_embedding(hashes[positions[0]], texts[positions[0]], embedding)
+                for i in positions:
+                    embeddings[i] = embedding
         
         results = []
-        for (bill_id, text), embedding in zip(bills, embeddings):
+        for (bill_id, _), embedding, bill_hash in zip(bills, embeddings, hashes):
             results.append(BillEmbeddings(
                 bill_id=bill_id,
                 model_name=self.model_name,
                 embedding_vector=embedding,
-                text_hash=str(hash(text)),
+                text_hash=bill_hash,
                 created_at=datetime.utcnow(),
             ))
         
         return results
     
+    def _cached_embedding(self, key: str, text: str) -> Optional[np.ndarray]:
+        """
+        Look up an embedding in memory, then on disk, marking it as recently used.
+        """
+        embedding = self._embedding_cache.get(key)
+        if embedding is not None:
+            self._embedding_cache.move_to_end(key)
+            return embedding
+        
+        if self.cache_dir is None:
+            return None
+        try:
+            embedding = np.load(self._disk_cache_path(text)).astype(self.storage_dtype, copy=False)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable embedding cache entry: {e}")
+            return None
+        self._remember_embedding(key, embedding)
+        return embedding
+    
+    def _store_embedding(self, key: str, text: str, embedding: np.ndarray) -> np.ndarray:
+        """
+        Cache a freshly encoded embedding and return it in the storage precision.
+        
+        The disk copy keeps the model's full precision, so generators with a
+        different storage_dtype can share a cache directory.
+        """
+        if self.cache_dir is not None:
+            path = self._disk_cache_path(text)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Written under a temporary name and renamed, so readers never see half a file
+                fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        np.save(f, embedding)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            except OSError as e:
+                logger.warning(f"Could not write embedding cache entry {path}: {e}")
+        
+        embedding = embedding.astype(self.storage_dtype, copy=False)
+        self._remember_embedding(key, embedding)
+        return embedding
+    
+    def _disk_cache_path(self, text: str) -> Path:
+        """
+        Location of a text's embedding under cache_dir/<model>/.
+        """
+        key = _content_key(self.model_name, text)
+        return self.cache_dir / self.model_name.replace('/', '--') / key[:2] / f"{key}.npy"
+    
+    def _remember_embedding(self, key: str, embedding: np.ndarray):
+        """
+        Cache an embedding, evicting the least recently used beyond cache_size.
+        """
+        if self.cache_size <= 0:
+            return
+        self._embedding_cache[key] = embedding
+        self._embedding_cache.move_to_end(key)
+        while len(self._embedding_cache) > self.cache_size:
+            self._embedding_cache.popitem(last=False)
+    
     def compute_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """
         Compute cosine similarity between two embeddings.
@@ -222,22 +775,25 @@ class EmbeddingsGenerator:
         Returns:
             Cosine similarity score (0 to 1)
         """
-        # Normalize vectors
-        norm1 = np.linalg.norm(embedding1)
-        norm2 = np.linalg.norm(embedding2)
+        # Half-precision storage is upcast so the dot product neither overflows nor loses digits
+        embedding1, embedding2 = np.asarray(embedding1), np.asarray(embedding2)
+        embedding1 = embedding1.astype(np.result_type(embedding1, np.float32), copy=False)
+        embedding2 = embedding2.astype(np.result_type(embedding2, np.float32), copy=False)
+        
+        # Squared norms come from the same BLAS dot as the product, and one
+        # square root of their product replaces two separate norm passes
+        squared_norms = float(np.dot(embedding1, embedding1)) * float(np.dot(embedding2, embedding2))
         
-        if norm1 == 0 or norm2 == 0:
+        if squared_norms == 0:
             return 0.0
         
         # Cosine similarity
-        similarity = np.dot(embedding1, embedding2) / (norm1 * norm2)
-        
-        return float(similarity)
+        return float(np.dot(embedding1, embedding2)) / math.sqrt(squared_norms)
     
     def find_similar_bills(
         self,
         query_embedding: np.ndarray,
-        bill_embeddings: List[BillEmbeddings],
+        bill_embeddings: Union[List[BillEmbeddings], BillEmbeddingStore],
         top_k: int = 10,
     ) -> List[Tuple[int, float]]:
         """
@@ -245,21 +801,34 @@ class EmbeddingsGenerator:
         
         Args:
             query_embedding: Query embedding vector
-            bill_embeddings: List of bill embeddings to search
+            bill_embeddings: List of bill embeddings, or a BillEmbeddingStore, to search
             top_k: Number of top results to return
             
         Returns:
             List of (bill_id, similarity_score) tuples, sorted by similarity
+        
+        Note:
+            The normalized bill matrix is reused while the same list is passed
+            with the same length; pass a new list after replacing entries in place.
+            A BillEmbeddingStore is searched directly.
         """
-        similarities = []
+        if isinstance(bill_embeddings, BillEmbeddingStore):
+            return bill_embeddings.search(query_embedding, top_k=top_k)
+        
+        n = len(bill_embeddings)
+        if n == 0:
+            return []
         
-        for bill_emb in bill_embeddings:
-            similarity = self.compute_similarity(query_embedding, bill_emb.embedding_vector)
-            similarities.append((bill_emb.bill_id, similarity))
+        if bill_embeddings is not self._bill_source or n != self._bill_count:
+            self._bill_matrix = _normalized_rows([emb.embedding_vector for emb in bill_embeddings])
+            self._bill_ids = [emb.bill_id for emb in bill_embeddings]
+            self._bill_source = bill_embeddings
+            self._bill_count = n
         
-        # Sort by similarity (descending) and return top k
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:top_k]
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self._bill_matrix @ query
+        return [(self._bill_ids[i], float(scores[i])) for i in _top_k(scores, top_k)]
 
 
 def create_embeddings(
@@ -282,42 +851,40 @@ def create_embeddings(
     return generator.encode(texts, batch_size=batch_size)
 
 
-def compute_bill_similarity_matrix(bill_embeddings: List[BillEmbeddings]) -> np.ndarray:
+def compute_bill_similarity_matrix(
+    bill_embeddings: Union[List[BillEmbeddings], BillEmbeddingStore],
+) -> np.ndarray:
     """
     Compute pairwise similarity matrix for all bills.
     
     Args:
-        bill_embeddings: List of bill embeddings
+        bill_embeddings: List of bill embeddings, or a BillEmbeddingStore
         
     Returns:
         Similarity matrix of shape (n_bills, n_bills)
     """
-    n = len(bill_embeddings)
-    similarity_matrix = np.zeros((n, n))
-    
-    generator = EmbeddingsGenerator()
+    if isinstance(bill_embeddings, BillEmbeddingStore):
+        return bill_embeddings.similarity_matrix()
+    if not bill_embeddings:
+        return np.zeros((0, 0), dtype=np.float32)
     
-    for i in range(n):
-        for j in range(i, n):
-            sim = generator.compute_similarity(
-                bill_embeddings[i].embedding_vector,
-                bill_embeddings[j].embedding_vector,
-            )
-            similarity_matrix[i, j] = sim
-            similarity_matrix[j, i] = sim  # Symmetric
-    
-    return similarity_matrix
+    # Cosine similarity of every pair at once: one matrix product of unit rows
+    matrix = _normalized_rows([emb.embedding_vector for emb in bill_embeddings])
+    return matrix @ matrix.T
 
 
 # Example usage and documentation
 EXAMPLE_USAGE = """
 # Example: Creating embeddings for bills
 
-from analysis.embeddings import EmbeddingsGenerator, create_embeddings
+from analysis.embeddings import EmbeddingsGenerator, BillEmbeddingStore, create_embeddings
 
 # Initialize generator
 generator = EmbeddingsGenerator(model_name='all-MiniLM-L6-v2')
 
+# Or keep embeddings on disk so unchanged bills are not re-encoded next run
+generator = EmbeddingsGenerator(cache_dir='~/.cache/opengovt/embeddings')
+
 # Encode a single bill
 bill_text = "A bill to provide healthcare..."
 bill_embedding = generator.encode_bill(bill_text, bill_id=123)
@@ -333,6 +900,23 @@ similar_bills = generator.find_similar_bills(query_embedding, embeddings, top_k=
 for bill_id, similarity in similar_bills:
     print(f"Bill {bill_id}: similarity={similarity:.3f}")
 
+# For large corpora keep the vectors in one contiguous matrix and search that
+store = BillEmbeddingStore.from_embeddings(embeddings)
+similar_bills = generator.find_similar_bills(query_embedding, store, top_k=5)
+
+# Many queries at once share one matrix product
+neighbors = store.search_many([e.embedding_vector for e in embeddings], top_k=5)
+
+# Or memory-map the rows from disk, for corpora larger than RAM
+store = BillEmbeddingStore(384, dtype='float16', path='~/.cache/opengovt/bill-store')
+store.extend(embeddings)
+store.save()
+store = BillEmbeddingStore.open('~/.cache/opengovt/bill-store')
+
+# With faiss installed, an HNSW index keeps search fast on very large corpora
+store.build_index('hnsw')
+similar_bills = store.search(query_embedding, top_k=5)
+
 # Quick embeddings without class
 texts = ["Text 1", "Text 2", "Text 3"]
 embeddings_array = create_embeddings(texts)
@@ -0,0 +1,163 @@
+"""
+Fast regex entity extraction for ingestion.
+
+Running a full spaCy pipeline over every ingested document dominates ingest
+time when all that is stored is a coarse sketch of who and what a text
+mentions. This module finds the entities that matter most for legislative
+text (legislators, bills and laws, states, dates) with precompiled regular
+expressions, and leaves full NLP for query-time analysis.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional
+
+from .nlp_processor import Entity
+
+logger = logging.getLogger(__name__)
+
+STATE_NAMES = (
+    'Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California', 'Colorado', 'Connecticut',
+    'Delaware', 'Florida', 'Georgia', 'Hawaii', 'Idaho', 'Illinois', 'Indiana', 'Iowa',
+    'Kansas', 'Kentucky', 'Louisiana', 'Maine', 'Maryland', 'Massachusetts', 'Michigan',
+    'Minnesota', 'Mississippi', 'Missouri', 'Montana', 'Nebraska', 'Nevada', 'New Hampshire',
+    'New Jersey', 'New Mexico', 'New York', 'North Carolina', 'North Dakota', 'Ohio',
+    'Oklahoma', 'Oregon', 'Pennsylvania', 'Rhode Island', 'South Carolina', 'South Dakota',
+    'Tennessee', 'Texas', 'Utah', 'Vermont', 'Virginia', 'Washington', 'West Virginia',
+    'Wisconsin', 'Wyoming', 'District of Columbia', 'Puerto Rico', 'Guam', 'American Samoa',
+    'Northern Mariana Islands', 'Virgin Islands',
+)
+
+STATE_CODES = frozenset((
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA',
+    'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+    'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT',
+    'VA', 'WA', 'WV', 'WI', 'WY', 'DC', 'PR', 'GU', 'AS', 'MP', 'VI',
+))
+
+_MONTHS = (
+    r'(?:January|February|March|April|May|June|July|August|September|October|November|December'
+    r'|Jan\.|Feb\.|Mar\.|Apr\.|Jun\.|Jul\.|Aug\.|Sept?\.|Oct\.|Nov\.|Dec\.)'
+)
+
+_TITLES = (
+    r'(?:Vice\s+President|President|Senator|Sen\.|Representative|Rep\.|Congressman'
+    r'|Congresswoman|Delegate|Del\.|Speaker|Leader|Secretary|Governor|Gov\.|Mr\.|Mrs\.|Ms\.|Dr\.)'
+)
+# Offices that follow a title as a form of address ('Mr. Speaker') rather than a name
+_NOT_NAMES = r"(?!(?:Speaker|Leader|President|Chairman|Chairwoman|Chair)\b)"
+_NAME_WORD = r"[A-Z][a-zA-Z'\-]+"
+
+# Words that introduce a reference to an act ('An Act', 'This Act') but are not part of its name
+_NOT_ACT_NAME = r"(?!(?:An?|The|This|That|Such|Each|Said|Any)\s)"
+
+# (label, pattern, group holding the entity text)
+PATTERNS = (
+    # A title followed by up to three capitalized name words; the title is not part of the name
+    ('PERSON', re.compile(
+        rf"\b{_TITLES}\s+(?P<name>{_NOT_NAMES}{_NAME_WORD}(?:\s+(?:[A-Z]\.\s+)?{_NAME_WORD}){{0,2}})"
+    ), 'name'),
+    # Bill and resolution numbers, public laws and U.S. Code citations
+    ('LAW', re.compile(
+        r"(?<![\w.])(?:H\.?\s?R\.?|H\.\s?(?:J\.\s?|Con\.\s?)?Res\.|S\.\s?(?:J\.\s?|Con\.\s?)?Res\.|S\.)\s?\d+\b"
+        r"|\b(?:Public\s+Law|Pub\.\s?L\.|P\.\s?L\.)\s?(?:No\.\s?)?\d+[-–]\d+\b"
+        r"|\b\d+\s+U\.S\.C\.\s+\d+[a-z]?\b"
+    ), 0),
+    # Named acts, e.g. 'Infrastructure Investment and Jobs Act of 2021'
+    ('LAW', re.compile(
+        rf"\b(?:{_NOT_ACT_NAME}[A-Z][\w'\-]*\s+(?:(?:and|of|for|the|to|on|in)\s+)?){{1,10}}Act\b(?:\s+of\s+\d{{4}})?"
+    ), 0),
+    # Full state names, and state codes in party-state tags such as '(D-CA)'
+    ('GPE', re.compile(r"\b(?:" + '|'.join(sorted(STATE_NAMES, key=len, reverse=True)) + r")\b"), 0),
+    ('GPE', re.compile(r"\b[RDI]-(?P<state>[A-Z]{2})\b"), 'state'),
+    ('DATE', re.compile(rf"\b{_MONTHS}\s+\d{{1,2}},\s+\d{{4}}\b"), 0),
+)
+
+
+class IngestEntityExtractor:
+    """
+    Regex-based entity extractor for the ingest path.
+
+    Returns the same Entity objects as NLPProcessor, with non-overlapping
+    spans in text order, at a small fraction of a spaCy pipeline's cost.
+    """
+
+    MODEL_NAME = 'regex-v1'
+    LABELS = ('PERSON', 'LAW', 'GPE', 'DATE')
+
+    def __init__(self, labels: Optional[List[str]] = None):
+        """
+        Initialize extractor.
+
+        Args:
+            labels: Entity labels to extract (default: all of LABELS)
+        """
+        labels = set(labels or self.LABELS)
+        self.patterns = [(label, pattern, group) for label, pattern, group in PATTERNS if label in labels]
+
+    def extract(self, text: str) -> List[Entity]:
+        """
+        Extract entities from text.
+
+        Args:
+            text: Text to process
+
+        Returns:
+            List of Entity objects ordered by position
+        """
+        if not text:
+            return []
+
+        spans = []
+        for label, pattern, group in self.patterns:
+            for match in pattern.finditer(text):
+                if label == 'GPE' and group == 'state' and match.group('state') not in STATE_CODES:
+                    continue
+                spans.append((match.start(group), match.end(group), label))
+
+        # Keep the earliest, then longest, of overlapping spans
+        spans.sort(key=lambda span: (span[0], span[0] - span[1]))
+        entities = []
+        end_of_last = -1
+        for start, end, label in spans:
+            if start >= end_of_last:
+                entities.append(Entity(text=text[start:end], label=label, start_char=start, end_char=end))
+                end_of_last = end
+        return entities
+
+    def extract_by_label(self, text: str) -> Dict[str, List[Entity]]:
+        """
+        Extract entities from text grouped by label.
+
+        Args:
+            text: Text to process
+
+        Returns:
+            Dictionary mapping each label to its entities
+        """
+        result = {label: [] for label, _, _ in self.patterns}
+        for entity in self.extract(text):
+            result[entity.label].append(entity)
+        return result
+
+
+# Example usage
+EXAMPLE_USAGE = """
+# Example: Cheap entity extraction while ingesting bills
+
+from analysis.fast_entity import IngestEntityExtractor
+
+extractor = IngestEntityExtractor()
+entities = extractor.extract(
+    "Senator Jane Smith (D-CA) introduced H.R. 1234 to amend the Clean Air Act on March 3, 2023."
+)
+for entity in entities:
+    print(f"  {entity.text}: {entity.label}")
+
+# Or let NLPProcessor defer spaCy until full analysis is asked for
+from analysis.nlp_processor import NLPProcessor
+
+processor = NLPProcessor(lazy_spacy=True)
+sketch = processor.process(bill_text)        # regex entities only, spaCy never loaded
+full = processor.process_full(bill_text)     # full spaCy analysis
+"""
@@ -8,14 +8,22 @@ This module provides comprehensive NLP processing for legislative text including
 - Text preprocessing and tokenization
 """
 
+import functools
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
+import numpy as np
+
 # Optional imports
 try:
     import spacy
+    from spacy.attrs import IS_PUNCT, IS_SPACE, LEMMA, LENGTH
     from spacy.tokens import Doc
     HAS_SPACY = True
 except ImportError:
@@ -25,6 +33,39 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Documents per nlp.pipe batch in process_batch; override with SPACY_BATCH_SIZE
+DEFAULT_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', '64'))
+
+# extract_political_entities category of each entity label (others go to 'other')
+POLITICAL_CATEGORIES = {
+    'PERSON': 'people',
+    'ORG': 'organizations', 'NORP': 'organizations',  # Organization or political group
+    'GPE': 'locations', 'LOC': 'locations',  # Geopolitical entity or location
+    'LAW': 'laws',
+    'DATE': 'dates',
+}
+
+# Docs kept per NLPProcessor so analyses of the same text share one pipeline run
+DOC_CACHE_SIZE = 128
+
+# Institutions and laws matched by the rule-based entity pipeline in addition
+# to the names passed to NLPProcessor.load_known_entities(). Names found in
+# nearly every legislative text (Congress, Senate, Constitution) are left out
+# so the list only holds discriminating names.
+KNOWN_ENTITIES = {
+    'ORG': (
+        'Supreme Court', 'Congressional Budget Office', 'Government Accountability Office',
+        'Congressional Research Service', 'Library of Congress',
+        'Democratic Party', 'Republican Party',
+    ),
+    'LAW': (
+        'Internal Revenue Code', 'Social Security Act',
+        'Affordable Care Act', 'Civil Rights Act', 'Voting Rights Act',
+        'Clean Air Act', 'Clean Water Act', 'Patriot Act',
+        'National Defense Authorization Act',
+    ),
+}
+
 
 @dataclass
 class Entity:
@@ -98,39 +139,184 @@ class NLPProcessor:
     DEFAULT_MODEL = 'en_core_web_sm'  # Small English model
     LARGE_MODEL = 'en_core_web_lg'    # Large model with word vectors
     
-    def __init__(self, model_name: str = None, disable: List[str] = None):
+    # Pipeline components each task reads from; the rest are switched off
+    # while it runs (components missing from the loaded model are ignored)
+    TASK_PIPES = {
+        'entities': ('ner', 'entity_ruler'),
+        'phrases': ('tagger', 'morphologizer', 'attribute_ruler', 'parser'),
+        'complexity': (
+            'tagger', 'morphologizer', 'attribute_ruler', 'lemmatizer',
+            'parser', 'senter', 'sentencizer',
+        ),
+    }
+    
+    def __init__(
+        self,
+        model_name: str = None,
+        disable: List[str] = None,
+        lazy_spacy: bool = False,
+        doc_cache_size: int = DOC_CACHE_SIZE,
+    ):
         """
         Initialize NLP processor.
         
         Args:
             model_name: Name of spaCy model to use
             disable: List of pipeline components to disable for speed
+            lazy_spacy: Answer process() and process_batch() with regex entities
+                only (see fast_entity), loading spaCy on first use of
+                process_full() or another spaCy-backed method
+            doc_cache_size: Processed Docs to keep for reuse across
+                extract_*, get_key_phrases and analyze_complexity (0 disables)
         """
+        self.model_name = model_name or self.DEFAULT_MODEL
+        self.disable = disable or []
+        self.lazy_spacy = lazy_spacy
+        self._nlp = None
+        self._task_pipes = {}
+        self.nlp_fast = None
+        self.doc_cache_size = doc_cache_size
+        self._docs = OrderedDict()  # text digest -> (components run, Doc)
+        self._lock = threading.Lock()  # guards _docs and lazy model loading
+        
+        if lazy_spacy:
+            # Imported here because fast_entity builds on this module's Entity
+            from .fast_entity import IngestEntityExtractor
+            self.ingest_extractor = IngestEntityExtractor()
+        else:
+            self._load()
+    
+    @property
+    def nlp(self):
+        """The spaCy pipeline, loaded on first access in lazy mode."""
+        if self._nlp is None:
+            with self._lock:
+                if self._nlp is None:
+                    self._load()
+        return self._nlp
+    
+    def _load(self):
+        """Load the spaCy model."""
         if not HAS_SPACY:
             raise ImportError(
                 "spaCy not installed. Install with: "
                 "pip install spacy && python -m spacy download en_core_web_sm"
             )
         
-        self.model_name = model_name or self.DEFAULT_MODEL
-        self.disable = disable or []
-        
         try:
             logger.info(f"Loading spaCy model: {self.model_name}")
-            self.nlp = spacy.load(self.model_name, disable=self.disable)
+            nlp = spacy.load(self.model_name, disable=self.disable)
         except OSError:
             logger.error(f"Model {self.model_name} not found. Downloading...")
             # Try to download the model
             import subprocess
             subprocess.run(["python", "-m", "spacy", "download", self.model_name])
-            self.nlp = spacy.load(self.model_name, disable=self.disable)
+            nlp = spacy.load(self.model_name, disable=self.disable)
+        
+        task_pipes = {task: self._pipes_for(nlp, names) for task, names in self.TASK_PIPES.items()}
+        needed = {name for pipes in task_pipes.values() for name in pipes}
+        task_pipes['all'] = [name for name in nlp.pipe_names if name in needed]
+        # Publish the pipeline last, so other threads never see it without its task pipes
+        self._task_pipes = task_pipes
+        self._nlp = nlp
         
         logger.info(f"Loaded spaCy model: {self.model_name}")
     
+    @staticmethod
+    def _pipes_for(nlp, names: Tuple[str, ...]) -> List[str]:
+        """
+        Loaded components among names, plus any shared embedding layer they listen to.
+        """
+        enabled = [name for name in nlp.pipe_names if name in names]
+        for name in ('tok2vec', 'transformer'):
+            if name in nlp.pipe_names:
+                listeners = getattr(nlp.get_pipe(name), 'listening_components', [])
+                if any(listener in enabled for listener in listeners):
+                    enabled.append(name)
+        return enabled
+    
+    def _run(self, task: str, text: str):
+        """
+        Process text with only the components the task needs.
+        
+        Docs are cached by text digest and reused by later tasks whose
+        components are a subset of those the Doc was produced with. A
+        cached text is rerun with the union of both sets, so alternating
+        tasks on one text settle on a single Doc.
+        
+        Components are disabled per call rather than on the shared pipeline,
+        and the cache is locked, so one processor can serve several threads.
+        """
+        nlp = self.nlp
+        pipes = self._task_pipes[task]
+        key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        with self._lock:
+            cached = self._docs.get(key)
+            if cached is not None:
+                if cached[0].issuperset(pipes):
+                    self._docs.move_to_end(key)
+                    return cached[1]
+                pipes = [name for name in nlp.pipe_names if name in cached[0] or name in pipes]
+        
+        doc = nlp(text, disable=[name for name in nlp.pipe_names if name not in pipes])
+        
+        if self.doc_cache_size > 0:
+            with self._lock:
+                self._docs[key] = (frozenset(pipes), doc)
+                self._docs.move_to_end(key)
+                while len(self._docs) > self.doc_cache_size:
+                    self._docs.popitem(last=False)
+        return doc
+    
+    def load_known_entities(self, known: Dict[str, Iterable[str]] = None, lang: str = 'en'):
+        """
+        Build a rule-based entity pipeline from known names.
+        
+        Afterwards extract_political_entities() matches these names (case
+        insensitively, via spaCy's phrase matcher) and merges them into the
+        statistical NER results; the statistical NER is skipped only for
+        texts where known names cover every entity category.
+        
+        Args:
+            known: Mapping of entity label to names, e.g. {'PERSON': legislator
+                names}; merged with KNOWN_ENTITIES
+            lang: Language of the blank tokenizer pipeline
+        """
+        if not HAS_SPACY:
+            raise ImportError("spaCy not installed. Install with: pip install spacy")
+        
+        patterns = []
+        for source in (KNOWN_ENTITIES, known or {}):
+            for label, names in source.items():
+                patterns.extend({'label': label, 'pattern': name} for name in names if name)
+        
+        nlp_fast = spacy.blank(lang)
+        ruler = nlp_fast.add_pipe('entity_ruler', config={'phrase_matcher_attr': 'LOWER'})
+        ruler.add_patterns(patterns)
+        self.nlp_fast = nlp_fast
+        logger.info(f"Loaded {len(patterns)} known entity patterns")
+    
     def process(self, text: str, text_id: int = None, text_type: str = None) -> ProcessedText:
         """
         Process text and extract entities and linguistic features.
         
+        With lazy_spacy, only regex entities are extracted; use process_full()
+        for the complete analysis.
+        
+        Args:
+            text: Text to process
+            text_id: Optional ID for the text
+            text_type: Optional type label
+            
+        Returns:
+            ProcessedText object with results
+        """
+        return next(self.process_batch([text], [text_id], [text_type]))
+    
+    def process_full(self, text: str, text_id: int = None, text_type: str = None) -> ProcessedText:
+        """
+        Process text with the full spaCy pipeline, even in lazy_spacy mode.
+        
         Args:
             text: Text to process
             text_id: Optional ID for the text
@@ -139,18 +325,79 @@ class NLPProcessor:
         Returns:
             ProcessedText object with results
         """
-        if not text or not text.strip():
-            logger.warning("Empty text provided for NLP processing")
-            return ProcessedText(
+        return next(self._process_spacy([text], [text_id], [text_type]))
+    
+    def process_batch(
+        self,
+        texts: Sequence[str],
+        text_ids: Sequence[int] = None,
+        text_types: Sequence[str] = None,
+        batch_size: int = None,
+        n_process: int = 1,
+    ) -> Iterator[ProcessedText]:
+        """
+        Process many texts through spaCy's batched nlp.pipe.
+        
+        Batching amortizes the pipeline's per-call overhead across documents,
+        which is much faster than calling process() once per text. With
+        lazy_spacy, texts get regex entities only and spaCy is not run.
+        
+        Args:
+            texts: Texts to process
+            text_ids: Optional ID per text
+            text_types: Optional type label per text
+            batch_size: Documents per batch (default DEFAULT_BATCH_SIZE)
+            n_process: Worker processes; each loads its own copy of the model,
+                so more than 1 only pays off for large corpora (-1 uses every CPU)
+            
+        Yields:
+            ProcessedText objects, in the same order as texts
+        """
+        text_ids = text_ids if text_ids is not None else [None] * len(texts)
+        text_types = text_types if text_types is not None else [None] * len(texts)
+        
+        if self.lazy_spacy:
+            return self._process_regex(texts, text_ids, text_types)
+        return self._process_spacy(texts, text_ids, text_types, batch_size, n_process)
+    
+    def _process_regex(self, texts, text_ids, text_types) -> Iterator[ProcessedText]:
+        """Yield ProcessedText objects holding only regex-extracted entities."""
+        for text, text_id, text_type in zip(texts, text_ids, text_types):
+            yield ProcessedText(
                 text_id=text_id,
                 text_type=text_type,
+                entities=self.ingest_extractor.extract(text),
                 processed_at=datetime.utcnow(),
-                model_name=self.model_name,
+                model_name=self.ingest_extractor.MODEL_NAME,
             )
-        
-        # Process with spaCy
-        doc = self.nlp(text)
-        
+    
+    def _process_spacy(
+        self, texts, text_ids, text_types, batch_size: int = None, n_process: int = 1,
+    ) -> Iterator[ProcessedText]:
+        """Yield ProcessedText objects from the full spaCy pipeline."""
+        # Blank texts never reach spaCy; pipe() yields documents in order,
+        # so each non-blank text takes the next one
+        docs = self.nlp.pipe(
+            (text for text in texts if text and text.strip()),
+            batch_size=batch_size or DEFAULT_BATCH_SIZE,
+            n_process=n_process,
+        )
+        for text, text_id, text_type in zip(texts, text_ids, text_types):
+            if not text or not text.strip():
+                logger.warning("Empty text provided for NLP processing")
+                yield ProcessedText(
+                    text_id=text_id,
+                    text_type=text_type,
+                    processed_at=datetime.utcnow(),
+                    model_name=self.model_name,
+                )
+            else:
+                yield self._build_processed(next(docs), text_id, text_type)
+    
+    def _build_processed(self, doc, text_id: Optional[int], text_type: Optional[str]) -> ProcessedText:
+        """
+        Collect entities, sentences, tokens and statistics from a processed Doc.
+        """
         # Extract entities
         entities = []
         for ent in doc.ents:
@@ -164,10 +411,14 @@ class NLPProcessor:
         # Extract sentences
         sentences = [sent.text.strip() for sent in doc.sents]
         
-        # Extract tokens and linguistic features
-        tokens = [token.text for token in doc if not token.is_space]
-        lemmas = [token.lemma_ for token in doc if not token.is_space]
-        pos_tags = [token.pos_ for token in doc if not token.is_space]
+        # Extract tokens and linguistic features in one pass over the Doc
+        tokens, lemmas, pos_tags = [], [], []
+        for token in doc:
+            if token.is_space:
+                continue
+            tokens.append(token.text)
+            lemmas.append(token.lemma_)
+            pos_tags.append(token.pos_)
         
         # Calculate statistics
         sentence_count = len(sentences)
@@ -189,6 +440,25 @@ class NLPProcessor:
             model_name=self.model_name,
         )
     
+    def process_all(self, text: str, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Run entity, key phrase and complexity analysis with one pipeline pass.
+        
+        Args:
+            text: Text to analyze
+            top_n: Number of key phrases to return
+            
+        Returns:
+            Dictionary with 'entities' (grouped as by extract_political_entities),
+            'key_phrases' and 'complexity'
+        """
+        doc = self._run('all', text)
+        return {
+            'entities': self._group_political(doc.ents),
+            'key_phrases': self._key_phrases(doc, top_n),
+            'complexity': self._complexity(doc),
+        }
+    
     def extract_entities_by_type(self, text: str, entity_types: List[str] = None) -> List[Entity]:
         """
         Extract specific types of entities from text.
@@ -201,7 +471,7 @@ class NLPProcessor:
         Returns:
             List of Entity objects
         """
-        doc = self.nlp(text)
+        doc = self._run('entities', text)
         entities = []
         
         for ent in doc.ents:
@@ -219,14 +489,54 @@ class NLPProcessor:
         """
         Extract politically relevant entities (people, organizations, locations, laws).
         
+        Uses the rule-based pipeline when load_known_entities() has been
+        called, adding statistical NER entities that do not overlap its
+        matches unless the matches already cover every category.
+        
         Args:
             text: Text to process
             
         Returns:
             Dictionary with entity types as keys and lists of entities as values
         """
-        doc = self.nlp(text)
+        return next(self.extract_political_entities_batch([text]))
+    
+    def extract_political_entities_batch(
+        self, texts: Sequence[str], batch_size: int = None,
+    ) -> Iterator[Dict[str, List[Entity]]]:
+        """
+        Extract politically relevant entities from many texts.
+        
+        Args:
+            texts: Texts to process
+            batch_size: Documents per nlp.pipe batch (default DEFAULT_BATCH_SIZE)
+            
+        Yields:
+            Dictionaries as returned by extract_political_entities, in order
+        """
+        if self.nlp_fast is None:
+            for text in texts:
+                yield self._group_political(self._run('entities', text).ents)
+            return
         
+        categories = set(POLITICAL_CATEGORIES.values())
+        for doc in self.nlp_fast.pipe(texts, batch_size=batch_size or DEFAULT_BATCH_SIZE):
+            ents = list(doc.ents)
+            # Statistical NER is skipped only when known names matched every
+            # category; otherwise its entities that do not overlap a known name
+            # are merged in, so categories the list rarely holds (locations,
+            # dates) keep the model's recall
+            if not categories <= {POLITICAL_CATEGORIES.get(ent.label_) for ent in ents}:
+                matched = [(ent.start_char, ent.end_char) for ent in ents]
+                ents.extend(
+                    ent for ent in self._run('entities', doc.text).ents
+                    if all(ent.end_char <= start or ent.start_char >= end for start, end in matched)
+                )
+                ents.sort(key=lambda ent: ent.start_char)
+            yield self._group_political(ents)
+    
+    def _group_political(self, ents) -> Dict[str, List[Entity]]:
+        """Group entity spans into the extract_political_entities categories."""
         result = {
             'people': [],
             'organizations': [],
@@ -236,26 +546,14 @@ class NLPProcessor:
             'other': [],
         }
         
-        for ent in doc.ents:
+        for ent in ents:
             entity = Entity(
                 text=ent.text,
                 label=ent.label_,
                 start_char=ent.start_char,
                 end_char=ent.end_char,
             )
-            
-            if ent.label_ == 'PERSON':
-                result['people'].append(entity)
-            elif ent.label_ in ['ORG', 'NORP']:  # Organization or political group
-                result['organizations'].append(entity)
-            elif ent.label_ in ['GPE', 'LOC']:  # Geopolitical entity or location
-                result['locations'].append(entity)
-            elif ent.label_ == 'LAW':
-                result['laws'].append(entity)
-            elif ent.label_ == 'DATE':
-                result['dates'].append(entity)
-            else:
-                result['other'].append(entity)
+            result[POLITICAL_CATEGORIES.get(ent.label_, 'other')].append(entity)
         
         return result
     
@@ -270,15 +568,21 @@ class NLPProcessor:
         Returns:
             List of key noun phrases
         """
-        doc = self.nlp(text)
-        
+        return self._key_phrases(self._run('phrases', text), top_n)
+    
+    def _key_phrases(self, doc, top_n: int) -> List[str]:
+        """Distinct noun phrases of a Doc, in order of appearance."""
         # Extract noun chunks (noun phrases)
         phrases = []
+        seen = set()
         for chunk in doc.noun_chunks:
             # Clean up the phrase
             phrase = chunk.text.strip().lower()
-            if len(phrase) > 3 and phrase not in phrases:  # Avoid duplicates and very short phrases
+            if len(phrase) > 3 and phrase not in seen:  # Avoid duplicates and very short phrases
+                seen.add(phrase)
                 phrases.append(phrase)
+                if len(phrases) == top_n:
+                    break
         
         # Return top N
         return phrases[:top_n]
@@ -293,21 +597,29 @@ class NLPProcessor:
         Returns:
             Dictionary with complexity metrics
         """
-        doc = self.nlp(text)
-        
+        return self._complexity(self._run('complexity', text))
+    
+    def _complexity(self, doc) -> Dict[str, float]:
+        """Complexity metrics of a Doc."""
         # Count various elements
-        sentence_count = len(list(doc.sents))
-        token_count = len([t for t in doc if not t.is_space])
-        word_count = len([t for t in doc if not t.is_space and not t.is_punct])
+        sentence_count = sum(1 for _ in doc.sents)
+        
+        # Token attributes as a uint64 matrix (lemma hash, flags, length),
+        # so the per-word counts run in NumPy rather than per-token Python
+        attrs = doc.to_array([LEMMA, IS_SPACE, IS_PUNCT, LENGTH]).reshape(-1, 4)
+        words = (attrs[:, 1] == 0) & (attrs[:, 2] == 0)
+        word_count = int(words.sum())
         
         # Calculate metrics
         avg_sentence_length = word_count / sentence_count if sentence_count > 0 else 0
         
         # Count complex words (more than 2 syllables - rough estimate)
-        complex_words = len([t for t in doc if not t.is_space and not t.is_punct and len(t.text) > 7])
+        complex_words = int((words & (attrs[:, 3] > 7)).sum())
         
-        # Lexical diversity (unique words / total words)
-        unique_words = len(set([t.lemma_.lower() for t in doc if not t.is_space and not t.is_punct]))
+        # Lexical diversity (unique words / total words); lemma hashes are
+        # deduplicated first, so only distinct lemmas are lowercased
+        strings = doc.vocab.strings
+        unique_words = len({strings[int(h)].lower() for h in np.unique(attrs[words, 0])})
         lexical_diversity = unique_words / word_count if word_count > 0 else 0
         
         return {
@@ -319,6 +631,18 @@ class NLPProcessor:
         }
 
 
+@functools.lru_cache(maxsize=4)
+def _get_processor(model_name: str, disable: Tuple[str, ...] = ()) -> NLPProcessor:
+    """
+    Shared NLPProcessor per (model, disabled components), so convenience
+    calls load each spaCy pipeline once instead of on every call. It keeps
+    no Doc cache, so the process-wide instance does not hold on to bill
+    Docs; sharing it across threads is safe because _run never changes
+    pipeline state.
+    """
+    return NLPProcessor(model_name, list(disable), doc_cache_size=0)
+
+
 def extract_entities(text: str, entity_types: List[str] = None) -> List[Entity]:
     """
     Convenience function to extract entities from text.
@@ -330,7 +654,7 @@ def extract_entities(text: str, entity_types: List[str] = None) -> List[Entity]:
     Returns:
         List of Entity objects
     """
-    processor = NLPProcessor()
+    processor = _get_processor(NLPProcessor.DEFAULT_MODEL)
     return processor.extract_entities_by_type(text, entity_types)
 
 
@@ -351,6 +675,10 @@ print(f"Found {len(result.entities)} entities")
 for entity in result.entities:
     print(f"  {entity.text}: {entity.label}")
 
+# Process many texts at once (much faster than calling process() in a loop)
+bills = ["First bill text...", "Second bill text..."]
+results = list(processor.process_batch(bills, text_ids=[1, 2], text_types=['bill', 'bill']))
+
 # Extract specific entity types
 people = processor.extract_entities_by_type(bill_text, entity_types=['PERSON'])
 print(f"Found {len(people)} people mentioned")
@@ -360,6 +688,13 @@ political = processor.extract_political_entities(bill_text)
 print(f"People: {[e.text for e in political['people']]}")
 print(f"Organizations: {[e.text for e in political['organizations']]}")
 
+# Match known legislators, institutions and laws without statistical NER
+from app.db import DBIngestor
+dbi = DBIngestor(conn_str); dbi.connect()
+processor.load_known_entities({'PERSON': dbi.legislator_names()})
+for political in processor.extract_political_entities_batch(bills):
+    print(f"People: {[e.text for e in political['people']]}")
+
 # Get key phrases
 phrases = processor.get_key_phrases(bill_text, top_n=5)
 print(f"Key phrases: {phrases}")
@@ -368,6 +703,9 @@ print(f"Key phrases: {phrases}")
 complexity = processor.analyze_complexity(bill_text)
 print(f"Complexity metrics: {complexity}")
 
+# Entities, key phrases and complexity from a single pipeline pass
+analysis = processor.process_all(bill_text, top_n=5)
+
 # Quick entity extraction
 entities = extract_entities("President Biden signed the bill", entity_types=['PERSON'])
 """
@@ -13,91 +13,309 @@
 # Outputs: Applies migrations to Postgres, provides upsert APIs
 ###############################################################################
 
+import io
 import os
 import glob
+import threading
 import psycopg2
 import psycopg2.extras
-from typing import Optional, Dict, Any
+import psycopg2.pool
+from typing import Optional, Dict, Any, Iterable, List, Sequence, Tuple
 from app.utils import labeled, configure_logger
 
 logger = configure_logger("db", level=20)
 
+# Connections per DSN shared by all DBIngestors; override with DB_POOL_MAX_CONN
+POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX_CONN", "16"))
+
+_pools: Dict[str, psycopg2.pool.ThreadedConnectionPool] = {}
+# One slot per pooled connection; getconn() raises rather than waits when the pool is exhausted
+_pool_slots: Dict[str, threading.BoundedSemaphore] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(conn_str: str) -> psycopg2.pool.ThreadedConnectionPool:
+    """Returns the process-wide connection pool for a DSN, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(conn_str)
+        if pool is None or pool.closed:
+            pool = psycopg2.pool.ThreadedConnectionPool(minconn=1, maxconn=POOL_MAX_CONN, dsn=conn_str)
+            _pools[conn_str] = pool
+            _pool_slots[conn_str] = threading.BoundedSemaphore(POOL_MAX_CONN)
+        return pool
+
+def close_pools():
+    """Closes every pooled connection, e.g. at process shutdown."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+        _pool_slots.clear()
+
+# Rows per multi-row INSERT statement in the batch upserts
+UPSERT_PAGE_SIZE = 1000
+
+BILL_COLUMNS = ("source_file", "congress", "chamber", "bill_number", "title", "sponsor", "introduced_date")
+VOTE_COLUMNS = ("source_file", "congress", "chamber", "vote_id", "vote_date", "result")
+LEGISLATOR_COLUMNS = ("name", "bioguide", "current_party", "state")
+
+# Rows buffered per COPY in bulk_load_bills_copy
+COPY_CHUNK_ROWS = 50000
+
+def _copy_field(value) -> str:
+    """Formats a value for COPY's text format (None is NULL)."""
+    if value is None:
+        return "\\N"
+    text = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
 @labeled("db_migrations")
-def run_migrations(conn_str: str, migrations_dir: str):
+def run_migrations(conn_str: str, migrations_dir: str, conn=None):
     """
     Applies SQL migration files in lexicographic order. Each file applied in a transaction.
+    Uses conn when given (leaving it open), otherwise a connection of its own.
     """
     logger.info("Running migrations from %s", migrations_dir)
     files = sorted(glob.glob(os.path.join(migrations_dir, "*.sql")))
-    conn = psycopg2.connect(conn_str)
+    own_conn = conn is None
+    if own_conn:
+        conn = psycopg2.connect(conn_str)
     try:
-        for f in files:
-            with open(f, "r", encoding="utf-8") as fh:
-                sql = fh.read()
-            logger.info("Applying migration %s", f)
-            with conn.cursor() as cur:
+        with conn.cursor() as cur:
+            for f in files:
+                with open(f, "r", encoding="utf-8") as fh:
+                    sql = fh.read()
+                logger.info("Applying migration %s", f)
                 cur.execute(sql)
-            conn.commit()
+                conn.commit()
     finally:
-        conn.close()
+        if own_conn:
+            conn.close()
 
 class DBIngestor:
-    def __init__(self, conn_str: str):
+    def __init__(self, conn_str: str, entity_extractor=None):
+        # entity_extractor: optional object with extract(text) and MODEL_NAME
+        # (e.g. analysis.fast_entity.IngestEntityExtractor); when set, entities
+        # in each bill title are stored in extracted_entities on upsert
         self.conn_str = conn_str
         self.conn = None
+        self.pool = None
+        self._slot = None
+        self.entity_extractor = entity_extractor
 
     @labeled("db_connect")
     def connect(self):
-        self.conn = psycopg2.connect(self.conn_str)
-        self.conn.autocommit = False
+        """
+        Borrows a connection from the pool shared per DSN, so ingestors in
+        worker threads reuse up to POOL_MAX_CONN open connections. Blocks until
+        one is free when all are checked out; a no-op if already connected.
+        """
+        if self.conn is not None:
+            return
+        pool = get_pool(self.conn_str)
+        with _pools_lock:
+            slot = _pool_slots[self.conn_str]
+        slot.acquire()
+        try:
+            conn = pool.getconn()
+            conn.autocommit = False
+        except Exception:
+            slot.release()
+            raise
+        self.pool, self._slot, self.conn = pool, slot, conn
 
     @labeled("db_ensure_schema")
     def ensure_schema(self, migrations_dir: str):
-        run_migrations(self.conn_str, migrations_dir)
+        run_migrations(self.conn_str, migrations_dir, conn=self.conn)
+
+    def _upsert_many(self, cur, table: str, columns: Sequence[str], conflict: Sequence[str],
+                     updates: Sequence[str], records: Sequence[Dict[str, Any]]) -> List[Optional[int]]:
+        """
+        Upserts records with multi-row INSERT ... ON CONFLICT statements and
+        returns their ids in record order. Records sharing a conflict key are
+        written once, with the last one's values, as sequential upserts would
+        leave them (Postgres rejects a statement updating a row twice).
+        """
+        rows, slots, seen = [], [], {}
+        for record in records:
+            row = tuple(record.get(c) for c in columns)
+            key = tuple(record.get(c) for c in conflict)
+            if None in key:
+                # NULL keys never conflict, so every such record is its own row
+                slots.append(len(rows))
+                rows.append(row)
+            elif key in seen:
+                rows[seen[key]] = row
+                slots.append(seen[key])
+            else:
+                seen[key] = len(rows)
+                slots.append(len(rows))
+                rows.append(row)
+        if not rows:
+            return []
+        sql = f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            VALUES %s
+            ON CONFLICT ({",".join(conflict)}) DO UPDATE
+            SET {", ".join(f"{c} = EXCLUDED.{c}" for c in updates)}
+            RETURNING id
+        """
+        # RETURNING yields rows in VALUES order
+        ids = [r[0] for r in psycopg2.extras.execute_values(cur, sql, rows, page_size=UPSERT_PAGE_SIZE, fetch=True)]
+        return [ids[i] for i in slots]
+
+    @labeled("db_upsert_bills")
+    def upsert_bills(self, records: Sequence[Dict[str, Any]]) -> List[Optional[int]]:
+        with self.conn.cursor() as cur:
+            ids = self._write_bills(cur, records)
+        self.conn.commit()
+        return ids
+
+    def _write_bills(self, cur, records: Sequence[Dict[str, Any]]) -> List[Optional[int]]:
+        ids = self._upsert_many(cur, "bills", BILL_COLUMNS, ("congress", "chamber", "bill_number"),
+                                ("title", "sponsor", "introduced_date"), records)
+        if ids and self.entity_extractor is not None:
+            # Duplicates resolve to the last record, whose title was stored
+            titles = {bill_id: record.get("title") for bill_id, record in zip(ids, records)}
+            self._replace_entities(cur, "bill", list(titles.items()))
+        return ids
 
     @labeled("db_upsert_bill")
     def upsert_bill(self, record: Dict[str, Any]):
+        ids = self.upsert_bills([record])
+        return ids[0] if ids else None
+
+    @labeled("db_bulk_load_bills_copy")
+    def bulk_load_bills_copy(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Upserts bills by streaming them through COPY into a temporary staging
+        table and merging that into bills with one INSERT ... SELECT. Much
+        faster than row inserts for cold loads. Within the load, the last
+        record for a (congress, chamber, bill_number) wins, as with
+        upsert_bills. Returns the number of bills written.
+        """
+        columns = ", ".join(BILL_COLUMNS)
+        key = "congress, chamber, bill_number"
         with self.conn.cursor() as cur:
             cur.execute("""
-                INSERT INTO bills (source_file, congress, chamber, bill_number, title, sponsor, introduced_date)
-                VALUES (%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (congress,chamber,bill_number) DO UPDATE
+                CREATE TEMP TABLE bills_staging (
+                  ord BIGINT, source_file TEXT, congress INTEGER, chamber TEXT, bill_number TEXT,
+                  title TEXT, sponsor TEXT, introduced_date TIMESTAMP
+                ) ON COMMIT DROP
+            """)
+            buf, buffered = io.StringIO(), 0
+            for ord_, record in enumerate(records):
+                buf.write("\t".join([str(ord_)] + [_copy_field(record.get(c)) for c in BILL_COLUMNS]))
+                buf.write("\n")
+                buffered += 1
+                if buffered >= COPY_CHUNK_ROWS:
+                    buf.seek(0)
+                    cur.copy_expert(f"COPY bills_staging (ord, {columns}) FROM STDIN", buf)
+                    buf, buffered = io.StringIO(), 0
+            if buffered:
+                buf.seek(0)
+                cur.copy_expert(f"COPY bills_staging (ord, {columns}) FROM STDIN", buf)
+            # Keep the last row per key; rows with a NULL key never conflict, so each stays
+            cur.execute(f"""
+                INSERT INTO bills ({columns})
+                SELECT {columns} FROM (
+                  SELECT DISTINCT ON ({key}, CASE WHEN congress IS NULL OR chamber IS NULL OR bill_number IS NULL THEN ord END)
+                         *
+                  FROM bills_staging
+                  ORDER BY {key}, CASE WHEN congress IS NULL OR chamber IS NULL OR bill_number IS NULL THEN ord END, ord DESC
+                ) latest
+                ORDER BY ord
+                ON CONFLICT ({key}) DO UPDATE
                 SET title = EXCLUDED.title, sponsor = EXCLUDED.sponsor, introduced_date = EXCLUDED.introduced_date
-                RETURNING id
-            """, (record.get("source_file"), record.get("congress"), record.get("chamber"), record.get("bill_number"), record.get("title"), record.get("sponsor"), record.get("introduced_date")))
-            res = cur.fetchone()
+                RETURNING id, title
+            """)
+            written = cur.fetchall()
+            if written and self.entity_extractor is not None:
+                self._replace_entities(cur, "bill", written)
         self.conn.commit()
-        return res[0] if res else None
+        return len(written)
+
+    def _replace_entities(self, cur, text_type: str, texts: Sequence[Tuple[int, Optional[str]]]):
+        model_name = self.entity_extractor.MODEL_NAME
+        cur.execute("""
+            DELETE FROM extracted_entities WHERE text_id = ANY(%s) AND text_type = %s AND model_name = %s
+        """, ([text_id for text_id, _ in texts], text_type, model_name))
+        rows = [(text_id, text_type, e.text, e.label, e.start_char, e.end_char, e.confidence, model_name)
+                for text_id, text in texts
+                for e in self.entity_extractor.extract(text or "")]
+        if rows:
+            psycopg2.extras.execute_values(cur, """
+                INSERT INTO extracted_entities
+                    (text_id, text_type, entity_text, entity_label, start_char, end_char, confidence, model_name)
+                VALUES %s
+            """, rows, page_size=UPSERT_PAGE_SIZE)
+
+    @labeled("db_upsert_votes")
+    def upsert_votes(self, records: Sequence[Dict[str, Any]]) -> List[Optional[int]]:
+        with self.conn.cursor() as cur:
+            ids = self._write_votes(cur, records)
+        self.conn.commit()
+        return ids
+
+    def _write_votes(self, cur, records: Sequence[Dict[str, Any]]) -> List[Optional[int]]:
+        return self._upsert_many(cur, "votes", VOTE_COLUMNS, ("congress", "chamber", "vote_id"),
+                                 ("result", "vote_date"), records)
 
     @labeled("db_upsert_vote")
     def upsert_vote(self, record: Dict[str, Any]):
+        ids = self.upsert_votes([record])
+        return ids[0] if ids else None
+
+    @labeled("db_upsert_legislators")
+    def upsert_legislators(self, records: Sequence[Dict[str, Any]]) -> List[Optional[int]]:
         with self.conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO votes (source_file, congress, chamber, vote_id, vote_date, result)
-                VALUES (%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (congress,chamber,vote_id) DO UPDATE
-                SET result = EXCLUDED.result, vote_date = EXCLUDED.vote_date
-                RETURNING id
-            """, (record.get("source_file"), record.get("congress"), record.get("chamber"), record.get("vote_id"), record.get("vote_date"), record.get("result")))
-            res = cur.fetchone()
+            ids = self._write_legislators(cur, records)
         self.conn.commit()
-        return res[0] if res else None
+        return ids
+
+    def _write_legislators(self, cur, records: Sequence[Dict[str, Any]]) -> List[Optional[int]]:
+        return self._upsert_many(cur, "legislators", LEGISLATOR_COLUMNS, ("bioguide",),
+                                 ("name", "current_party", "state"), records)
 
     @labeled("db_upsert_legislator")
     def upsert_legislator(self, record: Dict[str, Any]):
+        ids = self.upsert_legislators([record])
+        return ids[0] if ids else None
+
+    @labeled("db_upsert_mixed")
+    def upsert_mixed(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> List[Optional[int]]:
+        """
+        Upserts a mix of ("bill" | "vote" | "legislator", record) pairs in one
+        transaction, grouping them per table so each table costs one batched
+        statement per UPSERT_PAGE_SIZE rows rather than a round trip per record.
+        The tables do not reference each other, so grouping does not change
+        the result. Returns ids in input order.
+        """
+        writers = {"bill": self._write_bills, "vote": self._write_votes, "legislator": self._write_legislators}
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        slots = []
+        for kind, record in records:
+            if kind not in writers:
+                raise ValueError(f"unknown record kind {kind!r}; expected one of {sorted(writers)}")
+            group = grouped.setdefault(kind, [])
+            slots.append((kind, len(group)))
+            group.append(record)
         with self.conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO legislators (name, bioguide, current_party, state)
-                VALUES (%s,%s,%s,%s)
-                ON CONFLICT (bioguide) DO UPDATE
-                SET name = EXCLUDED.name, current_party = EXCLUDED.current_party, state = EXCLUDED.state
-                RETURNING id
-            """, (record.get("name"), record.get("bioguide"), record.get("current_party"), record.get("state")))
-            res = cur.fetchone()
+            ids = {kind: writers[kind](cur, group) for kind, group in grouped.items()}
         self.conn.commit()
-        return res[0] if res else None
+        return [ids[kind][i] for kind, i in slots]
+
+    @labeled("db_legislator_names")
+    def legislator_names(self) -> List[str]:
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT DISTINCT name FROM legislators WHERE name IS NOT NULL")
+            return [row[0] for row in cur.fetchall()]
 
     @labeled("db_close")
     def close(self):
         if self.conn:
-            self.conn.close()
\ No newline at end of file
+            # Returned connections are rolled back if left mid-transaction
+            try:
+                self.pool.putconn(self.conn)
+            finally:
+                self.conn = None
+                self._slot.release()
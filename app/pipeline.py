@@ -24,10 +24,13 @@ from typing import List, Dict, Any, Optional
 from urllib.parse import urlparse
 
 from app.utils import configure_logger, labeled, save_json_atomic, load_json_safe, ensure_dirs
-from app.db import DBIngestor, run_migrations
+from app.db import DBIngestor
 
 logger = configure_logger("pipeline", level=20)
 
+# Parsed records buffered per batch upsert during postprocess ingestion
+INGEST_BATCH_SIZE = 500
+
 # Import aiohttp dynamically where needed to avoid startup errors if not installed
 try:
     import aiohttp
@@ -304,7 +307,7 @@ class RetryManager:
 
 # Pipeline orchestrator
 class Pipeline:
-    def __init__(self, cfg, db_conn: Optional[str] = None):
+    def __init__(self, cfg, db_conn: Optional[str] = None, entity_extractor=None):
         self.cfg = cfg
         self.discovery = DiscoveryManager(cfg)
         self.validator = Validator()
@@ -313,7 +316,8 @@ class Pipeline:
         self.parser = ParserNormalizer()
         self.retry = RetryManager(cfg.retry_report)
         self.db_conn = db_conn
-        self.db_ingestor = DBIngestor(db_conn) if db_conn else None
+        self.entity_extractor = entity_extractor
+        self.db_ingestor = DBIngestor(db_conn, entity_extractor) if db_conn else None
 
     @labeled("pipeline_discover")
     def discover(self):
@@ -347,23 +351,25 @@ class Pipeline:
             if extract:
                 self.extractor  # placeholder: extraction loop in real run
         if postprocess and self.db_conn:
-            # run migrations and ingest
-            run_migrations(self.db_conn, os.path.join(os.path.dirname(__file__), "db", "migrations"))
-            dbi = DBIngestor(self.db_conn); dbi.connect()
+            # run migrations (over the ingestor's connection) and ingest
+            dbi = DBIngestor(self.db_conn, self.entity_extractor); dbi.connect()
             dbi.ensure_schema(os.path.join(os.path.dirname(__file__), "db", "migrations"))
-            # naive ingestion: walk extracted content and insert
+            # naive ingestion: walk extracted content and insert, in batches
+            pending = []
             for root, dirs, files in os.walk(self.cfg.outdir):
                 for fname in files:
                     fpath = os.path.join(root, fname)
                     lower = fname.lower()
                     if lower.endswith(".json") and "legislators" in fname.lower():
                         rows = self.parser.parse_legislators(fpath)
-                        for row in rows:
-                            dbi.upsert_legislator(row)
+                        pending.extend(("legislator", row) for row in rows)
                     elif lower.endswith(".xml") and "bill" in lower:
                         rec = self.parser.parse_bill(fpath)
-                        if rec: dbi.upsert_bill(rec)
+                        if rec: pending.append(("bill", rec))
                     elif lower.endswith(".xml") and "vote" in lower:
                         rec = self.parser.parse_vote(fpath)
-                        if rec: dbi.upsert_vote(rec)
+                        if rec: pending.append(("vote", rec))
+                    if len(pending) >= INGEST_BATCH_SIZE:
+                        dbi.upsert_mixed(pending); pending = []
+            if pending: dbi.upsert_mixed(pending)
             dbi.close()
\ No newline at end of file
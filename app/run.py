@@ -34,6 +34,7 @@ def parse_args():
     parser.add_argument("--extract", dest="do_extract", action="store_true")
     parser.add_argument("--postprocess", dest="do_postprocess", action="store_true")
     parser.add_argument("--db", type=str, default="", help="Postgres connection string")
+    parser.add_argument("--extract-entities", dest="extract_entities", action="store_true", help="Store regex entities from bill titles on ingest")
     parser.add_argument("--schedule-interval", type=int, default=0)
     parser.add_argument("--limit", type=int, default=0)
     parser.add_argument("--dry-run", dest="dry_run", action="store_true")
@@ -46,7 +47,11 @@ def main():
     from app.pipeline import Config
     cfg = Config(start_congress=args.start_congress, end_congress=args.end_congress, outdir=args.outdir, output_file=args.output, retry_report=args.retry_report, concurrency=args.concurrency, retries=args.retries, collections=collections, do_discovery=args.do_discovery)
     ensure_dirs(args.outdir)
-    pipeline = Pipeline(cfg, db_conn=args.db if args.db else None)
+    entity_extractor = None
+    if args.extract_entities:
+        from analysis.fast_entity import IngestEntityExtractor
+        entity_extractor = IngestEntityExtractor()
+    pipeline = Pipeline(cfg, db_conn=args.db if args.db else None, entity_extractor=entity_extractor)
     if args.dry_run:
         data = pipeline.discover()
         sample = data.get("aggregate_urls", [])[:20]
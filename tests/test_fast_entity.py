@@ -0,0 +1,53 @@
+"""
+Tests for the regex entity extractor used on ingest.
+"""
+
+import pytest
+
+from analysis.fast_entity import IngestEntityExtractor
+
+
+def _entities(text):
+    return [(e.text, e.label) for e in IngestEntityExtractor().extract(text)]
+
+
+@pytest.mark.unit
+def test_enrolled_title_is_not_tagged_as_a_law():
+    """Test that the 'An Act' opening of enrolled titles is not a named act."""
+    entities = _entities(
+        "An Act To amend the Internal Revenue Code of 1986 to extend the Clean Air Act, "
+        "and for other purposes."
+    )
+    assert ('An Act', 'LAW') not in entities
+    assert ('Clean Air Act', 'LAW') in entities
+
+
+@pytest.mark.unit
+def test_short_title_clause():
+    """Test that 'This Act' is skipped and the cited act name is kept."""
+    entities = _entities("This Act may be cited as the Infrastructure Investment and Jobs Act of 2021.")
+    assert entities == [('Infrastructure Investment and Jobs Act of 2021', 'LAW')]
+
+
+@pytest.mark.unit
+def test_form_of_address_is_not_a_person():
+    """Test that 'Mr. Speaker' yields no person while titled names still do."""
+    assert _entities("Mr. Speaker, I yield the floor.") == []
+    assert _entities("Speaker Nancy Pelosi") == [('Nancy Pelosi', 'PERSON')]
+
+
+@pytest.mark.unit
+def test_citations_and_sponsor_tags():
+    """Test bill numbers, public laws, code citations and party-state tags."""
+    entities = _entities(
+        "Senator Jane Smith (D-CA) introduced H.R. 1234 to amend Public Law 117-58 "
+        "and 42 U.S.C. 1395 on March 3, 2023."
+    )
+    assert entities == [
+        ('Jane Smith', 'PERSON'),
+        ('CA', 'GPE'),
+        ('H.R. 1234', 'LAW'),
+        ('Public Law 117-58', 'LAW'),
+        ('42 U.S.C. 1395', 'LAW'),
+        ('March 3, 2023', 'DATE'),
+    ]
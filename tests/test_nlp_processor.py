@@ -0,0 +1,54 @@
+"""
+Tests for NLPProcessor's rule-based entity matching.
+"""
+
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from analysis.nlp_processor import NLPProcessor
+
+
+@pytest.fixture
+def processor(tmp_path):
+    """NLPProcessor over a small saved pipeline standing in for a statistical model."""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([
+        {"label": "GPE", "pattern": "Texas"},
+        {"label": "ORG", "pattern": "Congress"},
+        {"label": "PERSON", "pattern": "Jane"},
+    ])
+    nlp.to_disk(tmp_path / "model")
+    return NLPProcessor(str(tmp_path / "model"))
+
+
+@pytest.mark.unit
+def test_known_entities_keep_model_locations(processor):
+    """Test that known names do not hide locations found by the model."""
+    processor.load_known_entities({"PERSON": ["Jane Smith"]})
+    result = processor.extract_political_entities("Jane Smith told Congress about Texas.")
+
+    assert [e.text for e in result["people"]] == ["Jane Smith"]
+    assert [e.text for e in result["organizations"]] == ["Congress"]
+    assert [e.text for e in result["locations"]] == ["Texas"]
+
+
+@pytest.mark.unit
+def test_known_entities_batch_matches_single(processor):
+    """Test that batch extraction returns the same groups as one-by-one calls."""
+    processor.load_known_entities({"PERSON": ["Jane Smith"], "LAW": ["Farm Bill"]})
+    texts = ["The farm bill passed.", "Texas sued.", ""]
+
+    batch = [
+        {k: [e.to_dict() for e in v] for k, v in result.items()}
+        for result in processor.extract_political_entities_batch(texts)
+    ]
+    single = [
+        {k: [e.to_dict() for e in v] for k, v in processor.extract_political_entities(text).items()}
+        for text in texts
+    ]
+    assert batch == single
+    assert [e["text"] for e in batch[0]["laws"]] == ["farm bill"]
+    assert [e["text"] for e in batch[1]["locations"]] == ["Texas"]